@@ -0,0 +1,54 @@
+# Compare ways of clipping generated points to a field boundary with the path the mock data
+# pages use now: the prepared, vectorized test inside tiling.iter_tiled_points.
+# Run from the repository root: python -m benchmarks.clip_benchmark [points]
+import sys
+import time
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+from geomaker.tiling import iter_tiled_points
+
+
+def make_field():
+    # Irregular three-part field with a waterway cut out of the largest part
+    main = shapely.Point(0, 0).buffer(0.01, 64).difference(shapely.box(-0.002, -0.02, 0.002, 0.02).buffer(0.001))
+    return shapely.MultiPolygon(list(main.geoms) + [shapely.box(0.012, -0.004, 0.018, 0.004)])
+
+
+def main(count):
+    rng = np.random.default_rng(0)
+    field = make_field()
+    minx, miny, maxx, maxy = field.bounds
+    gdf = gpd.GeoDataFrame(
+        {"WetMass": rng.uniform(0, 10, count)},
+        geometry=gpd.points_from_xy(rng.uniform(minx, maxx, count), rng.uniform(miny, maxy, count)),
+        crs="EPSG:4326",
+    )
+
+    sample = gdf.iloc[:50_000]
+    start = time.perf_counter()
+    sample[sample.geometry.apply(lambda point: field.intersects(point))]
+    per_row = (time.perf_counter() - start) * count / len(sample)
+
+    start = time.perf_counter()
+    expected = gpd.clip(gdf, field)
+    geopandas_clip = time.perf_counter() - start
+
+    # One tile at no offset: the reference points clipped in place, then their rows taken
+    start = time.perf_counter()
+    coords = shapely.get_coordinates(gdf.geometry.values)
+    kept = np.concatenate([rows for _, rows, _, _ in iter_tiled_points(coords, make_field(), np.zeros((1, 2)))])
+    clipped = gdf.iloc[kept]
+    tiled = time.perf_counter() - start
+
+    assert len(clipped) == len(expected), "iter_tiled_points kept a different number of points than gpd.clip"
+    print(f"points={count:,}  kept={len(clipped):,}")
+    print(f"  per-row intersects (extrapolated) {per_row:8.3f}s")
+    print(f"  geopandas.clip                    {geopandas_clip:8.3f}s")
+    print(f"  iter_tiled_points (prepared)      {tiled:8.3f}s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
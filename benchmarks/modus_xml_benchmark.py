@@ -0,0 +1,101 @@
+# Compare the old string-concatenation Modus writer with the streaming lxml writer.
+# Run from the repository root: python -m benchmarks.modus_xml_benchmark [max_samples]
+import sys
+import time
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+from lxml import etree
+
+from geomaker.modus import modus_dates, write_modus_result, MODUS_METADATA_TEMPLATE
+
+DEPTHS = 6
+ANALYTES = 60
+
+
+def make_inputs(samples):
+    rng = np.random.default_rng(0)
+    elements = [f"A{index}" for index in range(ANALYTES)]
+    data = pd.DataFrame({element: rng.uniform(0, 100, samples) for element in elements})
+    data.insert(0, 'SampleNumber', np.arange(1, samples + 1))
+    depth_refs = [
+        {"DepthID": i + 1, "StartingDepth": 6 * i, "EndingDepth": 6 * (i + 1), "ColumnDepth": 6, "DepthUnit": "inches"}
+        for i in range(DEPTHS)
+    ]
+    analytes = [(element, "ppm", f"S-{element}-B2-1:7.01.03", 2, "VL") for element in elements]
+    return data, depth_refs, analytes
+
+
+def legacy_modus_xml(data, depth_refs, analytes, dates):
+    # The page's previous generate_modus_xml, with the metadata wrapped around it the same way
+    xml_strings = ""
+    xml_strings += "<EventSamples>\n<Soil>\n"
+    xml_strings += "<DepthRefs>\n"
+    for depth_ref in depth_refs:
+        column_name = f"{depth_ref['StartingDepth']} - {depth_ref['EndingDepth']}"
+        xml_strings += f"  <DepthRef DepthID=\"{depth_ref['DepthID']}\">\n"
+        xml_strings += f"    <Name>{column_name}</Name>\n"
+        xml_strings += f"    <StartingDepth>{depth_ref['StartingDepth']}</StartingDepth>\n"
+        xml_strings += f"    <EndingDepth>{depth_ref['EndingDepth']}</EndingDepth>\n"
+        xml_strings += f"    <ColumnDepth>{depth_ref['ColumnDepth']}</ColumnDepth>\n"
+        xml_strings += f"    <DepthUnit>{depth_ref['DepthUnit']}</DepthUnit>\n"
+        xml_strings += "  </DepthRef>\n"
+    xml_strings += "</DepthRefs>\n"
+    for index, row in data.iterrows():
+        xml_strings += "<SoilSample>\n<SampleMetaData>\n"
+        xml_strings += f"  <SampleNumber>{int(row['SampleNumber'])}</SampleNumber>\n"
+        xml_strings += "  <OverwriteResult>false</OverwriteResult>\n"
+        xml_strings += "  <Geometry></Geometry>\n"
+        xml_strings += "</SampleMetaData>\n<Depths>\n"
+        for depth_ref in depth_refs:
+            xml_strings += f"<Depth DepthID=\"{depth_ref['DepthID']}\">\n<NutrientResults>\n"
+            for nutrient, nutrient_unit, modus_test_id, decimal_precision, nutrient_value_desc in analytes:
+                rounded_nutrient_value = format(round(row[nutrient], decimal_precision), f".{decimal_precision}f")
+                xml_strings += "  <NutrientResult>\n"
+                xml_strings += f"    <Element>{nutrient}</Element>\n"
+                xml_strings += f"    <Value>{rounded_nutrient_value}</Value>\n"
+                xml_strings += f"    <ModusTestID>{modus_test_id}</ModusTestID>\n"
+                xml_strings += "    <ValueType>Measured</ValueType>\n"
+                xml_strings += f"    <ValueUnit>{nutrient_unit}</ValueUnit>\n"
+                xml_strings += f"    <ValueDesc>{nutrient_value_desc}</ValueDesc>\n"
+                xml_strings += "  </NutrientResult>\n"
+            xml_strings += "</NutrientResults>\n</Depth>\n"
+        xml_strings += "</Depths>\n</SoilSample>\n"
+    xml_strings += "</Soil>\n</EventSamples>\n"
+    metadata = MODUS_METADATA_TEMPLATE.format(**dates).replace("</LabMetaData>\n</Event>", "</LabMetaData>\n")
+    header = '<ModusResult xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" Version="1.0" xsi:noNamespaceSchemaLocation="modus_result.xsd">\n'
+    return header + metadata + xml_strings + "</Event>\n</ModusResult>\n"
+
+
+def canonical(xml_bytes):
+    # Same document with formatting whitespace removed
+    parser = etree.XMLParser(remove_blank_text=True)
+    return etree.tostring(etree.fromstring(xml_bytes, parser), method="c14n")
+
+
+def main(max_samples):
+    dates = modus_dates()
+    print(f"{DEPTHS} depths x {ANALYTES} analytes per sample")
+    for samples in [max_samples // 8, max_samples // 4, max_samples // 2, max_samples]:
+        data, depth_refs, analytes = make_inputs(samples)
+
+        start = time.perf_counter()
+        legacy = legacy_modus_xml(data, depth_refs, analytes, dates)
+        legacy_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        output = BytesIO()
+        write_modus_result(output, data, depth_refs, analytes, dates)
+        streaming_seconds = time.perf_counter() - start
+
+        assert canonical(legacy.encode("utf-8")) == canonical(output.getvalue()), "streaming writer produced a different document"
+        print(
+            f"samples={samples:5d}  results={samples * DEPTHS * ANALYTES:8,d}  "
+            f"concatenation {legacy_seconds:7.3f}s  streaming {streaming_seconds:7.3f}s  "
+            f"({streaming_seconds / samples * 1000:.2f} ms/sample, {len(output.getvalue()) / 1e6:.1f} MB)"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,40 @@
+# Compare the per-row update_date path with the vectorized redate_column, which
+# tile_reference_layer runs on the reference Time/IsoTime columns for every mock layer.
+# Run from the repository root: python -m benchmarks.redate_benchmark [rows]
+import datetime
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from geomaker.dates import TIME_FORMAT, redate_column, update_date
+
+
+def make_columns(rows):
+    # One reading per second starting mid-morning, like a harvest log
+    start = pd.Timestamp("2019-09-14 09:30:00")
+    stamps = start + pd.to_timedelta(np.arange(rows), unit="s") + pd.to_timedelta(np.random.randint(0, 1000, rows), unit="ms")
+    return {
+        "Time": pd.Series(stamps.strftime(TIME_FORMAT)),
+        "IsoTime": pd.Series(stamps.strftime("%Y-%m-%dT%H:%M:%S.") + pd.Series(stamps.microsecond // 1000).map("{:03d}".format) + "Z"),
+    }
+
+
+def main(rows):
+    new_date = datetime.date(2024, 10, 1)
+    for column, values in make_columns(rows).items():
+        start = time.perf_counter()
+        expected = values.apply(lambda x: update_date(x, new_date))
+        per_row = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = redate_column(values, new_date)
+        vectorized = time.perf_counter() - start
+
+        assert expected.equals(actual), f"{column} output differs from update_date"
+        print(f"{column:8} rows={rows:>9,}  per-row={per_row:8.3f}s  vectorized={vectorized:7.3f}s  speedup={per_row / vectorized:6.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 80_000)
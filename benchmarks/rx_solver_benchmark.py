@@ -0,0 +1,87 @@
+# Compare the Rx editor's old iterative rate adjustment with the closed-form scale solver.
+# Run from the repository root: python -m benchmarks.rx_solver_benchmark [max_grid_side]
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from geomaker.rx import scale_rates
+
+COST_PER_POUND = 10
+MIN_RATE = 20.0
+MAX_RATE = 100.0
+
+
+def make_grid(side):
+    rng = np.random.default_rng(0)
+    grid = rng.integers(0, 101, size=(side, side)).astype(float)
+    grid[rng.random((side, side)) < 0.01] = np.nan
+    valid_values = pd.DataFrame(grid).stack()
+    return valid_values[~valid_values.isnull() & (valid_values != 0)]
+
+
+def legacy_adjust(valid_values, target_total):
+    # The page's previous "Total Product" loop: rescale unlocked cells, lock clipped ones, then spread the remainder
+    valid_values = valid_values.copy()
+    tolerance, epsilon = 1e-2, 1e-6
+    locked_mask = pd.Series(False, index=valid_values.index)
+    for iteration in range(100):
+        adjustable_values = valid_values[~locked_mask]
+        if adjustable_values.empty:
+            break
+        adjustment_factor = (target_total - valid_values.sum()) / (adjustable_values.sum() + epsilon) + 1
+        adjusted_values_clipped = (adjustable_values * adjustment_factor).clip(lower=MIN_RATE, upper=MAX_RATE)
+        newly_locked = (
+            ((adjusted_values_clipped - MIN_RATE).abs() < epsilon) |
+            ((adjusted_values_clipped - MAX_RATE).abs() < epsilon)
+        ) & (~locked_mask.loc[adjusted_values_clipped.index])
+        locked_mask.loc[newly_locked.index] = True
+        valid_values.loc[adjusted_values_clipped.index] = adjusted_values_clipped
+        difference = valid_values.sum() - target_total
+        if abs(difference) <= tolerance or abs(adjustment_factor - 1) < epsilon:
+            break
+
+    for _ in range(10):
+        if abs(difference) <= tolerance:
+            break
+        adjustable_values = valid_values[~locked_mask]
+        if adjustable_values.empty or adjustable_values.sum() == 0:
+            break
+        adjusted = (adjustable_values + adjustable_values / adjustable_values.sum() * (target_total - valid_values.sum())).clip(lower=MIN_RATE, upper=MAX_RATE)
+        newly_locked = (((adjusted - MIN_RATE).abs() < epsilon) | ((adjusted - MAX_RATE).abs() < epsilon)) & (~locked_mask.loc[adjusted.index])
+        locked_mask.loc[newly_locked.index] = True
+        valid_values.loc[adjusted.index] = adjusted
+        difference = valid_values.sum() - target_total
+        if not newly_locked.any():
+            break
+    return valid_values, difference
+
+
+def main(max_side):
+    print(f"min {MIN_RATE}, max {MAX_RATE}; target = 1.25 x the original total product")
+    for side in [max_side // 100, max_side // 10, max_side // 3, max_side]:
+        valid_values = make_grid(side)
+        target_total = valid_values.sum() * 1.25
+
+        start = time.perf_counter()
+        _, legacy_difference = legacy_adjust(valid_values, target_total)
+        legacy_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        rates, _, reachable = scale_rates(valid_values.to_numpy(), np.ones(len(valid_values)), target_total, MIN_RATE, MAX_RATE)
+        solver_seconds = time.perf_counter() - start
+        assert reachable and np.isclose(rates.sum(), target_total), "solver missed a reachable target"
+
+        start = time.perf_counter()
+        bell_rates, _, reachable = scale_rates(valid_values.to_numpy(), np.ones(len(valid_values)), target_total, MIN_RATE, MAX_RATE, spread=0.5)
+        bell_seconds = time.perf_counter() - start
+        assert reachable and np.isclose(bell_rates.sum(), target_total), "bell curve solver missed a reachable target"
+        print(
+            f"cells={len(valid_values):9,d}  iterative {legacy_seconds:7.3f}s (off by {legacy_difference:12.2f} lbs)  "
+            f"closed-form {solver_seconds:7.3f}s (off by {rates.sum() - target_total:.2e} lbs)  bell curve {bell_seconds:7.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,138 @@
+"""Generate mock yield, application or as-planted data for a whole folder of field boundaries.
+
+Run from the repository root, for example:
+
+    python -m geomaker.batch boundaries/ output/ --kind yield --crop Corn --date 2024-10-01
+    python -m geomaker.batch boundaries.zip output/ --kind application --product "UAN 32%" --workers 8
+    python -m geomaker.batch boundaries/ output/ --kind seed --crop Soybeans --variety "AG 36X6"
+
+Every shapefile, GeoJSON file or zipped shapefile found in the input (a folder or a zip) is
+one field. Each field is written to <output>/<field>_<kind>.zip.
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from zipfile import ZipFile
+
+import geopandas as gpd
+import shapely
+
+from geomaker.export import write_shapefile_zip
+from geomaker.mock_data import CROP_IDS, CROP_MASS_DEFAULTS, MOCK_LAYERS, adjustment_factor, make_mock_layer
+
+BOUNDARY_EXTENSIONS = (".shp", ".geojson", ".json")
+
+
+def _zip_members(zip_path):
+    # Boundaries inside a zip are read in place through GDAL's /vsizip/ filesystem
+    with ZipFile(zip_path) as zip_file:
+        names = [name for name in zip_file.namelist() if name.lower().endswith(BOUNDARY_EXTENSIONS)]
+    return [(os.path.splitext(os.path.basename(name))[0], f"/vsizip/{os.path.abspath(zip_path)}/{name}") for name in names]
+
+
+def find_boundaries(source):
+    """List (field name, readable path) for every boundary in a folder or zip."""
+    if os.path.isfile(source) and source.lower().endswith(".zip"):
+        return _zip_members(source)
+
+    boundaries = []
+    for root, _, files in os.walk(source):
+        for file in sorted(files):
+            path = os.path.join(root, file)
+            if file.lower().endswith(BOUNDARY_EXTENSIONS):
+                boundaries.append((os.path.splitext(file)[0], path))
+            elif file.lower().endswith(".zip"):
+                boundaries.extend(_zip_members(path))
+    return boundaries
+
+
+def read_field_polygon(path):
+    # Merge every polygon in the boundary file into one field in WGS84
+    gdf = gpd.read_file(path)
+    if gdf.crs is not None and gdf.crs.to_epsg() != 4326:
+        gdf = gdf.to_crs("EPSG:4326")
+    polygons = gdf.geometry[gdf.geometry.geom_type.isin(["Polygon", "MultiPolygon"])]
+    if polygons.empty:
+        raise ValueError("No polygons found in the boundary file.")
+    return shapely.union_all(polygons.values)
+
+
+def generate_field(name, path, output_dir, kind, labels, rate_adjustment, selected_date):
+    # Runs in a worker process; the reference dataset is cached per worker
+    start = time.perf_counter()
+    gdf = make_mock_layer(kind, read_field_polygon(path), labels, rate_adjustment, selected_date)
+    if gdf.empty:
+        raise ValueError(f"None of the {kind} points fall inside the field boundary.")
+    data = write_shapefile_zip(gdf, MOCK_LAYERS[kind]["filename"])
+    with open(os.path.join(output_dir, f"{name}_{kind}.zip"), "wb") as output:
+        output.write(data)
+    return len(gdf), len(data), time.perf_counter() - start
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Generate mock yield, application or as-planted data for many field boundaries.")
+    parser.add_argument("source", help="Folder or zip containing field boundaries (shapefile, GeoJSON or zipped shapefile).")
+    parser.add_argument("output", help="Folder the generated zips are written to.")
+    parser.add_argument("--kind", choices=sorted(MOCK_LAYERS), default="yield")
+    parser.add_argument("--crop", choices=sorted(CROP_IDS), default="Corn", help="Crop written to yield or as-planted data.")
+    parser.add_argument("--product", default="", help="Product written to application data.")
+    parser.add_argument("--variety", default="", help="Hybrid or variety written to as-planted data.")
+    parser.add_argument("--adjustment", type=float, default=None, help="Mass, rate or seeding rate adjustment in percent, as on the pages.")
+    parser.add_argument("--date", type=datetime.date.fromisoformat, default=None, help="Harvest, application or planting date (YYYY-MM-DD).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes (default: all cores).")
+    args = parser.parse_args(argv)
+    if args.kind == "application" and not args.product:
+        parser.error("--product is required for application data.")
+    if args.kind == "seed" and not args.variety:
+        parser.error("--variety is required for as-planted data.")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    boundaries = find_boundaries(args.source)
+    if not boundaries:
+        print(f"No boundaries found in {args.source}.", file=sys.stderr)
+        return 1
+    os.makedirs(args.output, exist_ok=True)
+
+    if args.kind == "yield":
+        labels = {"Crop": CROP_IDS[args.crop]}
+        adjustment = args.adjustment if args.adjustment is not None else CROP_MASS_DEFAULTS.get(args.crop, 0)
+    elif args.kind == "seed":
+        labels = {"Crop": args.crop, "Variety": args.variety}
+        adjustment = args.adjustment if args.adjustment is not None else 0
+    else:
+        labels = {"Product": args.product}
+        adjustment = args.adjustment if args.adjustment is not None else 0
+
+    start = time.perf_counter()
+    total_points = 0
+    failures = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(generate_field, name, path, args.output, args.kind, labels, adjustment_factor(adjustment), args.date): name
+            for name, path in boundaries
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                points, size, seconds = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"FAILED {name}: {e}", file=sys.stderr)
+                continue
+            total_points += points
+            print(f"{name}: {points:,} points, {size / 1e6:.1f} MB in {seconds:.2f}s")
+
+    elapsed = time.perf_counter() - start
+    fields = len(boundaries) - failures
+    print(f"{fields} of {len(boundaries)} fields in {elapsed:.1f}s: {fields / elapsed:.2f} fields/s, {total_points / elapsed:,.0f} points/s")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,28 @@
+import json
+from io import BytesIO
+
+import geopandas as gpd
+import pandas as pd
+import pyogrio
+
+
+def kml_to_geojson(file):
+    """GeoJSON FeatureCollection (a dict) of the polygons in a KML file, in WGS84.
+
+    file is a path or an uploaded file object. GDAL reads each KML folder as its own layer, so
+    every layer is read and the polygons of all of them are kept.
+    """
+    if hasattr(file, "read"):
+        data = file.read()
+    else:
+        with open(file, "rb") as kml_file:
+            data = kml_file.read()
+    # Layers are read by position: the default layer is named after a temporary in-memory file
+    layers = [gpd.read_file(BytesIO(data), layer=index) for index in range(len(pyogrio.list_layers(BytesIO(data))))]
+    gdf = pd.concat([layer for layer in layers if not layer.empty] or layers, ignore_index=True)
+    gdf = gdf[gdf.geometry.geom_type.isin(["Polygon", "MultiPolygon"])]
+    if gdf.empty:
+        raise ValueError("No polygons found in the KML file.")
+    if gdf.crs is not None and gdf.crs.to_epsg() != 4326:
+        gdf = gdf.to_crs("EPSG:4326")
+    return json.loads(gdf.to_json())
@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+from dateutil.parser import parse as parse_date
+
+# Format written back to the Time column of the reference datasets
+TIME_FORMAT = "%m/%d/%Y %I:%M:%S %p"
+
+
+def update_date(old_date_str, new_date):
+    # Parse the old date
+    old_date = parse_date(old_date_str)
+
+    # Replace the year, month, and day with the selected date's
+    new_date = old_date.replace(year=new_date.year, month=new_date.month, day=new_date.day)
+
+    # Format the new date according to the format of the old date
+    if "T" in old_date_str:  # IsoTime
+        return new_date.isoformat()[:-3] + "Z"
+    else:  # Time
+        return new_date.strftime(TIME_FORMAT)
+
+
+def detect_time_format(values):
+    # Every value in the column has to agree on the layout, otherwise fall back to per-row parsing
+    has_t = values.str.contains("T", regex=False)
+    if has_t.all():
+        return "iso"
+    if not has_t.any():
+        return "time"
+    return None
+
+
+def _ascii_digits(values, width):
+    # Zero-padded decimal digits of an integer array as an (n, width) byte matrix
+    powers = 10 ** np.arange(width - 1, -1, -1)
+    return ((values[:, None] // powers) % 10 + ord("0")).astype(np.uint8)
+
+
+def _ascii_text(text, rows):
+    return np.broadcast_to(np.frombuffer(text.encode("ascii"), dtype=np.uint8), (rows, len(text)))
+
+
+def _ascii_to_strings(matrix):
+    width = matrix.shape[1]
+    return np.ascontiguousarray(matrix).view(f"S{width}").ravel().astype(str).astype(object)
+
+
+def _parse_fixed_width_time(values):
+    # Fast path for columns already written as TIME_FORMAT ("09/14/2019 02:32:11 PM")
+    if not values.str.len().eq(22).all():
+        return None
+    raw = np.frombuffer(values.to_numpy().astype("S22").tobytes(), dtype=np.uint8).reshape(-1, 22)
+    digit_columns = [0, 1, 3, 4, 6, 7, 8, 9, 11, 12, 14, 15, 17, 18]
+    separators = {2: "/", 5: "/", 10: " ", 13: ":", 16: ":", 19: " ", 21: "M"}
+    digits = raw[:, digit_columns].astype(np.int64) - ord("0")
+    if ((digits < 0) | (digits > 9)).any():
+        return None
+    if any((raw[:, position] != ord(char)).any() for position, char in separators.items()):
+        return None
+    is_pm = raw[:, 20] == ord("P")
+    if not (is_pm | (raw[:, 20] == ord("A"))).all():
+        return None
+
+    hour12 = digits[:, 8] * 10 + digits[:, 9]
+    minute = digits[:, 10] * 10 + digits[:, 11]
+    second = digits[:, 12] * 10 + digits[:, 13]
+    if ((hour12 < 1) | (hour12 > 12) | (minute > 59) | (second > 59)).any():
+        return None
+    hour = hour12 % 12 + np.where(is_pm, 12, 0)
+    return hour, minute, second
+
+
+def _format_time(new_date, hour, minute, second):
+    rows = len(hour)
+    hour12 = np.where(hour % 12 == 0, 12, hour % 12)
+    meridiem = np.where(hour < 12, ord("A"), ord("P")).astype(np.uint8)[:, None]
+    matrix = np.hstack([
+        _ascii_text(new_date.strftime("%m/%d/%Y "), rows),
+        _ascii_digits(hour12, 2), _ascii_text(":", rows),
+        _ascii_digits(minute, 2), _ascii_text(":", rows),
+        _ascii_digits(second, 2), _ascii_text(" ", rows),
+        meridiem, _ascii_text("M", rows),
+    ])
+    return _ascii_to_strings(matrix)
+
+
+def _format_iso(new_date, hour, minute, second, microsecond, utc_offset):
+    # Same text as datetime.isoformat(), trimmed the way update_date trims it
+    rows = len(hour)
+    pieces = [
+        _ascii_text(new_date.strftime("%Y-%m-%dT"), rows),
+        _ascii_digits(hour, 2), _ascii_text(":", rows),
+        _ascii_digits(minute, 2), _ascii_text(":", rows),
+        _ascii_digits(second, 2),
+    ]
+    offset = [_ascii_text(utc_offset, rows)] if utc_offset else []
+
+    result = np.empty(rows, dtype=object)
+    has_fraction = microsecond != 0
+    with_fraction = np.hstack(pieces + [_ascii_text(".", rows), _ascii_digits(microsecond, 6)] + offset)
+    without_fraction = np.hstack(pieces + offset)
+    result[has_fraction] = _ascii_to_strings(with_fraction[has_fraction, :-3])
+    result[~has_fraction] = _ascii_to_strings(without_fraction[~has_fraction, :-3])
+    return result + "Z"
+
+
+def redate_column(values, new_date):
+    """Move every timestamp in a Time or IsoTime column to new_date, keeping the time of day.
+
+    The column layout is detected once, the whole column is parsed in one vectorized pass and
+    the strings are assembled as a byte matrix. Output is identical to applying update_date
+    row by row; columns that cannot be parsed in bulk fall back to that per-row path.
+    """
+    present = values.dropna()
+    if present.empty:
+        return values
+
+    text = present.astype(str)
+    layout = detect_time_format(text)
+    try:
+        if layout == "time":
+            parts = _parse_fixed_width_time(text)
+            if parts is None:
+                timestamps = pd.to_datetime(text, format=TIME_FORMAT)
+                parts = (timestamps.dt.hour.to_numpy(), timestamps.dt.minute.to_numpy(), timestamps.dt.second.to_numpy())
+            redated = _format_time(new_date, *parts)
+        elif layout == "iso":
+            timestamps = pd.to_datetime(text, format="ISO8601")
+            utc_offset = timestamps.iloc[0].isoformat()[-6:] if timestamps.dt.tz is not None else ""
+            redated = _format_iso(
+                new_date,
+                timestamps.dt.hour.to_numpy(),
+                timestamps.dt.minute.to_numpy(),
+                timestamps.dt.second.to_numpy(),
+                timestamps.dt.microsecond.to_numpy(),
+                utc_offset,
+            )
+        else:
+            raise ValueError("Mixed timestamp layouts in column.")
+    except (ValueError, TypeError):
+        redated = present.apply(lambda x: update_date(x, new_date)).to_numpy()
+
+    result = values.copy()
+    result.loc[present.index] = redated
+    return result
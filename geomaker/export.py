@@ -0,0 +1,336 @@
+import datetime
+import struct
+import threading
+import time
+from io import BytesIO
+from zipfile import ZipFile, ZIP_STORED
+
+import numpy as np
+import pandas as pd
+import shapely
+
+# Export cost per archive name, so slow downloads can be tracked
+_export_stats = {}
+_export_lock = threading.Lock()
+
+_SHAPE_TYPES = {"Point": 1, "PointZ": 11, "Polygon": 5}
+
+
+def _shp_header(shape_type, file_length_bytes, bbox, z_range=(0.0, 0.0)):
+    header = struct.pack(">7i", 9994, 0, 0, 0, 0, 0, file_length_bytes // 2)
+    header += struct.pack("<2i", 1000, shape_type)
+    header += struct.pack("<8d", *bbox, *z_range, 0.0, 0.0)
+    return header
+
+
+def _shx_bytes(shape_type, bbox, z_range, content_lengths):
+    # Record offsets and content lengths are both counted in 16-bit words
+    record_words = content_lengths // 2 + 4
+    offsets = 50 + np.concatenate([[0], np.cumsum(record_words)[:-1]])
+    index = np.empty(len(content_lengths), dtype=[("offset", ">i4"), ("length", ">i4")])
+    index["offset"] = offsets
+    index["length"] = content_lengths // 2
+    return _shp_header(shape_type, 100 + 8 * len(index), bbox, z_range) + index.tobytes()
+
+
+def _point_shp(geometries):
+    # Every record has the same size, so the whole file is one structured array
+    has_z = bool(shapely.has_z(geometries).all())
+    coords = shapely.get_coordinates(geometries, include_z=has_z)
+    shape_type = _SHAPE_TYPES["PointZ" if has_z else "Point"]
+
+    fields = [("number", ">i4"), ("length", ">i4"), ("type", "<i4"), ("x", "<f8"), ("y", "<f8")]
+    if has_z:
+        fields += [("z", "<f8"), ("m", "<f8")]
+    records = np.empty(len(coords), dtype=fields)
+    content_length = records.dtype.itemsize - 8
+    records["number"] = np.arange(1, len(coords) + 1)
+    records["length"] = content_length // 2
+    records["type"] = shape_type
+    records["x"] = coords[:, 0]
+    records["y"] = coords[:, 1]
+    z_range = (0.0, 0.0)
+    if has_z:
+        records["z"] = coords[:, 2]
+        records["m"] = np.nan
+        if not np.isnan(coords[:, 2]).all():
+            z_range = (float(np.nanmin(coords[:, 2])), float(np.nanmax(coords[:, 2])))
+
+    bbox = _bbox(geometries)
+    shp = _shp_header(shape_type, 100 + records.nbytes, bbox, z_range) + records.tobytes()
+    shx = _shx_bytes(shape_type, bbox, z_range, np.full(len(coords), content_length))
+    return shp, shx
+
+
+def _oriented_rings(geometries):
+    """Coordinates of every ring of the polygon geometries, oriented for a shapefile.
+
+    Returns (coords, ring_counts, ring_geometry): all ring coordinates in order, the number of
+    coordinates per ring and the index of the geometry each ring belongs to. Shapefiles want
+    clockwise outer rings and counter-clockwise holes; rings the other way round are reversed
+    with one gather over the coordinate array.
+    """
+    polygons, polygon_geometry = shapely.get_parts(geometries, return_index=True)
+    rings, ring_polygon = shapely.get_rings(polygons, return_index=True)
+    coords = shapely.get_coordinates(rings)
+    ring_counts = shapely.get_num_coordinates(rings)
+    ring_starts = np.concatenate([[0], np.cumsum(ring_counts)[:-1]]).astype(np.int64)
+    exterior = np.concatenate([[True], ring_polygon[1:] != ring_polygon[:-1]]) if len(rings) else np.zeros(0, dtype=bool)
+
+    # Shoelace sum of each ring (twice its signed area), skipping the step from one ring to the next
+    steps = np.append(coords[:-1, 0] * coords[1:, 1] - coords[1:, 0] * coords[:-1, 1], 0.0)
+    steps[ring_starts + ring_counts - 1] = 0.0
+    doubled_areas = np.add.reduceat(steps, ring_starts) if len(rings) else np.zeros(0)
+    reverse = (exterior & (doubled_areas > 0)) | (~exterior & (doubled_areas < 0))
+
+    coord_ring = np.repeat(np.arange(len(rings)), ring_counts)
+    positions = np.arange(len(coords))
+    flipped = reverse[coord_ring]
+    positions[flipped] = 2 * ring_starts[coord_ring[flipped]] + ring_counts[coord_ring[flipped]] - 1 - positions[flipped]
+    return coords[positions], ring_counts, polygon_geometry[ring_polygon]
+
+
+def _scatter(buffer, offsets, rows):
+    # Copy each row of a (n, width) byte matrix into buffer starting at its offset
+    width = rows.shape[1]
+    if len(rows) and width:
+        buffer[offsets[:, None] + np.arange(width)] = rows
+
+
+def _bbox(geometries):
+    if not len(geometries) or shapely.is_empty(geometries).all():
+        return (0.0, 0.0, 0.0, 0.0)
+    return tuple(shapely.total_bounds(geometries))
+
+
+def _polygon_shp(geometries):
+    """Polygon .shp and .shx bytes for every geometry, laid out as arrays instead of record by record.
+
+    Each record's header, part offsets and points are written into one byte buffer at offsets
+    computed from the ring and point counts, so the cost no longer grows with Python calls per
+    polygon. Missing and empty geometries become null shape records.
+    """
+    shape_type = _SHAPE_TYPES["Polygon"]
+    geometries = np.asarray(geometries, dtype=object)
+    count = len(geometries)
+    present = ~(shapely.is_missing(geometries) | shapely.is_empty(geometries))
+
+    coords, ring_counts, ring_geometry = _oriented_rings(geometries[present])
+    ring_geometry = np.flatnonzero(present)[ring_geometry]
+    part_counts = np.bincount(ring_geometry, minlength=count)
+    point_counts = np.bincount(ring_geometry, weights=ring_counts, minlength=count).astype(np.int64)
+    content_lengths = np.where(present, 44 + 4 * part_counts + 16 * point_counts, 4).astype(np.int64)
+    record_offsets = np.concatenate([[0], np.cumsum(content_lengths + 8)[:-1]]).astype(np.int64)
+    body = np.zeros(int((content_lengths + 8).sum()), dtype=np.uint8)
+
+    # Null records are the record header and a zero shape type
+    null_records = np.zeros((~present).sum(), dtype=[("number", ">i4"), ("length", ">i4"), ("type", "<i4")])
+    null_records["number"] = np.flatnonzero(~present) + 1
+    null_records["length"] = 2
+    _scatter(body, record_offsets[~present], null_records.view(np.uint8).reshape(-1, null_records.dtype.itemsize))
+
+    headers = np.zeros(present.sum(), dtype=[
+        ("number", ">i4"), ("length", ">i4"), ("type", "<i4"), ("bbox", "<f8", 4), ("parts", "<i4"), ("points", "<i4")
+    ])
+    headers["number"] = np.flatnonzero(present) + 1
+    headers["length"] = content_lengths[present] // 2
+    headers["type"] = shape_type
+    headers["bbox"] = shapely.bounds(geometries[present])
+    headers["parts"] = part_counts[present]
+    headers["points"] = point_counts[present]
+    _scatter(body, record_offsets[present], headers.view(np.uint8).reshape(-1, headers.dtype.itemsize))
+
+    # Part offsets count points from the start of each record's own point list
+    ring_starts = np.concatenate([[0], np.cumsum(ring_counts)[:-1]]).astype(np.int64)
+    geometry_first_point = np.concatenate([[0], np.cumsum(point_counts)[:-1]])
+    geometry_first_ring = np.concatenate([[0], np.cumsum(part_counts)[:-1]])
+    parts = (ring_starts - geometry_first_point[ring_geometry]).astype("<i4")
+    part_offsets = record_offsets[ring_geometry] + 52 + 4 * (np.arange(len(ring_counts)) - geometry_first_ring[ring_geometry])
+    _scatter(body, part_offsets, parts.view(np.uint8).reshape(-1, 4))
+
+    point_geometry = np.repeat(ring_geometry, ring_counts)
+    point_offsets = (
+        record_offsets[point_geometry] + 52 + 4 * part_counts[point_geometry]
+        + 16 * (np.arange(len(coords)) - geometry_first_point[point_geometry])
+    )
+    _scatter(body, point_offsets, np.ascontiguousarray(coords, dtype="<f8").view(np.uint8).reshape(-1, 16))
+
+    bbox = _bbox(geometries)
+    shp = _shp_header(shape_type, 100 + len(body), bbox) + body.tobytes()
+    shx = _shx_bytes(shape_type, bbox, (0.0, 0.0), content_lengths)
+    return shp, shx
+
+
+# Widest dBASE field the shapefile readers accept, in bytes
+_DBF_MAX_WIDTH = 254
+
+
+def _utf8_prefix(text, size):
+    # Longest prefix of text whose UTF-8 encoding fits in size bytes, without splitting a character
+    return text.encode("utf-8")[:size].decode("utf-8", "ignore").encode("utf-8")
+
+
+def _dbf_field_names(columns):
+    # dBASE field names are limited to 10 bytes (UTF-8, as declared in the .cpg) and must stay unique
+    names = []
+    for column in columns:
+        name = _utf8_prefix(str(column), 10)
+        suffix = 1
+        while name in names:
+            name = _utf8_prefix(str(column), 10 - len(str(suffix))) + str(suffix).encode("ascii")
+            suffix += 1
+        names.append(name)
+    return names
+
+
+def _fixed_width(text, width):
+    # Byte matrix of space-padded values, one row per record
+    text = np.asarray(text, dtype=str)
+    try:
+        encoded = text.astype(f"S{width}")
+    except UnicodeEncodeError:
+        encoded = np.array([_utf8_prefix(value, width) for value in text], dtype=f"S{width}")
+    matrix = np.frombuffer(encoded.tobytes(), dtype=np.uint8).reshape(-1, width).copy()
+    matrix[matrix == 0] = ord(" ")
+    return matrix
+
+
+def _rjust(text, width):
+    # np.char.rjust cannot size its output from an empty array (no rows, or every value missing)
+    return np.char.rjust(text, width) if len(text) else text
+
+
+def _float_text(numbers, name):
+    """Shortest text of each float that reads back as exactly the same value, without exponents.
+
+    dBASE numeric fields hold plain decimal text, so values NumPy prints in scientific notation
+    are rewritten positionally. Infinite values have no dBASE form and raise ValueError.
+    """
+    if np.isinf(numbers).any():
+        raise ValueError(f"Column {name} holds infinite values, which a shapefile cannot store.")
+    text = numbers.astype(str)
+    scientific = np.char.find(text, "e") >= 0
+    if scientific.any():
+        text = text.astype(object)
+        text[scientific] = [np.format_float_positional(value, unique=True, trim="-") for value in numbers[scientific].tolist()]
+        text = text.astype(str)
+    return text
+
+
+def _dbf_column(values):
+    """(type, width, decimals, byte matrix) of one dBASE field, sized from the values it holds.
+
+    Numbers keep every digit: the field is as wide as the longest value, and values that would
+    need more than _DBF_MAX_WIDTH characters raise ValueError rather than being cut.
+    """
+    missing = values.isna().to_numpy()
+    if pd.api.types.is_bool_dtype(values):
+        flags = np.where(values.fillna(False).to_numpy(dtype=bool), "T", "F")
+        flags[missing] = "?"
+        return "L", 1, 0, _fixed_width(flags, 1)
+    if pd.api.types.is_integer_dtype(values) and not missing.any():
+        text = values.to_numpy().astype(str)
+        width = max(int(np.char.str_len(text).max(initial=1)), 1)
+        return "N", width, 0, _fixed_width(_rjust(text, width), width)
+    if pd.api.types.is_numeric_dtype(values):
+        text = _float_text(values.to_numpy(dtype=float, na_value=np.nan)[~missing], values.name)
+        width = max(int(np.char.str_len(text).max(initial=1)), 1)
+        if width > _DBF_MAX_WIDTH:
+            raise ValueError(f"Column {values.name} holds values too long for a {_DBF_MAX_WIDTH}-character shapefile field.")
+        points = np.char.find(text, ".")
+        decimals = min(int(np.where(points >= 0, np.char.str_len(text) - points - 1, 0).max(initial=0)), 15)
+        column_text = np.full(len(values), "", dtype=f"U{width}")
+        column_text[~missing] = _rjust(text, width)
+        return "N", width, decimals, _fixed_width(column_text, width)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        stamps = values.fillna(pd.Timestamp(0))
+        days = (stamps.dt.year * 10000 + stamps.dt.month * 100 + stamps.dt.day).to_numpy().astype(str)
+        days[missing] = ""
+        return "D", 8, 0, _fixed_width(days, 8)
+
+    text = values.astype(object).where(~missing, "").to_numpy(dtype=str)
+    try:
+        width = text.astype("S").itemsize
+    except UnicodeEncodeError:
+        width = max((len(value.encode("utf-8")) for value in text), default=1)
+    width = min(max(width, 1), _DBF_MAX_WIDTH)
+    return "C", width, 0, _fixed_width(text, width)
+
+
+def _dbf_bytes(attributes):
+    rows = len(attributes)
+    if attributes.shape[1] == 0:
+        # Shapefiles need at least one attribute column
+        attributes = pd.DataFrame({"FID": np.arange(rows)})
+
+    descriptors = []
+    columns = [np.full((rows, 1), ord(" "), dtype=np.uint8)]  # deletion flags
+    for name, column in zip(_dbf_field_names(attributes.columns), attributes.columns):
+        field_type, width, decimals, matrix = _dbf_column(attributes[column].reset_index(drop=True))
+        descriptors.append(struct.pack("<11sc4xBB14x", name, field_type.encode(), width, decimals))
+        columns.append(matrix)
+
+    record_length = sum(matrix.shape[1] for matrix in columns)
+    header_length = 32 + 32 * len(descriptors) + 1
+    today = datetime.date.today()
+    header = struct.pack("<4BIHH20x", 3, today.year - 1900, today.month, today.day, rows, header_length, record_length)
+    body = np.hstack(columns).tobytes() if rows else b""
+    return header + b"".join(descriptors) + b"\r" + body + b"\x1a"
+
+
+def shapefile_components(gdf):
+    """Encode a GeoDataFrame as shapefile parts ({extension: bytes}) without touching disk.
+
+    Point, polygon and multipolygon layers are packed as arrays; other geometry types raise
+    ValueError, as do attribute values a dBASE field cannot hold (see _dbf_column). An empty
+    layer gives a valid shapefile with zero bounds and a header-only .dbf.
+    """
+    geometries = np.asarray(gdf.geometry.values)
+    type_ids = shapely.get_type_id(geometries)
+    present = type_ids >= 0
+    if len(geometries) and (type_ids == 0).all() and not shapely.is_empty(geometries).any():
+        shp, shx = _point_shp(geometries)
+    elif np.isin(type_ids[present], [3, 6]).all():
+        shp, shx = _polygon_shp(geometries)
+    else:
+        raise ValueError("Only point or polygon layers can be exported to a shapefile.")
+
+    components = {
+        "shp": shp,
+        "shx": shx,
+        "dbf": _dbf_bytes(gdf.drop(columns=gdf.geometry.name)),
+        "cpg": b"UTF-8",
+    }
+    if gdf.crs is not None:
+        components["prj"] = gdf.crs.to_wkt("WKT1_ESRI").encode("ascii")
+    return components
+
+
+def write_shapefile_zip(gdf, filename, compression=ZIP_STORED):
+    """Return the bytes of a zip holding filename.shp/.shx/.dbf/.prj/.cpg built from gdf."""
+    start = time.perf_counter()
+    components = shapefile_components(gdf)
+    with BytesIO() as buffer:
+        with ZipFile(buffer, "w", compression) as zip_file:
+            for extension, content in components.items():
+                zip_file.writestr(f"{filename}.{extension}", content)
+        data = buffer.getvalue()
+    _record_export(filename, len(gdf), len(data), time.perf_counter() - start)
+    return data
+
+
+def _record_export(filename, features, size, seconds):
+    with _export_lock:
+        entry = _export_stats.setdefault(filename, {"exports": 0, "features": 0, "bytes": 0, "seconds": 0.0})
+        entry["exports"] += 1
+        entry["features"] += features
+        entry["bytes"] += size
+        entry["seconds"] += seconds
+        entry["last_bytes"] = size
+        entry["last_seconds"] = seconds
+
+
+def export_stats():
+    # Archives written, features, bytes and elapsed seconds per export name
+    with _export_lock:
+        return {filename: dict(entry) for filename, entry in _export_stats.items()}
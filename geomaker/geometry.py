@@ -0,0 +1,37 @@
+import numpy as np
+import shapely
+import geopandas as gpd
+from pyproj import CRS, Transformer
+
+
+def _as_geometry_array(geometries):
+    if isinstance(geometries, gpd.GeoSeries):
+        return np.asarray(geometries.values)
+    return np.asarray(geometries, dtype=object)
+
+
+def get_offset(point1, point2):
+    return point2.x - point1.x, point2.y - point1.y
+
+
+def geodesic_areas(geometries, crs="EPSG:4326"):
+    """Area of every polygon on the WGS84 ellipsoid, in square metres.
+
+    The coordinates are projected in one array transform into a Lambert azimuthal equal-area
+    projection centred on the layer, which preserves area on the ellipsoid, and then measured
+    by shapely's vectorized planar area.
+    """
+    array = _as_geometry_array(geometries)
+    if not len(array):
+        return np.zeros(0)
+    to_wgs84 = Transformer.from_crs(crs, "EPSG:4326", always_xy=True)
+    minx, miny, maxx, maxy = shapely.total_bounds(array)
+    center_lon, center_lat = to_wgs84.transform((minx + maxx) / 2, (miny + maxy) / 2)
+    equal_area = CRS.from_proj4(f"+proj=laea +lat_0={center_lat} +lon_0={center_lon} +ellps=WGS84 +units=m")
+    transformer = Transformer.from_crs(crs, equal_area, always_xy=True)
+
+    def _project(coords):
+        x, y = transformer.transform(coords[:, 0], coords[:, 1])
+        return np.column_stack([x, y])
+
+    return shapely.area(shapely.transform(array, _project))
@@ -0,0 +1,157 @@
+from io import BytesIO
+
+import numpy as np
+import shapely
+from PIL import Image
+
+# ColorBrewer RdYlGn, low (red) to high (green): the anchors matplotlib's RdYlGn interpolates between
+RDYLGN_COLORS = [
+    "#a50026", "#d73027", "#f46d43", "#fdae61", "#fee08b", "#ffffbf",
+    "#d9ef8b", "#a6d96a", "#66bd63", "#1a9850", "#006837",
+]
+
+# Entries in the colormap lookup table
+COLORMAP_SIZE = 256
+
+# Width in pixels small grids are scaled up to, and the gap between side-by-side grids
+DISPLAY_WIDTH = 480
+GAP_PIXELS = 8
+
+# Most raster cells a prescription layer is drawn with
+MAX_HEATMAP_CELLS = 250_000
+
+
+def colormap_table(colors=RDYLGN_COLORS, size=COLORMAP_SIZE):
+    # (size, 4) uint8 RGBA lookup table interpolated linearly between evenly spaced hex colors
+    anchors = np.array([[int(color[i:i + 2], 16) for i in (1, 3, 5)] for color in colors], dtype=float)
+    positions = np.linspace(0, 1, len(colors))
+    samples = np.linspace(0, 1, size)
+    table = np.column_stack([np.interp(samples, positions, anchors[:, channel]) for channel in range(3)] + [np.full(size, 255.0)])
+    return np.round(table).astype(np.uint8)
+
+
+RDYLGN = colormap_table()
+
+
+def colorize(grid, vmin, vmax, table=RDYLGN):
+    """RGBA image of a 2-D grid: one colormap lookup for every cell at once.
+
+    Values are scaled from [vmin, vmax] onto the table's entries and clipped to its ends; NaN
+    cells are transparent.
+    """
+    grid = np.asarray(grid, dtype=float)
+    span = vmax - vmin if vmax > vmin else 1.0
+    valid = np.isfinite(grid)
+    indices = np.zeros(grid.shape, dtype=np.intp)
+    indices[valid] = np.clip(np.round((grid[valid] - vmin) / span * (len(table) - 1)), 0, len(table) - 1)
+    rgba = table[indices]
+    rgba[~valid] = 0
+    return rgba
+
+
+def upscale(rgba, factor):
+    # Nearest-neighbour enlargement so every cell is a factor x factor block of pixels
+    return rgba.repeat(factor, axis=0).repeat(factor, axis=1) if factor > 1 else rgba
+
+
+def display_factor(columns, width=DISPLAY_WIDTH):
+    # Whole-number scale that brings a grid of this many columns close to width pixels
+    return max(1, width // max(columns, 1))
+
+
+def image_bytes(rgba, format="png"):
+    # Encoded (rows, columns, 4) uint8 RGBA image; PNG and WebP are written losslessly by Pillow
+    buffer = BytesIO()
+    Image.fromarray(np.ascontiguousarray(rgba, dtype=np.uint8), "RGBA").save(buffer, format=format, lossless=True)
+    return buffer.getvalue()
+
+
+def heatmap_image(grid, vmin, vmax, format="png", width=DISPLAY_WIDTH):
+    # Encoded heatmap of one grid, enlarged towards width pixels
+    rgba = colorize(grid, vmin, vmax)
+    return image_bytes(upscale(rgba, display_factor(rgba.shape[1], width)), format)
+
+
+def side_by_side_image(grids, vmin, vmax, format="png", width=DISPLAY_WIDTH):
+    """Encoded image of several grids next to each other on one color scale.
+
+    Each grid gets the same enlargement, chosen so all of them together come close to width
+    pixels per grid, and they are separated by GAP_PIXELS of transparency.
+    """
+    images = [colorize(grid, vmin, vmax) for grid in grids]
+    factor = display_factor(max(image.shape[1] for image in images), width)
+    images = [upscale(image, factor) for image in images]
+    height = max(image.shape[0] for image in images)
+    padded = []
+    for position, image in enumerate(images):
+        if position:
+            padded.append(np.zeros((height, GAP_PIXELS, 4), dtype=np.uint8))
+        padded.append(np.pad(image, ((0, height - image.shape[0]), (0, 0), (0, 0))))
+    return image_bytes(np.hstack(padded), format)
+
+
+def difference_grid(original, adjusted):
+    # Adjusted minus original, NaN where either grid has no rate
+    return np.asarray(adjusted, dtype=float) - np.asarray(original, dtype=float)
+
+
+def difference_limits(difference):
+    # Color scale symmetric about zero, so unchanged cells sit at the middle (yellow) of the colormap
+    finite = np.abs(difference[np.isfinite(difference)])
+    limit = float(finite.max()) if len(finite) and finite.max() > 0 else 1.0
+    return -limit, limit
+
+
+def value_limits(*grids):
+    # Shared (min, max) of the finite values of every grid, for drawing them on one scale
+    finite = np.concatenate([np.asarray(grid, dtype=float).ravel() for grid in grids])
+    finite = finite[np.isfinite(finite)]
+    return (float(finite.min()), float(finite.max())) if len(finite) else (0.0, 1.0)
+
+
+def legend_html(vmin, vmax, unit="", colors=RDYLGN_COLORS):
+    # Color bar with min, middle and max labels, drawn by the browser from the colormap's anchors
+    gradient = ", ".join(colors)
+    labels = "".join(f"<span>{value:,.2f} {unit}</span>" for value in (vmin, (vmin + vmax) / 2, vmax))
+    return (
+        f'<div style="max-width:{DISPLAY_WIDTH}px">'
+        f'<div style="height:14px;border-radius:3px;background:linear-gradient(to right, {gradient})"></div>'
+        f'<div style="display:flex;justify-content:space-between;font-size:0.8em">{labels}</div>'
+        "</div>"
+    )
+
+
+def polygon_raster(geometries, max_cells=MAX_HEATMAP_CELLS):
+    """Index of the polygon under each cell centre of a north-up grid over a prescription layer (-1 for none).
+
+    geometries are WGS84 polygons. Longitudes are scaled by the cosine of the layer's middle
+    latitude so cells are square on the ground. The cell size is half the side of the median
+    polygon, coarsened to stay within max_cells, and one STRtree query finds the polygon under
+    every cell centre. The lookup depends only on the geometries, so it can be kept while the
+    rates change and drawn with polygon_grid.
+    """
+    geometries = np.asarray(geometries, dtype=object)
+    minx, miny, maxx, maxy = shapely.total_bounds(geometries)
+    x_scale = np.cos(np.radians((miny + maxy) / 2))
+    scaled = shapely.transform(geometries, lambda coords: coords * [x_scale, 1.0])
+    width, height = (maxx - minx) * x_scale, maxy - miny
+
+    areas = shapely.area(scaled)
+    median_side = np.sqrt(np.median(areas[areas > 0])) if (areas > 0).any() else max(width, height)
+    cell_size = max(median_side / 2, np.sqrt(width * height / max_cells), 1e-9)
+    while np.ceil(width / cell_size) * np.ceil(height / cell_size) > max_cells:
+        cell_size *= 1.05
+    columns = max(1, int(np.ceil(width / cell_size)))
+    rows = max(1, int(np.ceil(height / cell_size)))
+
+    cell_x, cell_y = np.meshgrid(minx * x_scale + (np.arange(columns) + 0.5) * cell_size, maxy - (np.arange(rows) + 0.5) * cell_size)
+    cell_index, polygon_index = shapely.STRtree(scaled).query(shapely.points(cell_x.ravel(), cell_y.ravel()), predicate="within")
+    lookup = np.full(rows * columns, -1, dtype=np.intp)
+    lookup[cell_index] = polygon_index
+    return lookup.reshape(rows, columns)
+
+
+def polygon_grid(lookup, values):
+    # Grid of each cell's polygon value from a polygon_raster lookup; NaN outside every polygon
+    values = np.append(np.asarray(values, dtype=float), np.nan)
+    return values[lookup]
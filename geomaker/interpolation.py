@@ -0,0 +1,40 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+# Neighbours averaged for each target point and the inverse distance power
+DEFAULT_NEIGHBOURS = 8
+IDW_POWER = 2
+
+
+def build_tree(x, y):
+    # KD-tree over projected source points; build once and query it for every target set
+    return cKDTree(np.column_stack([np.asarray(x, dtype=float), np.asarray(y, dtype=float)]))
+
+
+def nearest_neighbours(tree, x, y, neighbours=DEFAULT_NEIGHBOURS):
+    """(distances, indices) arrays of shape (targets, k) for the k nearest source points.
+
+    k is neighbours, capped at the number of source points. Queries run on every core.
+    """
+    k = max(1, min(neighbours, tree.n))
+    distances, indices = tree.query(np.column_stack([np.asarray(x, dtype=float), np.asarray(y, dtype=float)]), k=k, workers=-1)
+    if k == 1:
+        distances, indices = distances[:, None], indices[:, None]
+    return distances, indices
+
+
+def idw_interpolate(tree, values, x, y, neighbours=DEFAULT_NEIGHBOURS, power=IDW_POWER):
+    """Inverse distance weighted values at projected points (x, y) from the points in tree.
+
+    values has one entry (or one row, to interpolate several columns at once) per source point.
+    Each target averages its nearest neighbours weighted by 1 / distance ** power; targets that
+    sit exactly on a source point take its value. neighbours=1 is plain nearest-neighbour lookup.
+    """
+    values = np.asarray(values, dtype=float)
+    distances, indices = nearest_neighbours(tree, x, y, neighbours)
+    neighbour_values = values[indices]
+    weights = 1.0 / np.maximum(distances, 1e-12) ** power
+    weights[distances[:, 0] == 0] = np.eye(distances.shape[1])[0]
+    if neighbour_values.ndim == 3:
+        weights = weights[..., None]
+    return (weights * neighbour_values).sum(axis=1) / weights.sum(axis=1)
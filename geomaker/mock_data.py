@@ -0,0 +1,127 @@
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+from shapely.geometry import Point
+
+from geomaker.dates import TIME_FORMAT
+from geomaker.geometry import get_offset
+from geomaker.reference_data import load_reference_dataset
+from geomaker.tiling import tile_reference_layer
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Data")
+
+# Crops offered on the yield page and their IDs
+CROP_IDS = {"Barley": 2, "Canola": 5, "Corn": 173, "Lentils": 8, "Oats": 11, "Soybeans": 174, "Wheat, Hard Red Winter": 11, "Sugarcane": 133}
+
+# Default mass adjustment (%) per crop
+CROP_MASS_DEFAULTS = {"Corn": 750, "Soybeans": 255, "Other": 0}
+
+# Typical seeding rate (seeds/acre) per crop, used as the as-planted layer's base rate
+CROP_SEEDING_RATES = {
+    "Barley": 1_000_000, "Canola": 400_000, "Corn": 34_000, "Lentils": 500_000, "Oats": 1_200_000,
+    "Soybeans": 140_000, "Wheat, Hard Red Winter": 1_200_000, "Other": 1_000_000,
+}
+
+# Wet mass (t/ha) of the yield layer before the crop's mass adjustment; CROP_MASS_DEFAULTS
+# scale it to about 11 t/ha for corn and 4.6 t/ha for soybeans
+YIELD_WET_MASS = {"Other": 1.3}
+
+# Application rate (gal/ac) of the application layer, a liquid fertilizer rate
+APPLICATION_RATES = {"Other": 17.0}
+
+# Synthesized passes are logged evenly, in file order, through one working day
+WORK_DAY_START = datetime.time(7, 0)
+WORK_DAY_HOURS = 14
+
+# Reference datasets the mock layers are generated from. The shipped reference points carry
+# no attributes, so each layer's rate (base_rates by crop, "Other" for the rest) and Time
+# column on its default date are synthesized by with_reference_attributes.
+MOCK_LAYERS = {
+    "yield": {
+        "folder": os.path.join(DATA_DIR, "Yield"),
+        "reference_centroid": Point(116.9200525150003, -30.65501315962107),
+        "rate_column": "WetMass",
+        "filename": "new_yield",
+        "base_rates": YIELD_WET_MASS,
+        "date": datetime.date(2024, 10, 1),
+    },
+    "application": {
+        "folder": os.path.join(DATA_DIR, "Application"),
+        "reference_centroid": Point(-97.85271468657078, 39.83161673804731),
+        "rate_column": "AppliedRate",
+        "filename": "Application",
+        "base_rates": APPLICATION_RATES,
+        "date": datetime.date(2024, 4, 15),
+    },
+    "seed": {
+        "folder": os.path.join(DATA_DIR, "Seed"),
+        "reference_centroid": Point(-93.15253557282972, 41.66782027041434),
+        "rate_column": "AppliedRate",
+        "filename": "AsPlanted",
+        "base_rates": CROP_SEEDING_RATES,
+        "date": datetime.date(2024, 5, 1),
+    },
+}
+
+
+def adjustment_factor(adjustment_percent):
+    # The pages' sliders are a percent change, -100 zeroes the rate
+    return (adjustment_percent + 100) / 100
+
+
+def with_reference_attributes(reference, rate_column, base_rate, day):
+    """Add the rate and Time columns the shipped reference points lack.
+
+    Points without a rate_column get base_rate, and without a Time column they are logged
+    evenly in file order from WORK_DAY_START on day for WORK_DAY_HOURS, so generate_mock_layer
+    can scale the rate and move the pass to the selected date. Columns already present are kept.
+    """
+    if rate_column not in reference.columns:
+        reference[rate_column] = float(base_rate)
+    if "Time" not in reference.columns:
+        seconds = np.floor(np.arange(len(reference)) * (WORK_DAY_HOURS * 3600 / max(len(reference), 1)))
+        timestamps = pd.Timestamp(datetime.datetime.combine(day, WORK_DAY_START)) + pd.to_timedelta(seconds, unit="s")
+        reference["Time"] = timestamps.strftime(TIME_FORMAT)
+    return reference
+
+
+def generate_mock_layer(reference, field_polygon, reference_centroid, labels, rate_column, rate_adjustment, selected_date=None):
+    """Move a reference dataset onto field_polygon, relabel it and scale its rate column.
+
+    reference is the view returned by load_reference_dataset and labels maps columns such as
+    'Crop' or 'Product' to the value written on every point. The result covers the whole
+    field and only contains points inside it.
+    """
+    # Update the label column values
+    for column, label in labels.items():
+        reference[column] = label
+
+    # Apply the rate adjustment to the rate column
+    if rate_column not in reference.columns:
+        raise ValueError(f"The reference data has no {rate_column} column to scale.")
+    reference[rate_column] = reference[rate_column] * rate_adjustment
+
+    # Calculate the offset needed to align the reference centroid with the field centroid
+    offset = get_offset(reference_centroid, field_polygon.centroid)
+
+    # Repeat the shifted observations until the field is covered, keep the ones inside the boundary
+    # and move the 'Time' and 'IsoTime' columns to the selected date
+    return tile_reference_layer(reference, field_polygon, offset, selected_date)
+
+
+def make_mock_layer(kind, field_polygon, labels, rate_adjustment=1.0, selected_date=None):
+    # Generate one of the MOCK_LAYERS for a field
+    layer = MOCK_LAYERS[kind]
+    base_rate = layer["base_rates"].get(labels.get("Crop"), layer["base_rates"]["Other"])
+    reference = with_reference_attributes(load_reference_dataset(layer["folder"]), layer["rate_column"], base_rate, layer["date"])
+    return generate_mock_layer(
+        reference,
+        field_polygon,
+        layer["reference_centroid"],
+        labels,
+        layer["rate_column"],
+        rate_adjustment,
+        selected_date,
+    )
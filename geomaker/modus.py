@@ -0,0 +1,214 @@
+import datetime
+import hashlib
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+from lxml import etree
+
+XSI_NAMESPACE = "http://www.w3.org/2001/XMLSchema-instance"
+
+# Generated documents kept per server process, keyed by a hash of their inputs; each can be tens of MB
+MAX_CACHED_DOCUMENTS = 4
+_document_cache = OrderedDict()
+_document_lock = threading.Lock()
+_document_stats = {"builds": 0, "hits": 0}
+
+# Event and lab metadata written ahead of the samples; dates are filled in per file
+MODUS_METADATA_TEMPLATE = """<Event>
+<EventMetaData>
+<EventCode>1234-ABCD</EventCode>
+<EventDate>{event_date}</EventDate>
+<EventType><Soil/></EventType>
+<EventExpirationDate>{expiration_date}</EventExpirationDate>
+</EventMetaData>
+<LabMetaData>
+<LabName>GeoMaker Analytical</LabName>
+<LabID>1234567</LabID>
+<LabEventID>1234567</LabEventID>
+<TestPackageRefs>
+<TestPackageRef TestPackageID="1">
+<Name>Gold Package</Name>
+<LabBillingCode>1234567</LabBillingCode>
+</TestPackageRef>
+</TestPackageRefs>
+<ReceivedDate>{received_date}T00:00:00-06:00</ReceivedDate>
+<ProcessedDate>{processed_date}T00:00:00-06:00</ProcessedDate>
+<Reports>
+<Report>
+<LabReportID></LabReportID>
+<FileDescription></FileDescription>
+<File></File>
+</Report>
+</Reports>
+</LabMetaData>
+</Event>"""
+
+
+def modus_dates(today=None):
+    # Event, expiration, received and processed dates for a result file made today
+    today = today or datetime.date.today()
+    return {
+        "event_date": str(today),
+        "expiration_date": str(today + datetime.timedelta(days=7)),
+        "received_date": str(today),
+        "processed_date": str(today),
+    }
+
+
+def format_values(values, decimal_precision):
+    # Result values rounded and written with a fixed number of decimals, one string per sample; None where missing
+    values = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=float)
+    return np.array([
+        format(round(value, decimal_precision), f".{decimal_precision}f") if np.isfinite(value) else None
+        for value in values.tolist()
+    ], dtype=object)
+
+
+def _text_element(parent, tag, text, attributes=None):
+    element = etree.SubElement(parent, tag, attributes or {})
+    element.text = str(text)
+    return element
+
+
+def _sample_template(depth_refs, analytes):
+    """One SoilSample element reused for every sample, with its SampleNumber and Geometry elements.
+
+    Each entry of the returned depths holds a Depth element, its NutrientResults, every
+    NutrientResult and Value element, and which results are currently attached (see _show_results).
+    """
+    sample = etree.Element("SoilSample")
+    sample_metadata = etree.SubElement(sample, "SampleMetaData")
+    sample_number = _text_element(sample_metadata, "SampleNumber", "")
+    _text_element(sample_metadata, "OverwriteResult", "false")
+    geometry = etree.SubElement(sample_metadata, "Geometry")
+    depths_element = etree.SubElement(sample, "Depths")
+    depths = []
+    for depth_ref in depth_refs:
+        depth_element = etree.SubElement(depths_element, "Depth", {"DepthID": str(depth_ref['DepthID'])})
+        nutrient_results = etree.SubElement(depth_element, "NutrientResults")
+        result_elements, value_elements = [], []
+        for element, unit, modus_test_id, _, value_desc in analytes:
+            nutrient_result = etree.SubElement(nutrient_results, "NutrientResult")
+            _text_element(nutrient_result, "Element", element)
+            value_elements.append(_text_element(nutrient_result, "Value", ""))
+            _text_element(nutrient_result, "ModusTestID", modus_test_id)
+            _text_element(nutrient_result, "ValueType", "Measured")
+            _text_element(nutrient_result, "ValueUnit", unit)
+            _text_element(nutrient_result, "ValueDesc", value_desc)
+            result_elements.append(nutrient_result)
+        depths.append({
+            "element": depth_element,
+            "results": nutrient_results,
+            "result_elements": result_elements,
+            "values": value_elements,
+            "present": (True,) * len(analytes),
+        })
+    return sample, sample_number, geometry, depths
+
+
+def _show_results(depth, present):
+    # Attach only the NutrientResult elements that have a value; a depth with none drops its NutrientResults,
+    # since the schema wants at least one NutrientResult in it and would reject an empty or "nan" value
+    depth["results"][:] = [result for result, shown in zip(depth["result_elements"], present) if shown]
+    depth["element"][:] = [depth["results"]] if any(present) else []
+    depth["present"] = present
+
+
+def write_modus_result(output, data, depth_refs, analytes, dates=None, geometries=None):
+    """Stream a Modus result document for data into the binary file output.
+
+    analytes lists (element, unit, modus_test_id, decimal_precision, value_desc) for every result
+    column of data. With a DepthID column data holds one row per sample and depth; without one,
+    every depth repeats the sample's row. Each column is formatted once up front and every
+    sample is serialized as soon as its values are filled into a reusable element tree, so the
+    document is never held in memory and text is escaped by lxml. geometries optionally maps
+    sample numbers to the WKT written in their Geometry element; other samples leave it empty.
+    Missing values, and sample/depth pairs without a row, are left out rather than written as
+    "nan", so the document stays valid against modus_result.xsd.
+    """
+    metadata = etree.fromstring(MODUS_METADATA_TEMPLATE.format(**(dates or modus_dates())))
+    sample_column = pd.to_numeric(data['SampleNumber']).astype(int).to_numpy()
+    values = [format_values(data[element], precision) for element, _, _, precision, _ in analytes]
+    rows = list(zip(*values)) if values else [()] * len(data)
+    sample_numbers = list(dict.fromkeys(sample_column.tolist()))
+    depth_ids = [int(depth_ref['DepthID']) for depth_ref in depth_refs]
+
+    # Row holding each sample's results at each depth
+    if 'DepthID' in data.columns:
+        row_lookup = dict(zip(zip(sample_column.tolist(), pd.to_numeric(data['DepthID']).astype(int).tolist()), range(len(data))))
+        missing = (None,) * len(analytes)
+        sample_rows = [[rows[row_lookup[(number, depth_id)]] if (number, depth_id) in row_lookup else missing for depth_id in depth_ids] for number in sample_numbers]
+    else:
+        first_rows = dict(zip(reversed(sample_column.tolist()), reversed(range(len(data)))))
+        sample_rows = [[rows[first_rows[number]]] * len(depth_ids) for number in sample_numbers]
+
+    depth_refs_element = etree.Element("DepthRefs")
+    for depth_ref in depth_refs:
+        depth_ref_element = etree.SubElement(depth_refs_element, "DepthRef", {"DepthID": str(depth_ref['DepthID'])})
+        _text_element(depth_ref_element, "Name", f"{depth_ref['StartingDepth']} - {depth_ref['EndingDepth']}")
+        for tag in ["StartingDepth", "EndingDepth", "ColumnDepth", "DepthUnit"]:
+            _text_element(depth_ref_element, tag, depth_ref[tag])
+    sample, sample_number, geometry, depths = _sample_template(depth_refs, analytes)
+    geometries = geometries or {}
+
+    with etree.xmlfile(output, encoding="utf-8") as xf:
+        xf.write_declaration()
+        root_attributes = {"Version": "1.0", f"{{{XSI_NAMESPACE}}}noNamespaceSchemaLocation": "modus_result.xsd"}
+        with xf.element("ModusResult", root_attributes, nsmap={"xsi": XSI_NAMESPACE}):
+            with xf.element("Event"):
+                for child in metadata:
+                    xf.write(child)
+                with xf.element("EventSamples"), xf.element("Soil"):
+                    xf.write(depth_refs_element)
+                    for number, depth_rows in zip(sample_numbers, sample_rows):
+                        sample_number.text = str(number)
+                        geometry.text = geometries.get(number)
+                        for depth, row in zip(depths, depth_rows):
+                            present = tuple(value is not None for value in row)
+                            if present != depth["present"]:
+                                _show_results(depth, present)
+                            for value_element, value in zip(depth["values"], row):
+                                value_element.text = value
+                        xf.write(sample)
+
+
+def modus_cache_key(data, depth_refs, analytes, dates=None, geometries=None):
+    """Hash identifying a Modus document: the table's values and columns plus the depth refs,
+    analytes (selected columns, units, test IDs, precision), dates and sample geometries."""
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    digest.update(repr(list(data.columns)).encode("utf-8"))
+    digest.update(repr(depth_refs).encode("utf-8"))
+    digest.update(repr(analytes).encode("utf-8"))
+    digest.update(repr(sorted((dates or modus_dates()).items())).encode("utf-8"))
+    digest.update(repr(sorted((geometries or {}).items())).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def modus_result_bytes(data, depth_refs, analytes, dates=None, geometries=None):
+    # The document as bytes, generated only when these inputs have not been written before
+    dates = dates or modus_dates()
+    key = modus_cache_key(data, depth_refs, analytes, dates, geometries)
+    with _document_lock:
+        if key in _document_cache:
+            _document_cache.move_to_end(key)
+            _document_stats["hits"] += 1
+            return _document_cache[key]
+
+    output = BytesIO()
+    write_modus_result(output, data, depth_refs, analytes, dates, geometries)
+    document = output.getvalue()
+    with _document_lock:
+        _document_cache[key] = document
+        while len(_document_cache) > MAX_CACHED_DOCUMENTS:
+            _document_cache.popitem(last=False)
+        _document_stats["builds"] += 1
+    return document
+
+
+def modus_document_stats():
+    with _document_lock:
+        return dict(_document_stats, cached=len(_document_cache))
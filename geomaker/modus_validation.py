@@ -0,0 +1,94 @@
+import os
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import pandas as pd
+from lxml import etree
+
+SCHEMA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Data")
+
+# Schema file for each kind of Modus document
+MODUS_SCHEMAS = {"result": "modus_result.xsd", "submit": "modus_submit.xsd"}
+
+# Compiled schemas, built once per process; the lock also serializes validation against them
+_schema_cache = {}
+_schema_lock = threading.Lock()
+
+
+class SchemaEntityResolver(etree.Resolver):
+    # Point the schemas' includes at the local copies in the Data directory
+    def resolve(self, url, pubid, context):
+        for schema_file in ["modus_global.xsd", "modus_submit.xsd", "modus_result.xsd"]:
+            if schema_file in url:
+                return self.resolve_filename(os.path.join(SCHEMA_DIR, schema_file), context)
+        return self.resolve_filename(url, context)
+
+
+def _compile_schema(kind):
+    parser = etree.XMLParser(load_dtd=True, no_network=True)
+    parser.resolvers.add(SchemaEntityResolver())
+    return etree.XMLSchema(etree.parse(os.path.join(SCHEMA_DIR, MODUS_SCHEMAS[kind]), parser))
+
+
+def modus_schema(kind="result"):
+    """Compiled XMLSchema for kind ("result" or "submit"), parsed and compiled only once.
+
+    Includes are resolved from the Data directory and network access is disabled.
+    """
+    with _schema_lock:
+        if kind not in _schema_cache:
+            _schema_cache[kind] = _compile_schema(kind)
+        return _schema_cache[kind]
+
+
+def validate_modus_xml(xml_data, kind="result"):
+    """Validate a Modus document (bytes or str); return (is_valid, error_message).
+
+    The document parser neither resolves entities nor touches the network.
+    """
+    if isinstance(xml_data, str):
+        xml_data = xml_data.encode("utf-8")
+    schema = modus_schema(kind)
+    try:
+        document = etree.parse(BytesIO(xml_data), etree.XMLParser(no_network=True, resolve_entities=False))
+    except etree.XMLSyntaxError as e:
+        return False, str(e)
+    with _schema_lock:
+        if schema.validate(document):
+            return True, None
+        return False, str(schema.error_log.last_error)
+
+
+def _validate_member(member):
+    # Worker task: validate one file taken from a batch zip
+    name, xml_data, kind = member
+    start = time.perf_counter()
+    is_valid, error_message = validate_modus_xml(xml_data, kind)
+    return {"File": name, "Valid": is_valid, "Error": error_message or "", "Seconds": round(time.perf_counter() - start, 3)}
+
+
+def validate_modus_zip(zip_file, kind="result", workers=None):
+    """Validate every .xml file in a zip in parallel worker processes; return a report DataFrame.
+
+    Each worker compiles the schema once and reuses it for all of its files.
+    """
+    with zipfile.ZipFile(zip_file) as archive:
+        members = [
+            (info.filename, archive.read(info), kind)
+            for info in archive.infolist()
+            if not info.is_dir() and info.filename.lower().endswith(".xml") and not os.path.basename(info.filename).startswith(".")
+        ]
+
+    columns = ["File", "Valid", "Error", "Seconds"]
+    if not members:
+        return pd.DataFrame(columns=columns)
+    workers = min(len(members), workers or os.cpu_count() or 1)
+    if workers == 1:
+        return pd.DataFrame([_validate_member(member) for member in members], columns=columns)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        report = list(executor.map(_validate_member, members, chunksize=max(1, len(members) // (workers * 4))))
+    return pd.DataFrame(report, columns=columns)
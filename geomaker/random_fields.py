@@ -0,0 +1,95 @@
+import numpy as np
+
+# Largest FFT grid side; coarser cells are used beyond this so memory stays bounded
+MAX_GRID_SIZE = 2048
+
+# Grid cells per correlation length when the grid is small enough to allow it
+CELLS_PER_CORRELATION_LENGTH = 4
+
+
+def gaussian_random_field(shape, cell_size, correlation_length, rng):
+    """Standard normal field on a shape grid with Gaussian covariance exp(-r² / 2L²).
+
+    White noise is filtered by the square root of the covariance's power spectrum in the
+    frequency domain (spectral synthesis), so the cost is one real FFT pair, O(M log M) in the
+    number of grid cells.
+    """
+    rows, columns = shape
+    noise = rng.standard_normal(shape)
+    fy = np.fft.fftfreq(rows, d=cell_size)
+    fx = np.fft.rfftfreq(columns, d=cell_size)
+    k2 = (2 * np.pi) ** 2 * (fy[:, None] ** 2 + fx[None, :] ** 2)
+    amplitude = np.exp(-k2 * correlation_length ** 2 / 4)
+    field = np.fft.irfft2(np.fft.rfft2(noise) * amplitude, s=shape)
+    field -= field.mean()
+    std = field.std()
+    return field / std if std > 0 else field
+
+
+def field_grid(x, y, correlation_length):
+    # Origin, cell size and shape of a grid covering the points with room for the FFT to wrap
+    padding = 3 * correlation_length
+    minx, miny = x.min() - padding, y.min() - padding
+    extent = max(x.max() + padding - minx, y.max() + padding - miny)
+    cell_size = max(correlation_length / CELLS_PER_CORRELATION_LENGTH, extent / (MAX_GRID_SIZE - 1))
+    columns = int(np.ceil((x.max() + padding - minx) / cell_size)) + 2
+    rows = int(np.ceil((y.max() + padding - miny) / cell_size)) + 2
+    return (minx, miny), cell_size, (rows, columns)
+
+
+def sample_grid(field, origin, cell_size, x, y):
+    # Bilinear interpolation of the grid at every point
+    column = (x - origin[0]) / cell_size
+    row = (y - origin[1]) / cell_size
+    c0 = np.clip(np.floor(column).astype(np.intp), 0, field.shape[1] - 2)
+    r0 = np.clip(np.floor(row).astype(np.intp), 0, field.shape[0] - 2)
+    tx = column - c0
+    ty = row - r0
+    top = field[r0, c0] * (1 - tx) + field[r0, c0 + 1] * tx
+    bottom = field[r0 + 1, c0] * (1 - tx) + field[r0 + 1, c0 + 1] * tx
+    return top * (1 - ty) + bottom * ty
+
+
+def field_grids(x, y, correlation_length, count, seed=None):
+    # count independent random field grids covering the projected points, with their origin and cell size
+    rng = np.random.default_rng(seed)
+    origin, cell_size, shape = field_grid(np.asarray(x, dtype=float), np.asarray(y, dtype=float), correlation_length)
+    return origin, cell_size, [gaussian_random_field(shape, cell_size, correlation_length, rng) for _ in range(count)]
+
+
+def correlate_samples(samples, correlations):
+    """Mix independent standard normal samples so field i has correlation correlations[i] with field 0.
+
+    Every field shares one spatial structure, so a correlation of 1 reproduces the first field
+    and 0 leaves an independent one.
+    """
+    base = samples[0]
+    fields = [base]
+    for independent, correlation in zip(samples[1:], correlations[1:]):
+        fields.append(correlation * base + np.sqrt(max(0.0, 1 - correlation ** 2)) * independent)
+    return fields
+
+
+def correlated_fields(x, y, correlation_length, correlations, seed=None):
+    # Standard normal spatial fields sampled at projected points (x, y), see correlate_samples
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if not len(x):
+        return [np.empty(0) for _ in correlations]
+
+    origin, cell_size, grids = field_grids(x, y, correlation_length, len(correlations), seed)
+    return correlate_samples([sample_grid(grid, origin, cell_size, x, y) for grid in grids], correlations)
+
+
+def scale_to_range(values, value_range, bounds=None):
+    """Stretch a field linearly so that bounds (default: its own min and max) map onto value_range.
+
+    Pass the bounds of the whole field when scaling it a chunk at a time.
+    """
+    low, high = value_range
+    if not len(values):
+        return values
+    minimum, maximum = bounds if bounds is not None else (values.min(), values.max())
+    if maximum == minimum:
+        return np.full(len(values), (low + high) / 2)
+    return low + (values - minimum) / (maximum - minimum) * (high - low)
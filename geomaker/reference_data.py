@@ -0,0 +1,121 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+import pandas as pd
+import geopandas as gpd
+
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+# Reference datasets parsed once per server process, keyed by absolute folder or file path
+_reference_cache = {}
+_reference_lock = threading.Lock()
+
+# Columnar copies of spreadsheets, so each workbook version is only parsed by openpyxl once
+TABLE_CACHE_DIR = os.path.join(tempfile.gettempdir(), "geomaker-cache")
+
+
+def read_shapefile_from_folder(folder_path):
+    # Find the .shp file in the folder (case-insensitive)
+    shapefile_path = next((file for file in os.listdir(folder_path) if file.lower().endswith(".shp")), None)
+    if shapefile_path:
+        gdf = gpd.read_file(os.path.join(folder_path, shapefile_path))
+    else:
+        raise FileNotFoundError("No .shp file found in the shapefile folder.")
+    return gdf
+
+
+def _folder_mtime(folder_path):
+    return max(os.path.getmtime(os.path.join(folder_path, file)) for file in os.listdir(folder_path))
+
+
+def _load_cached(key, mtime, read):
+    # Shared cache lookup: read() runs only when key is new or its mtime changed
+    with _reference_lock:
+        entry = _reference_cache.get(key)
+        if entry is None or entry["mtime"] != mtime:
+            start = time.perf_counter()
+            data = read(key)
+            entry = {
+                "data": data,
+                "mtime": mtime,
+                "rows": len(data),
+                "load_seconds": time.perf_counter() - start,
+                "loads": (entry["loads"] if entry else 0) + 1,
+                "hits": 0,
+            }
+            _reference_cache[key] = entry
+        else:
+            entry["hits"] += 1
+    return entry["data"].copy(deep=False)
+
+
+def load_reference_dataset(folder_path):
+    """Return a view of the shapefile in folder_path, reading it from disk only once per process.
+
+    The view is a shallow copy: replacing a column (gdf['Crop'] = ..., gdf['geometry'] = ...)
+    only touches the caller's copy, while the parsed arrays stay shared between sessions.
+    Callers must not modify values in place.
+    """
+    key = os.path.abspath(folder_path)
+    return _load_cached(key, _folder_mtime(key), read_shapefile_from_folder)
+
+
+def _columnar_cache_path(path, mtime_ns):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    path_hash = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:8]
+    return os.path.join(TABLE_CACHE_DIR, f"{stem}-{path_hash}-{mtime_ns}.feather")
+
+
+def read_excel_columnar(path):
+    """Read the first sheet of a workbook through a Feather copy keyed by the workbook's mtime.
+
+    The first read of each workbook version parses it with openpyxl and writes the copy; later
+    reads, in any process, memory-map the Feather file instead. Without pyarrow the workbook is
+    parsed directly.
+    """
+    if feather is None:
+        return pd.read_excel(path)
+
+    cache_path = _columnar_cache_path(path, os.stat(path).st_mtime_ns)
+    if os.path.exists(cache_path):
+        return feather.read_table(cache_path, memory_map=True).to_pandas()
+
+    table = pd.read_excel(path)
+    os.makedirs(TABLE_CACHE_DIR, exist_ok=True)
+    # Write under a temporary name so concurrent readers never see a partial file
+    partial_path = f"{cache_path}.{os.getpid()}.partial"
+    feather.write_feather(table, partial_path, compression="uncompressed")
+    os.replace(partial_path, cache_path)
+    # Drop copies of older versions of the same workbook
+    prefix = cache_path.rsplit("-", 1)[0] + "-"
+    for file in os.listdir(TABLE_CACHE_DIR):
+        stale_path = os.path.join(TABLE_CACHE_DIR, file)
+        if stale_path.startswith(prefix) and stale_path != cache_path and file.endswith(".feather"):
+            os.remove(stale_path)
+    return table
+
+
+def load_reference_table(path):
+    # Spreadsheet counterpart of load_reference_dataset; the same sharing rules apply
+    key = os.path.abspath(path)
+    return _load_cached(key, os.path.getmtime(key), read_excel_columnar)
+
+
+def reference_dataset_stats():
+    # Load time, row count and cache hits for every dataset read so far
+    with _reference_lock:
+        return {
+            key: {name: value for name, value in entry.items() if name != "data"}
+            for key, entry in _reference_cache.items()
+        }
+
+
+def clear_reference_cache():
+    with _reference_lock:
+        _reference_cache.clear()
@@ -0,0 +1,179 @@
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+from scipy.special import ndtri
+
+from geomaker.geometry import geodesic_areas
+
+SQUARE_METRES_PER_ACRE = 4046.8564224
+
+# Columns most likely to hold the rate in prescription files from common controllers
+RATE_COLUMN_CANDIDATES = ["Rate", "RATE", "Tgt_Rate", "Target_Rat", "AppliedRate", "Rx_Rate", "Product"]
+
+# Targets the Rx editor can scale a prescription to
+TARGET_METHODS = [
+    "Total Product (urea):",
+    "Total Cost:",
+    "Average Rate per Acre:",
+    "Spend Per Acre (dollars per acre):",
+]
+
+# Unit each target is reported in
+TARGET_UNITS = {
+    "Total Product (urea):": "lbs",
+    "Total Cost:": "$",
+    "Average Rate per Acre:": "lbs/acre",
+    "Spend Per Acre (dollars per acre):": "$/acre",
+}
+
+
+def target_product(method, value, cost_per_pound, acres):
+    # Every target is a fixed total of product once cost and area are known
+    if method == "Total Product (urea):":
+        return value
+    if method == "Total Cost:":
+        return value / cost_per_pound
+    if method == "Average Rate per Acre:":
+        return value * acres
+    if method == "Spend Per Acre (dollars per acre):":
+        return value / cost_per_pound * acres
+    raise ValueError(f"Unknown scaling method: {method}")
+
+
+def target_value(method, rates, acres_per_cell, cost_per_pound):
+    # The quantity a target method measures for rates applied over acres_per_cell
+    total_product = float(np.dot(rates, acres_per_cell))
+    acres = float(np.sum(acres_per_cell))
+    return {
+        "Total Product (urea):": total_product,
+        "Total Cost:": total_product * cost_per_pound,
+        "Average Rate per Acre:": total_product / acres if acres else 0.0,
+        "Spend Per Acre (dollars per acre):": total_product * cost_per_pound / acres if acres else 0.0,
+    }[method]
+
+
+def clipped_scale(values, weights, target, min_rate, max_rate, order=None):
+    """Scale factor s for which sum(weights * clip(s * values, min_rate, max_rate)) equals target.
+
+    values must be non-negative. The total is a piecewise linear, non-decreasing function of s
+    whose kinks are where a cell reaches min_rate (s = min_rate / value) or max_rate
+    (s = max_rate / value). The kinks are sorted once and cumulative sums give the total at any
+    kink in O(log n), so a binary search over them finds the piece holding the target and the
+    exact s is solved on it: O(n log n) overall, with no iteration over the cells. Returns
+    (s, reachable); an unreachable target gets the s closest to it (0 or inf). order, when the
+    caller already has it, sorts values in descending order.
+    """
+    values = np.asarray(values, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        starts = np.where(values > 0, min_rate / values, np.inf)
+        stops = np.where(values > 0, max_rate / values, np.inf)
+
+    # Totals at the two extremes: everything at min_rate, and every scalable cell at max_rate
+    lowest = min_rate * weights.sum()
+    highest = lowest + (max_rate - min_rate) * weights[values > 0].sum()
+    if target <= lowest:
+        return 0.0, bool(np.isclose(target, lowest))
+    if target >= highest:
+        return np.inf, bool(np.isclose(target, highest))
+
+    # Both kinds of kink fall as the value rises, so one sort by descending value orders them all
+    if order is None:
+        order = np.argsort(-values)
+    sorted_starts, sorted_stops = starts[order], stops[order]
+    weighted_values = np.concatenate([[0.0], np.cumsum((weights * values)[order])])
+    sorted_weights = np.concatenate([[0.0], np.cumsum(weights[order])])
+    total_weight = sorted_weights[-1]
+
+    def line(s):
+        # Slope and intercept of the total on the piece starting at s (cells past their start and before their stop scale)
+        started = np.searchsorted(sorted_starts, s, side="right")
+        stopped = np.searchsorted(sorted_stops, s, side="right")
+        slope = weighted_values[started] - weighted_values[stopped]
+        intercept = min_rate * (total_weight - sorted_weights[started]) + max_rate * sorted_weights[stopped]
+        return slope, intercept
+
+    def total(s):
+        slope, intercept = line(s)
+        return slope * s + intercept
+
+    # Binary search over the sorted kinks for the piece holding the target; the total is linear within it
+    kinks = np.sort(np.concatenate([sorted_starts, sorted_stops]), kind="stable")
+    kinks = kinks[:np.searchsorted(kinks, np.inf)]
+    low, high = 0, len(kinks) - 1
+    while low < high:
+        middle = (low + high) // 2
+        if total(kinks[middle]) < target:
+            low = middle + 1
+        else:
+            high = middle
+    slope, intercept = line(kinks[low - 1]) if low > 0 else line(0.0)
+    return float((target - intercept) / slope), True
+
+
+def scale_rates(values, weights, target, min_rate, max_rate, spread=None):
+    """Rates scaled to meet a product target under min/max clipping; returns (rates, scale, reachable).
+
+    Equal scaling multiplies every rate by one factor. With a spread the rates are first
+    reshaped by bell_curve_values, then that shape is scaled by one factor the same way.
+    """
+    values = np.asarray(values, dtype=float)
+    order = None
+    if spread is not None:
+        # The reshaped rates keep the original order, so the solver reuses its sort
+        values, order = bell_curve_values(values, weights, spread)
+        order = order[::-1]
+    scale, reachable = clipped_scale(values, weights, target, min_rate, max_rate, order)
+    with np.errstate(invalid="ignore"):
+        scaled = values * scale
+    scaled[values == 0] = 0.0
+    return np.clip(scaled, min_rate, max_rate), scale, reachable
+
+
+def bell_curve_values(values, weights, spread):
+    """Rates reshaped into a bell curve around their area-weighted mean, keeping every cell's rank.
+
+    Each rate's weighted mid-rank (shared by equal rates) is mapped to a normal quantile, so the
+    result is normally distributed with the same mean and spread times the original standard
+    deviation: spread below 1 pulls rates toward the mean, above 1 pushes them apart. Negative
+    rates become 0. Returns the rates and the order that sorts them ascending.
+    """
+    values = np.asarray(values, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    order = np.argsort(values)
+    if not len(values):
+        return values, order
+    mean = np.average(values, weights=weights)
+    std = np.sqrt(np.average((values - mean) ** 2, weights=weights))
+
+    # Mid-point of each run of equal rates in the cumulative weight, as a fraction of the total
+    sorted_values = values[order]
+    cumulative = np.concatenate([[0.0], np.cumsum(weights[order])])
+    run_starts = np.flatnonzero(np.concatenate([[True], sorted_values[1:] != sorted_values[:-1]]))
+    run_ends = np.append(run_starts[1:], len(values))
+    run_positions = (cumulative[run_starts] + cumulative[run_ends]) / 2 / cumulative[-1]
+    positions = np.empty(len(values))
+    positions[order] = np.repeat(run_positions, run_ends - run_starts)
+    return np.maximum(mean + spread * std * ndtri(positions), 0.0), order
+
+
+def read_rx_layer(file):
+    """Polygons of a prescription shapefile (a zip path or uploaded file) in WGS84 and their acres.
+
+    Acres are geodesic, measured for every polygon at once with geodesic_areas.
+    """
+    gdf = gpd.read_file(file)
+    if gdf.crs is None:
+        gdf = gdf.set_crs("EPSG:4326")
+    elif gdf.crs.to_epsg() != 4326:
+        gdf = gdf.to_crs("EPSG:4326")
+    gdf = gdf[gdf.geometry.geom_type.isin(["Polygon", "MultiPolygon"])].reset_index(drop=True)
+    if gdf.empty:
+        raise ValueError("No polygons found in the prescription file.")
+    return gdf, geodesic_areas(gdf.geometry) / SQUARE_METRES_PER_ACRE
+
+
+def rate_columns(gdf):
+    # Numeric attribute columns, the likely rate column first
+    columns = [column for column in gdf.columns if column != gdf.geometry.name and pd.api.types.is_numeric_dtype(gdf[column])]
+    return sorted(columns, key=lambda column: column not in RATE_COLUMN_CANDIDATES)
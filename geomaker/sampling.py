@@ -0,0 +1,184 @@
+import os
+
+import numpy as np
+import pandas as pd
+import shapely
+import geopandas as gpd
+from pyproj import Transformer
+
+from geomaker.interpolation import build_tree, idw_interpolate, DEFAULT_NEIGHBOURS
+from geomaker.veris import project_boundary, to_wgs84
+
+# Decimal places of the WKT written for each sample (8 places of a degree is about a millimetre)
+WKT_PRECISION = 8
+
+# Text layers (Veris .dat, csv) are read as points from these coordinate columns
+COORDINATE_COLUMNS = ('Longitude', 'Latitude')
+
+SQUARE_METRES_PER_ACRE = 4046.8564224
+
+# Edge cells smaller than this fraction of a full grid cell are left unsampled
+MIN_CELL_FRACTION = 0.25
+
+
+def points_from_features(features):
+    # GeoDataFrame of the drawn Point features, numbered in the order they were dropped
+    points = [(idx, shapely.geometry.shape(feature['geometry'])) for idx, feature in enumerate(features) if feature['geometry']['type'] == 'Point']
+    return gpd.GeoDataFrame(
+        {'Name': [f"Sample {idx + 1}" for idx, _ in points], 'SampleID': [idx + 1 for idx, _ in points]},
+        geometry=[point for _, point in points],
+        crs="EPSG:4326"
+    )
+
+
+def read_points_layer(file, name=None):
+    """Points GeoDataFrame in WGS84 from a zipped shapefile, GeoJSON, or a Veris .dat / csv table.
+
+    file is a path or an uploaded file object; name (defaulting to the path) picks the reader.
+    Text tables need Longitude and Latitude columns.
+    """
+    name = (name or getattr(file, 'name', None) or str(file)).lower()
+    if os.path.splitext(name)[1] in ('.dat', '.txt', '.csv'):
+        table = pd.read_csv(file, sep=',' if name.endswith('.csv') else '\t')
+        table.columns = table.columns.str.strip()
+        missing = [column for column in COORDINATE_COLUMNS if column not in table.columns]
+        if missing:
+            raise ValueError(f"The table has no {' or '.join(missing)} column.")
+        geometry = gpd.points_from_xy(table.pop('Longitude'), table.pop('Latitude'))
+        return gpd.GeoDataFrame(table, geometry=geometry, crs="EPSG:4326")
+
+    gdf = gpd.read_file(file)
+    if gdf.crs is None:
+        gdf = gdf.set_crs("EPSG:4326")
+    elif gdf.crs.to_epsg() != 4326:
+        gdf = gdf.to_crs("EPSG:4326")
+    gdf = gdf[gdf.geometry.geom_type == 'Point']
+    if gdf.empty:
+        raise ValueError("No points found in the file.")
+    return gdf
+
+
+def sample_locations(points):
+    """Sample points indexed by SampleNumber, in WGS84.
+
+    Points keep the SampleID written by the Create Sampling Points page when the layer has
+    unique whole-number IDs; otherwise they are numbered from 1 in file order.
+    """
+    sample_ids = pd.to_numeric(points['SampleID'], errors='coerce') if 'SampleID' in points.columns else None
+    if sample_ids is None or sample_ids.isna().any() or not sample_ids.is_unique or (sample_ids % 1 != 0).any():
+        sample_ids = np.arange(1, len(points) + 1)
+    locations = gpd.GeoDataFrame(geometry=points.geometry.values, crs=points.crs)
+    locations.index = pd.Index(np.asarray(sample_ids, dtype=int), name='SampleNumber')
+    return locations.sort_index()
+
+
+def sample_geometries(locations):
+    # WKT of every sample's point keyed by SampleNumber, converted in one vectorized call
+    wkt = shapely.to_wkt(locations.geometry.values, rounding_precision=WKT_PRECISION, trim=True)
+    return dict(zip(locations.index.tolist(), wkt.tolist()))
+
+
+def projected_xy(gdf, crs=None):
+    # x and y arrays of the points in crs (default: their UTM zone) and that CRS, transformed as plain arrays
+    crs = crs or gdf.estimate_utm_crs()
+    coordinates = shapely.get_coordinates(gdf.geometry.values)
+    x, y = Transformer.from_crs(gdf.crs, crs, always_xy=True).transform(coordinates[:, 0], coordinates[:, 1])
+    return np.asarray(x), np.asarray(y), crs
+
+
+def numeric_columns(layer):
+    # Attribute columns of a layer that can be interpolated
+    return [column for column in layer.columns if column != layer.geometry.name and pd.api.types.is_numeric_dtype(layer[column])]
+
+
+def interpolate_layer(layer, column, locations, neighbours=DEFAULT_NEIGHBOURS):
+    """Values of a covariate layer's column at the sample locations by KD-tree IDW.
+
+    Both layers are projected into the samples' UTM zone; the tree is built over the layer's
+    points with valid values, so each sample costs one O(log n) neighbour query.
+    """
+    values = pd.to_numeric(layer[column], errors='coerce').to_numpy(dtype=float)
+    valid = np.isfinite(values)
+    if not valid.any():
+        raise ValueError(f"The {column} column has no numeric values.")
+    x, y, crs = projected_xy(locations)
+    source_x, source_y, _ = projected_xy(layer[valid], crs)
+    return idw_interpolate(build_tree(source_x, source_y), values[valid], x, y, neighbours)
+
+
+def grid_cells(boundary, cell_acres, crs="EPSG:4326"):
+    """Square cells of cell_acres laid over boundary in its UTM zone and clipped to it.
+
+    Returns the clipped cell polygons, the unclipped cell area in square metres and the UTM CRS.
+    Cells are built, tested and clipped as arrays: cells wholly inside the field are kept as
+    they are and only those crossing the edge are intersected with it.
+    """
+    projected_boundary, utm_crs = project_boundary(boundary, crs)
+    cell_area = cell_acres * SQUARE_METRES_PER_ACRE
+    side = np.sqrt(cell_area)
+    minx, miny, maxx, maxy = projected_boundary.bounds
+    xx, yy = np.meshgrid(np.arange(minx, maxx, side), np.arange(miny, maxy, side))
+    cells = shapely.box(xx.ravel(), yy.ravel(), xx.ravel() + side, yy.ravel() + side)
+
+    shapely.prepare(projected_boundary)
+    cells = cells[shapely.intersects(projected_boundary, cells)]
+    edge = ~shapely.contains_properly(projected_boundary, cells)
+    cells[edge] = shapely.intersection(cells[edge], projected_boundary)
+    return cells, cell_area, utm_crs
+
+
+def random_points_in(polygons, rng, attempts=20):
+    # One uniform random point inside each polygon: whole-array rejection sampling in their bounding boxes
+    bounds = shapely.bounds(polygons)
+    x = np.full(len(polygons), np.nan)
+    y = np.full(len(polygons), np.nan)
+    pending = np.arange(len(polygons))
+    for _ in range(attempts):
+        if not len(pending):
+            break
+        candidate_x = rng.uniform(bounds[pending, 0], bounds[pending, 2])
+        candidate_y = rng.uniform(bounds[pending, 1], bounds[pending, 3])
+        inside = shapely.contains_xy(polygons[pending], candidate_x, candidate_y)
+        x[pending[inside]] = candidate_x[inside]
+        y[pending[inside]] = candidate_y[inside]
+        pending = pending[~inside]
+    # Very thin slivers that kept missing fall back to a point on their surface
+    if len(pending):
+        fallback = shapely.get_coordinates(shapely.point_on_surface(polygons[pending]))
+        x[pending], y[pending] = fallback[:, 0], fallback[:, 1]
+    return x, y
+
+
+def grid_sample_points(boundary, cell_acres, placement="centroid", seed=None, min_cell_fraction=MIN_CELL_FRACTION, crs="EPSG:4326"):
+    """GeoDataFrame of one sample point per grid cell of cell_acres, numbered like points_from_features.
+
+    placement "centroid" puts the point at the clipped cell's centroid (or on its surface when
+    the centroid falls outside a concave cell); "random" puts it anywhere inside the cell.
+    Edge cells smaller than min_cell_fraction of a full cell are not sampled.
+    """
+    cells, cell_area, utm_crs = grid_cells(boundary, cell_acres, crs)
+    cells = cells[shapely.area(cells) >= min_cell_fraction * cell_area]
+    if placement == "random":
+        x, y = random_points_in(cells, np.random.default_rng(seed))
+    else:
+        centroids = shapely.centroid(cells)
+        outside = ~shapely.contains(cells, centroids)
+        centroids[outside] = shapely.point_on_surface(cells[outside])
+        coordinates = shapely.get_coordinates(centroids)
+        x, y = coordinates[:, 0], coordinates[:, 1]
+
+    longitude, latitude = to_wgs84(x, y, utm_crs)
+    sample_ids = np.arange(1, len(longitude) + 1)
+    return gpd.GeoDataFrame(
+        {'Name': [f"Sample {sample_id}" for sample_id in sample_ids], 'SampleID': sample_ids},
+        geometry=gpd.points_from_xy(longitude, latitude),
+        crs="EPSG:4326"
+    )
+
+
+def point_features(points):
+    # GeoJSON Point features for points in WGS84, in the form the folium Draw control returns
+    return [
+        {"type": "Feature", "properties": {}, "geometry": {"type": "Point", "coordinates": [longitude, latitude]}}
+        for longitude, latitude in shapely.get_coordinates(points.geometry.values).tolist()
+    ]
@@ -0,0 +1,305 @@
+import os
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+
+from geomaker.random_fields import field_grids, sample_grid
+
+# Range and precision used for analytes without their own entry
+DEFAULT_RANGE = (0, 100)
+DEFAULT_DECIMALS = 2
+
+# Relative change per depth step below the topsoil. Organic matter, N, P, K and micronutrients
+# concentrate near the surface; pH, base cations and bulk density rise with depth.
+DEPTH_TRENDS = {
+    "OM": -0.25, "OC": -0.25, "TOC": -0.25, "TN": -0.25, "Humic Matter": -0.3,
+    "NO3-N": -0.2, "NH4-N": -0.2,
+    "P(B1)": -0.35, "P(B2)": -0.35, "P(Cald)": -0.35, "P(Olsen)": -0.35, "P(M1)": -0.35, "P(M2)": -0.35,
+    "K": -0.15, "pct K": -0.1, "S": -0.1, "SO4-S": -0.1,
+    "Zn": -0.3, "Mn": -0.2, "Cu": -0.1, "Fe": -0.1, "B": -0.15,
+    "pH": 0.02, "BpH": 0.01, "Ca": 0.08, "pct Ca": 0.03, "Mg": 0.08, "pct Mg": 0.05,
+    "Na": 0.1, "pct Na": 0.1, "Cl": 0.05, "BD": 0.05,
+}
+
+# Correlation between a sample's topsoil and subsoil draws
+DEPTH_PERSISTENCE = 0.8
+
+# Correlations between analytes in the latent multivariate normal model; unlisted pairs are independent
+ANALYTE_CORRELATIONS = {
+    ("OM", "CEC"): 0.6, ("OM", "TN"): 0.8, ("OM", "Humic Matter"): 0.8, ("OM", "NO3-N"): 0.4,
+    ("OM", "NH4-N"): 0.3, ("OM", "S"): 0.4, ("OM", "SO4-S"): 0.3, ("OM", "ENR"): 0.7,
+    ("pH", "BpH"): 0.8, ("pH", "pct Ca"): 0.5, ("pH", "pct H"): -0.7, ("pH", "Mn"): -0.4,
+    ("pH", "Fe"): -0.4, ("pH", "Zn"): -0.3, ("pH", "Al"): -0.6, ("pH", "CaCO3"): 0.5,
+    ("BpH", "pct H"): -0.6, ("CEC", "pct Ca"): 0.3, ("pct Ca", "pct Mg"): 0.2, ("pct Ca", "pct H"): -0.6,
+    ("P(B1)", "P(B2)"): 0.8, ("P(B1)", "P(M1)"): 0.8, ("P(B1)", "P(M2)"): 0.8, ("P(B1)", "P(Olsen)"): 0.7,
+    ("P(B1)", "P(Cald)"): 0.7, ("Zn", "Cu"): 0.4, ("Fe", "Mn"): 0.4, ("S", "SO4-S"): 0.8,
+    ("Na", "pct Na"): 0.8, ("SS", "EC"): 0.8, ("SAR", "AdjSAR"): 0.9,
+}
+
+# Analytes always modelled so the identities below can be enforced, whichever columns are selected
+CORE_ANALYTES = ["CEC", "OM", "pct K", "pct Ca", "pct Mg", "pct Na", "pct H"]
+
+# Exchangeable cations: base saturation column and ppm per meq/100g
+CATION_EQUIVALENTS = {"K": ("pct K", 391.0), "Ca": ("pct Ca", 200.4), "Mg": ("pct Mg", 121.5), "Na": ("pct Na", 230.0)}
+
+# Organic carbon is organic matter divided by the van Bemmelen factor
+VAN_BEMMELEN_FACTOR = 1.724
+
+# Loading of each analyte's topsoil draw on a covariate such as soil EC; EC tracks clay and
+# organic matter, so CEC, OM and the cations follow it. Unlisted analytes do not.
+COVARIATE_LOADINGS = {
+    "CEC": 0.8, "OM": 0.6, "OC": 0.6, "TOC": 0.6, "TN": 0.5, "Humic Matter": 0.5, "pct Ca": 0.4,
+    "pct Mg": 0.4, "pct Na": 0.3, "Ca": 0.5, "Mg": 0.5, "K": 0.4, "Na": 0.3, "EC": 0.7, "SS": 0.6,
+    "pH": 0.3, "BpH": 0.2, "CaCO3": 0.3, "BD": -0.3,
+}
+
+# Soil-test table the empirical mode fits its distributions to, and its column names that differ from ours
+EMPIRICAL_SOURCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Data", "ppmSoilTest.xlsx")
+EMPIRICAL_ALIASES = {"ECAP": "ECaP", "P(B1)": "P", "P(B2)": "P", "P(Cald)": "P", "P(Olsen)": "P", "P(M1)": "P", "P(M2)": "P"}
+
+
+def round_columns(values, decimals):
+    # Round each column of the last axis to its own number of decimals in one pass
+    scale = 10.0 ** np.asarray(decimals, dtype=float)
+    return np.round(values * scale) / scale
+
+
+def correlation_matrix(analytes, correlations=ANALYTE_CORRELATIONS, empirical=None):
+    """Positive definite correlation matrix for analytes built from pairwise correlations.
+
+    empirical optionally maps analytes to normal scores from a real table; correlations between
+    those analytes are measured from the table instead. Pairs that are inconsistent together are
+    repaired by clipping the eigenvalues and rescaling the diagonal back to one.
+    """
+    index = {analyte: position for position, analyte in enumerate(analytes)}
+    matrix = np.eye(len(analytes))
+    for (first, second), correlation in correlations.items():
+        if first in index and second in index:
+            matrix[index[first], index[second]] = matrix[index[second], index[first]] = correlation
+    if empirical:
+        measured = [index[analyte] for analyte in empirical]
+        matrix[np.ix_(measured, measured)] = np.corrcoef(np.array(list(empirical.values())))
+    eigenvalues, eigenvectors = np.linalg.eigh(matrix)
+    if eigenvalues.min() < 1e-6:
+        matrix = (eigenvectors * np.maximum(eigenvalues, 1e-6)) @ eigenvectors.T
+        scale = np.sqrt(np.diag(matrix))
+        matrix = matrix / scale[:, None] / scale[None, :]
+    return matrix
+
+
+def _normal_scores(values):
+    # Standard normal quantiles of the mid-ranks, so a column's scores follow its rank order
+    ranks = (np.argsort(np.argsort(values, kind="stable"), kind="stable") + 0.5) / len(values)
+    return ndtri(ranks)
+
+
+def empirical_columns(table, analytes):
+    # Numeric table column backing each analyte that has one
+    columns = {}
+    for analyte in analytes:
+        column = analyte if analyte in table.columns else EMPIRICAL_ALIASES.get(analyte)
+        if column in table.columns and pd.api.types.is_numeric_dtype(table[column]):
+            values = table[column].dropna().to_numpy(dtype=float)
+            if len(values) > 1 and values.std() > 0:
+                columns[analyte] = column
+    return columns
+
+
+def spatial_normals(x, y, count, correlation_length, seed=None):
+    """(points, count) array of independent standard normal random fields sampled at projected (x, y).
+
+    Points closer than correlation_length (metres) get similar values, so results drawn from
+    these normals vary smoothly across the field.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    origin, cell_size, grids = field_grids(x, y, correlation_length, count, seed)
+    return np.column_stack([sample_grid(grid, origin, cell_size, x, y) for grid in grids])
+
+
+def draw_soil_tests(sample_count, depth_count, ranges, trends, correlation, seed=None, quantiles=None, topsoil_normals=None, covariate=None, loadings=None):
+    """(depth, sample, analyte) array of correlated mock results drawn from a seeded Generator.
+
+    Every value comes from one multivariate normal draw: independent normals are mixed by the
+    Cholesky factor of correlation, each depth keeps DEPTH_PERSISTENCE correlation with the
+    sample's topsoil, and the result is mapped onto each analyte's range through the normal CDF,
+    or through its empirical quantiles where quantiles has sorted observed values for it.
+    Deeper values are then shifted by (1 + trend) per depth step and clipped to the range.
+
+    topsoil_normals (sample, analyte), such as spatial_normals at the sample points, replaces
+    the topsoil's independent normals. covariate holds standard normal scores per sample; each
+    analyte's topsoil then has correlation loadings[analyte] with it.
+    """
+    rng = np.random.default_rng(seed)
+    ranges = np.asarray(ranges, dtype=float).reshape(-1, 2)
+    low, high = ranges[:, 0], ranges[:, 1]
+    normals = rng.standard_normal((depth_count, sample_count, len(ranges)))
+    if topsoil_normals is not None:
+        normals[0] = topsoil_normals
+    latent = normals @ np.linalg.cholesky(correlation).T
+    if covariate is not None:
+        loadings = np.asarray(loadings, dtype=float)
+        latent[0] = np.asarray(covariate, dtype=float)[:, None] * loadings + np.sqrt(1 - loadings ** 2) * latent[0]
+    latent[1:] = DEPTH_PERSISTENCE * latent[0] + np.sqrt(1 - DEPTH_PERSISTENCE ** 2) * latent[1:]
+    probabilities = ndtr(latent)
+    values = low + probabilities * (high - low)
+    for position, observed in enumerate(quantiles or []):
+        if observed is not None:
+            values[..., position] = np.interp(probabilities[..., position], (np.arange(len(observed)) + 0.5) / len(observed), observed)
+    values *= (1 + np.asarray(trends, dtype=float)) ** np.arange(depth_count)[:, None, None]
+    return np.clip(values, low, high)
+
+
+def identity_ranges(min_max_values):
+    """(min, max) of each derived analyte implied by the ranges of the values it follows.
+
+    Exchangeable K, Ca, Mg, Na (ppm) and H_Meq come from the CEC and saturation ranges, BS from
+    the base saturations together with pct H, ESP from pct Na and OC and TOC from OM, so results
+    from enforce_identities stay within them (up to rounding).
+    """
+    def bounds(analyte):
+        return np.asarray(min_max_values.get(analyte, DEFAULT_RANGE), dtype=float)
+
+    cec = bounds("CEC")
+    ranges = {cation: tuple(bounds(saturation) / 100 * cec * ppm_per_meq) for cation, (saturation, ppm_per_meq) in CATION_EQUIVALENTS.items()}
+    ranges["H_Meq"] = tuple(bounds("pct H") / 100 * cec)
+    bases = sum(bounds(saturation) for saturation, _ in CATION_EQUIVALENTS.values())
+    ranges["BS"] = (max(bases[0], 100 - bounds("pct H")[1]), min(bases[1], 100 - bounds("pct H")[0]))
+    ranges["ESP"] = tuple(bounds("pct Na"))
+    ranges["OC"] = ranges["TOC"] = tuple(bounds("OM") / VAN_BEMMELEN_FACTOR)
+    return {analyte: (float(low), float(high)) for analyte, (low, high) in ranges.items()}
+
+
+def enforce_identities(values, analytes, decimals, ranges, fixed=()):
+    """Make derived analytes agree with the values they depend on, in place, over all rows at once.
+
+    values is a (rows, analytes) array and ranges the (min, max) of each analyte. Saturations are
+    in %, CEC and H_Meq in meq/100g and the exchangeable cations in ppm. Base saturations are
+    moved towards 100 in total within their ranges, each by its share of the room left, so pct
+    K, Ca, Mg, Na and H sum to 100 after rounding; exchangeable K, Ca, Mg, Na and H_Meq follow
+    from CEC and the saturations; BS is the base saturation, ESP the sodium saturation, OC and
+    TOC follow OM and ratio columns such as "K:Mg" are the ratio of their parts.
+
+    Analytes in fixed, such as those drawn from a real table, are never overwritten. A fixed
+    cation sets its own saturation from CEC instead, and the other saturations fit around it.
+    """
+    index = {analyte: position for position, analyte in enumerate(analytes)}
+    fixed = set(fixed)
+
+    def column(analyte):
+        return values[:, index[analyte]]
+
+    def assign(analyte, result):
+        if analyte in index and analyte not in fixed:
+            values[:, index[analyte]] = round_columns(result, decimals[index[analyte]])
+
+    # Saturations of fixed cations follow from their ppm and CEC
+    cec = column("CEC")
+    for cation, (saturation, ppm_per_meq) in CATION_EQUIVALENTS.items():
+        if cation in index and cation in fixed:
+            assign(saturation, np.divide(column(cation) / ppm_per_meq * 100, cec, out=np.zeros_like(cec), where=cec > 0))
+
+    # Base saturations sum to 100 inside their ranges; pct H takes up the rounding
+    bases = ["pct K", "pct Ca", "pct Mg", "pct Na"]
+    positions = [index[analyte] for analyte in bases + ["pct H"]]
+    held = np.array([analyte in fixed for analyte in bases + ["pct H"]])
+    held[:len(bases)] |= [cation in index and cation in fixed for cation in CATION_EQUIVALENTS]
+    saturations = values[:, positions]
+    low, high = np.asarray(ranges, dtype=float).reshape(-1, 2)[positions].T
+    # Held saturations have no room to move
+    low = np.where(held, saturations, low)
+    high = np.where(held, saturations, high)
+    gap = 100 - saturations.sum(axis=1, keepdims=True)
+    room = np.where(gap > 0, high - saturations, saturations - low)
+    total_room = room.sum(axis=1, keepdims=True)
+    share = np.divide(np.abs(gap), total_room, out=np.zeros_like(gap), where=total_room > 0)
+    saturations = saturations + np.sign(gap) * room * np.minimum(share, 1)
+    # Ranges that cannot add up to 100 are left behind: the free saturations are scaled to fill what the held ones leave
+    free = np.where(held, 0, saturations)
+    free_total = free.sum(axis=1, keepdims=True)
+    left = np.maximum(100 - np.where(held, saturations, 0).sum(axis=1, keepdims=True), 0)
+    saturations = np.where(held, saturations, np.divide(free * left, free_total, out=np.zeros_like(free), where=free_total > 0))
+    for position, analyte in enumerate(bases):
+        assign(analyte, saturations[:, position])
+    base_saturation = sum(column(analyte) for analyte in bases)
+    assign("pct H", 100 - base_saturation)
+    assign("BS", base_saturation)
+    assign("ESP", column("pct Na"))
+
+    # Exchangeable cations agree with CEC
+    for cation, (saturation, ppm_per_meq) in CATION_EQUIVALENTS.items():
+        assign(cation, column(saturation) / 100 * cec * ppm_per_meq)
+    assign("H_Meq", column("pct H") / 100 * cec)
+
+    # Organic carbon follows organic matter
+    assign("OC", column("OM") / VAN_BEMMELEN_FACTOR)
+    assign("TOC", column("OM") / VAN_BEMMELEN_FACTOR)
+
+    # Ratios of two analytes
+    for analyte in analytes:
+        parts = analyte.replace("&#58;", ":").split(":")
+        if len(parts) == 2 and parts[0] in index and parts[1] in index:
+            denominator = column(parts[1])
+            assign(analyte, np.divide(column(parts[0]), denominator, out=np.zeros_like(denominator), where=denominator > 0))
+    return values
+
+
+def generate_soil_tests(sample_numbers, depth_ids, analytes, min_max_values, decimal_precisions, seed=None, empirical_table=None, locations=None, correlation_length=None, covariate=None):
+    """Long-format DataFrame of mock results: one row per sample and depth, one column per analyte.
+
+    Analytes are drawn together from the correlated model and the chemical identities are then
+    enforced on every row. With an empirical_table (such as the ppmSoilTest.xlsx table), analytes
+    it contains follow its distributions and the correlations measured between its columns and
+    are kept as drawn, with the saturations derived from its cations; the others keep their
+    ranges. The same seed always gives the same table.
+
+    locations, projected (x, y) arrays of the samples, with a correlation_length in metres make
+    the topsoil a smooth spatial surface. covariate, one value per sample (for example EC
+    interpolated from a Veris layer), drives the analytes in COVARIATE_LOADINGS through its ranks.
+    """
+    sample_numbers = np.asarray(sample_numbers)
+    depth_ids = np.asarray(depth_ids)
+    modelled = list(analytes) + [analyte for analyte in CORE_ANALYTES if analyte not in analytes]
+    decimals = [decimal_precisions.get(analyte, DEFAULT_DECIMALS) for analyte in modelled]
+    ranges = [min_max_values.get(analyte, DEFAULT_RANGE) for analyte in modelled]
+    quantiles = None
+    empirical = None
+    columns = {}
+
+    if empirical_table is not None:
+        columns = empirical_columns(empirical_table, modelled)
+        complete = empirical_table[sorted(set(columns.values()))].dropna()
+        observed = {analyte: np.sort(empirical_table[column].dropna().to_numpy(dtype=float)) for analyte, column in columns.items()}
+        quantiles = [observed.get(analyte) for analyte in modelled]
+        ranges = [(observed[analyte][0], observed[analyte][-1]) if analyte in observed else value_range for analyte, value_range in zip(modelled, ranges)]
+        if len(complete) > 2:
+            empirical = {analyte: _normal_scores(complete[column].to_numpy(dtype=float)) for analyte, column in columns.items()}
+
+    topsoil_normals = None
+    if locations is not None and correlation_length:
+        # The fields get their own stream spawned from the seed so they do not reuse the draw's numbers
+        field_seed = np.random.SeedSequence(seed).spawn(1)[0]
+        topsoil_normals = spatial_normals(locations[0], locations[1], len(modelled), correlation_length, field_seed)
+    if covariate is not None:
+        covariate = _normal_scores(np.asarray(covariate, dtype=float))
+
+    values = draw_soil_tests(
+        len(sample_numbers),
+        len(depth_ids),
+        ranges,
+        [DEPTH_TRENDS.get(analyte, 0.0) for analyte in modelled],
+        correlation_matrix(modelled, empirical=empirical),
+        seed,
+        quantiles,
+        topsoil_normals,
+        covariate,
+        [COVARIATE_LOADINGS.get(analyte, 0.0) for analyte in modelled],
+    )
+    # Order rows sample by sample, with each sample's depths together
+    values = round_columns(values.transpose(1, 0, 2).reshape(-1, len(modelled)), decimals)
+    values = enforce_identities(values, modelled, decimals, ranges, fixed=columns)[:, :len(analytes)]
+    data = pd.DataFrame(values, columns=list(analytes))
+    data.insert(0, 'DepthID', np.tile(depth_ids, len(sample_numbers)))
+    data.insert(0, 'SampleNumber', np.repeat(sample_numbers, len(depth_ids)))
+    return data
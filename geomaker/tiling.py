@@ -0,0 +1,100 @@
+import numpy as np
+import shapely
+import geopandas as gpd
+
+from geomaker.dates import redate_column
+
+# Candidate points tested per chunk; bounds peak memory on very large fields
+DEFAULT_CHUNK_POINTS = 2_000_000
+
+# Most points a tiled layer may hold. Every kept point becomes a shapely point, an attribute
+# row and a shapefile record, so this bounds memory and download size: about 1 GB peak and a
+# 130 MB zip at the limit, which is roughly 950 acres of seed or 15,000 acres of yield data.
+DEFAULT_MAX_POINTS = 1_500_000
+
+
+def tile_offsets(reference_bounds, field_bounds, base_offset):
+    """(dx, dy) offsets of every copy of the reference footprint needed to cover field_bounds.
+
+    The copy at base_offset is the one the pages already place on the field centroid; the
+    others step away from it by the footprint's width and height.
+    """
+    rminx, rminy, rmaxx, rmaxy = reference_bounds
+    fminx, fminy, fmaxx, fmaxy = field_bounds
+    width = max(rmaxx - rminx, 1e-9)
+    height = max(rmaxy - rminy, 1e-9)
+    x0 = rminx + base_offset[0]
+    y0 = rminy + base_offset[1]
+
+    columns = np.arange(np.floor((fminx - x0) / width), np.ceil((fmaxx - x0) / width))
+    rows = np.arange(np.floor((fminy - y0) / height), np.ceil((fmaxy - y0) / height))
+    # Walk the tiles row by row, alternating direction, so consecutive tiles are neighbours
+    grid = [(column, row) for index, row in enumerate(rows) for column in (columns if index % 2 == 0 else columns[::-1])]
+    grid = np.array(grid, dtype=float).reshape(-1, 2)
+    return np.column_stack([base_offset[0] + grid[:, 0] * width, base_offset[1] + grid[:, 1] * height])
+
+
+def iter_tiled_points(coords, boundary, offsets, chunk_points=DEFAULT_CHUNK_POINTS):
+    """Yield (tiles, rows, x, y) for the shifted reference points that land inside boundary.
+
+    tiles indexes offsets and rows indexes coords. Tiles are processed a chunk at a time, tiles
+    that miss the boundary are skipped and tiles entirely inside it skip the point test.
+    """
+    count = len(coords)
+    if count == 0 or len(offsets) == 0:
+        return
+    shapely.prepare(boundary)
+
+    minx, miny = coords[:, 0].min(), coords[:, 1].min()
+    maxx, maxy = coords[:, 0].max(), coords[:, 1].max()
+    footprints = shapely.box(minx + offsets[:, 0], miny + offsets[:, 1], maxx + offsets[:, 0], maxy + offsets[:, 1])
+    touching = np.flatnonzero(shapely.intersects(boundary, footprints))
+    inside = shapely.contains_properly(boundary, footprints)
+
+    tiles_per_chunk = max(1, chunk_points // count)
+    for start in range(0, len(touching), tiles_per_chunk):
+        chunk = touching[start:start + tiles_per_chunk]
+        x = (coords[None, :, 0] + offsets[chunk, 0, None]).ravel()
+        y = (coords[None, :, 1] + offsets[chunk, 1, None]).ravel()
+        keep = np.repeat(inside[chunk], count)
+        test = ~keep
+        keep[test] = shapely.intersects_xy(boundary, x[test], y[test])
+        kept = np.flatnonzero(keep)
+        yield chunk[kept // count], kept % count, x[kept], y[kept]
+
+
+def tile_reference_layer(reference, boundary, base_offset, new_date=None, time_columns=("Time", "IsoTime"), chunk_points=DEFAULT_CHUNK_POINTS, max_points=DEFAULT_MAX_POINTS):
+    """Cover boundary with copies of the reference points and keep the ones inside it.
+
+    Attributes are copied from the reference row each point came from. Each tile reads as its
+    own pass over the reference's time span: Time/IsoTime keep the reference's time of day,
+    moved to new_date by redate_column. Fields that would need more than max_points points
+    raise ValueError before any of them are built.
+    """
+    geometries = np.asarray(reference.geometry.values)
+    has_z = bool(len(geometries)) and bool(shapely.has_z(geometries).all())
+    coords = shapely.get_coordinates(geometries, include_z=has_z)
+    offsets = tile_offsets(shapely.total_bounds(geometries), boundary.bounds, base_offset)
+
+    chunks = []
+    kept = 0
+    for chunk in iter_tiled_points(coords[:, :2], boundary, offsets, chunk_points):
+        kept += len(chunk[1])
+        if kept > max_points:
+            raise ValueError(f"The field needs more than {max_points:,} points of mock data. Use a smaller boundary.")
+        chunks.append(chunk)
+    if chunks:
+        _, rows, x, y = (np.concatenate(parts) for parts in zip(*chunks))
+    else:
+        rows = np.empty(0, dtype=np.int64)
+        x = y = np.empty(0, dtype=float)
+
+    points = shapely.points(x, y, coords[rows, 2]) if has_z else shapely.points(x, y)
+    attributes = reference.drop(columns=reference.geometry.name)
+    if new_date:
+        # Re-date the reference once; every tile then takes its rows' timestamps
+        for column in time_columns:
+            if column in attributes.columns:
+                attributes[column] = redate_column(attributes[column], new_date)
+    attributes = attributes.iloc[rows].reset_index(drop=True)
+    return gpd.GeoDataFrame(attributes, geometry=points, crs=reference.crs)
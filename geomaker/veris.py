@@ -0,0 +1,198 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import shapely
+import geopandas as gpd
+from pyproj import Transformer
+
+from geomaker.random_fields import field_grids, sample_grid, correlate_samples, scale_to_range
+
+# Candidate grid points tested per chunk; bounds peak memory on very large fields
+DEFAULT_CHUNK_POINTS = 1_000_000
+
+# Rows generated and written per chunk of the .dat file
+DEFAULT_CHUNK_ROWS = 100_000
+
+VERIS_COLUMNS = ['Latitude', 'Longitude', 'EC Shallow', 'EC Deep', 'pH', 'Date', 'Time']
+
+# Decimal places written for the numeric columns (8 places of a degree is about a millimetre)
+VERIS_DECIMALS = {'Latitude': 8, 'Longitude': 8, 'EC Shallow': 2, 'EC Deep': 2, 'pH': 2}
+
+
+def project_boundary(boundary, crs="EPSG:4326"):
+    # Reproject the field boundary into the UTM zone that contains it
+    boundary_series = gpd.GeoSeries([boundary], crs=crs)
+    utm_crs = boundary_series.estimate_utm_crs()
+    return boundary_series.to_crs(utm_crs).iloc[0], utm_crs
+
+
+def iter_grid_chunks(boundary, spacing, chunk_points=DEFAULT_CHUNK_POINTS, pass_spacing=None):
+    """Yield (x, y) arrays of the grid points at spacing that fall inside boundary.
+
+    boundary must be in a projected CRS so spacing is in metres; pass_spacing, when given,
+    spaces the grid columns instead of spacing. The bounding box is walked a band of grid rows
+    at a time and only the points strictly inside the boundary are kept, so no more than
+    chunk_points candidates exist at once.
+    """
+    minx, miny, maxx, maxy = boundary.bounds
+    x_coords = np.arange(minx, maxx, pass_spacing or spacing)
+    y_coords = np.arange(miny, maxy, spacing)
+    if not len(x_coords) or not len(y_coords):
+        return
+
+    shapely.prepare(boundary)
+    rows_per_chunk = max(1, chunk_points // len(x_coords))
+    for start in range(0, len(y_coords), rows_per_chunk):
+        xx, yy = np.meshgrid(x_coords, y_coords[start:start + rows_per_chunk])
+        xx = xx.ravel()
+        yy = yy.ravel()
+        inside = shapely.contains_xy(boundary, xx, yy)
+        if inside.any():
+            yield xx[inside], yy[inside]
+
+
+def grid_coordinates(boundary, spacing, chunk_points=DEFAULT_CHUNK_POINTS, pass_spacing=None):
+    # Concatenate every chunk of grid points inside a projected boundary
+    chunks = list(iter_grid_chunks(boundary, spacing, chunk_points, pass_spacing))
+    if not chunks:
+        return np.empty(0), np.empty(0)
+    return np.concatenate([x for x, _ in chunks]), np.concatenate([y for _, y in chunks])
+
+
+def serpentine_order(x, y, swath_width):
+    """Indices that sort projected points into back-and-forth passes swath_width apart.
+
+    Passes run south to north and north to south in turn, the way a survey cart drives the
+    field, and are numbered from the western edge.
+    """
+    if not len(x):
+        return np.empty(0, dtype=np.intp)
+    # Passes are centred on the westernmost column so grid columns never straddle two passes
+    passes = np.floor((x - x.min()) / swath_width + 0.5).astype(np.int64)
+    direction = np.where(passes % 2 == 0, 1.0, -1.0)
+    return np.lexsort((direction * y, passes))
+
+
+def survey_points(boundary, point_spacing_meters, swath_width=None, crs="EPSG:4326", chunk_points=DEFAULT_CHUNK_POINTS):
+    """Projected x and y arrays of a grid with point_spacing_meters inside boundary, and their CRS.
+
+    The grid is laid out in the boundary's UTM zone, so spacing is true on the ground at any
+    latitude. With a swath_width the grid columns become survey passes that far apart and the
+    points come back in serpentine driving order.
+    """
+    projected_boundary, utm_crs = project_boundary(boundary, crs)
+    x, y = grid_coordinates(projected_boundary, point_spacing_meters, chunk_points, swath_width)
+    if swath_width:
+        order = serpentine_order(x, y, swath_width)
+        x, y = x[order], y[order]
+    return x, y, utm_crs
+
+
+def to_wgs84(x, y, crs):
+    # Longitude and latitude arrays of projected coordinates
+    transformer = Transformer.from_crs(crs, "EPSG:4326", always_xy=True)
+    longitude, latitude = transformer.transform(x, y)
+    return np.asarray(longitude), np.asarray(latitude)
+
+
+def generate_grid_points(boundary, point_spacing_meters, swath_width=None, crs="EPSG:4326", chunk_points=DEFAULT_CHUNK_POINTS):
+    # Longitude and latitude arrays of the survey grid; only points inside the field are transformed
+    x, y, utm_crs = survey_points(boundary, point_spacing_meters, swath_width, crs, chunk_points)
+    return to_wgs84(x, y, utm_crs)
+
+
+def iter_veris_chunks(x, y, crs, start_datetime, ec_shallow_range, ec_deep_range, ph_range, correlation_length, ec_correlation, seed=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Yield the Veris table for projected survey points (x, y) as DataFrames of chunk_rows rows.
+
+    EC Shallow, EC Deep and pH are Gaussian random fields with the given correlation length
+    (metres) stretched over their ranges; EC Deep is correlated with EC Shallow by
+    ec_correlation and pH varies independently. Readings are one second apart from
+    start_datetime. Only one chunk of rows exists at a time.
+    """
+    if not len(x):
+        return
+
+    origin, cell_size, grids = field_grids(x, y, correlation_length, 3, seed)
+    correlations = [1.0, ec_correlation, 0.0]
+    chunks = [(start, min(start + chunk_rows, len(x))) for start in range(0, len(x), chunk_rows)]
+
+    def measurements(start, stop):
+        return correlate_samples([sample_grid(grid, origin, cell_size, x[start:stop], y[start:stop]) for grid in grids], correlations)
+
+    # First pass: the range of every field over all points, so each chunk is scaled the same way
+    lows = np.full(3, np.inf)
+    highs = np.full(3, -np.inf)
+    for start, stop in chunks:
+        for index, values in enumerate(measurements(start, stop)):
+            lows[index] = min(lows[index], values.min())
+            highs[index] = max(highs[index], values.max())
+
+    transformer = Transformer.from_crs(crs, "EPSG:4326", always_xy=True)
+    start_time = np.datetime64(start_datetime, "s")
+    for start, stop in chunks:
+        ec_shallow, ec_deep, ph = [
+            scale_to_range(values, value_range, (lows[index], highs[index]))
+            for index, (values, value_range) in enumerate(zip(measurements(start, stop), [ec_shallow_range, ec_deep_range, ph_range]))
+        ]
+        longitude, latitude = transformer.transform(x[start:stop], y[start:stop])
+        dates, times = format_date_time(survey_timestamps(start_time + np.timedelta64(start, "s"), stop - start))
+        yield pd.DataFrame(dict(zip(VERIS_COLUMNS, [latitude, longitude, ec_shallow, ec_deep, ph, dates, times])))
+
+
+def _format_veris_rows(chunk):
+    # Tab-separated lines for one chunk, with fixed decimals on the numeric columns
+    row_format = '\t'.join(f"{{:.{VERIS_DECIMALS[column]}f}}" if column in VERIS_DECIMALS else "{}" for column in VERIS_COLUMNS) + '\n'
+    return ''.join([row_format.format(*row) for row in zip(*[chunk[column].tolist() for column in VERIS_COLUMNS])])
+
+
+def write_veris_dat(chunks, output, preview_rows=5):
+    """Write Veris chunks to the binary file output as tab-separated text; return (rows, preview).
+
+    The header is written once and each chunk is formatted and written before the next is
+    generated. preview holds the first preview_rows rows.
+    """
+    output.write(('\t'.join(VERIS_COLUMNS) + '\n').encode('utf-8'))
+    rows = 0
+    preview = pd.DataFrame(columns=VERIS_COLUMNS)
+    for chunk in chunks:
+        if not rows:
+            preview = chunk.head(preview_rows).copy()
+        output.write(_format_veris_rows(chunk).encode('utf-8'))
+        rows += len(chunk)
+    return rows, preview
+
+
+def make_veris_file(chunks, preview_rows=5, directory=None):
+    """Write Veris chunks to a new temporary .dat file; return (path, rows, preview).
+
+    The file stays on disk so a survey of millions of rows is never held in memory; the caller
+    deletes it when it is no longer needed. A partly written file is removed if generation fails.
+    """
+    descriptor, path = tempfile.mkstemp(suffix='.dat', prefix='veris_', dir=directory)
+    try:
+        with os.fdopen(descriptor, 'wb') as output:
+            rows, preview = write_veris_dat(chunks, output, preview_rows)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, rows, preview
+
+
+def survey_timestamps(start_datetime, count, interval_seconds=1):
+    # One datetime64 reading every interval_seconds from start_datetime
+    start = np.datetime64(start_datetime, "s")
+    return start + np.arange(count, dtype=np.int64) * np.timedelta64(interval_seconds, "s")
+
+
+def format_date_time(timestamps):
+    """'YYYY-MM-DD' and 'HH:MM:SS' string arrays for datetime64 timestamps.
+
+    Both columns are cut from one vectorized ISO conversion instead of per-row strftime calls.
+    """
+    iso = np.datetime_as_string(np.asarray(timestamps, dtype="datetime64[s]"), unit="s").astype("U19")
+    characters = iso.view("U1").reshape(-1, 19)
+    dates = np.ascontiguousarray(characters[:, :10]).view("U10").ravel()
+    times = np.ascontiguousarray(characters[:, 11:]).view("U8").ravel()
+    return dates, times
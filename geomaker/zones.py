@@ -0,0 +1,196 @@
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+from scipy import ndimage
+
+from geomaker.interpolation import build_tree, nearest_neighbours
+from geomaker.sampling import projected_xy, SQUARE_METRES_PER_ACRE
+from geomaker.veris import to_wgs84
+
+# Points drawn per mini-batch k-means step, and the steps taken before the final assignment
+KMEANS_BATCH_SIZE = 4096
+KMEANS_STEPS = 200
+
+# Full passes over every point that polish the mini-batch centres
+LLOYD_STEPS = 5
+
+# Points assigned to their nearest centre at a time, bounding the (chunk, zones) distance array
+ASSIGN_CHUNK = 1_000_000
+
+# Zone raster: finest cell size in metres, and the most cells it may have
+ZONE_CELL_SIZE = 10.0
+MAX_ZONE_CELLS = 1_000_000
+
+# Raster cells farther than this many cell sizes from any layer point are outside the zones
+MAX_GAP_CELLS = 3
+
+# Width in cells of the majority filter that removes single-cell specks from the zone map
+ZONE_SMOOTHING = 5
+
+
+def assign_clusters(features, centres):
+    # Index of the nearest centre for every row, computed a chunk of rows at a time
+    labels = np.empty(len(features), dtype=np.intp)
+    for start in range(0, len(features), ASSIGN_CHUNK):
+        chunk = features[start:start + ASSIGN_CHUNK]
+        distances = (chunk ** 2).sum(axis=1)[:, None] - 2 * chunk @ centres.T + (centres ** 2).sum(axis=1)[None, :]
+        labels[start:start + ASSIGN_CHUNK] = distances.argmin(axis=1)
+    return labels
+
+
+def kmeans(features, clusters, seed=None, batch_size=KMEANS_BATCH_SIZE, steps=KMEANS_STEPS, lloyd_steps=LLOYD_STEPS):
+    """(labels, centres) of mini-batch k-means on a (points, features) array.
+
+    Centres start from k-means++ seeding on one batch. Each step assigns a random batch to its
+    nearest centres and moves every centre towards its batch mean with a per-centre learning
+    rate of 1 / (points it has seen), all as array operations. A few full Lloyd passes then
+    move each centre to the mean of all its points, so the cost is linear in the number of points.
+    """
+    features = np.asarray(features, dtype=float).reshape(len(features), -1)
+    rng = np.random.default_rng(seed)
+    batch_size = min(batch_size, len(features))
+
+    # k-means++ seeding on a batch: each new centre is picked in proportion to squared distance
+    sample = features[rng.choice(len(features), batch_size, replace=False)]
+    centres = [sample[rng.integers(len(sample))]]
+    for _ in range(1, clusters):
+        distances = ((sample[:, None, :] - np.array(centres)[None, :, :]) ** 2).sum(axis=2).min(axis=1)
+        total = distances.sum()
+        centres.append(sample[rng.choice(len(sample), p=distances / total)] if total > 0 else sample[rng.integers(len(sample))])
+    centres = np.array(centres)
+
+    counts = np.zeros(clusters)
+    for _ in range(steps):
+        batch = features[rng.integers(0, len(features), batch_size)]
+        labels = assign_clusters(batch, centres)
+        batch_counts = np.bincount(labels, minlength=clusters)
+        sums = np.zeros_like(centres)
+        np.add.at(sums, labels, batch)
+        seen = batch_counts > 0
+        counts += batch_counts
+        rate = batch_counts[seen] / counts[seen]
+        centres[seen] += rate[:, None] * (sums[seen] / batch_counts[seen, None] - centres[seen])
+
+    labels = assign_clusters(features, centres)
+    for _ in range(lloyd_steps):
+        counts = np.bincount(labels, minlength=clusters)
+        seen = counts > 0
+        sums = np.column_stack([np.bincount(labels, weights=column, minlength=clusters) for column in features.T])
+        centres[seen] = sums[seen] / counts[seen, None]
+        labels = assign_clusters(features, centres)
+    return labels, centres
+
+
+def standardize(values):
+    # Columns scaled to zero mean and unit variance so no attribute dominates the distances
+    values = np.asarray(values, dtype=float).reshape(len(values), -1)
+    std = values.std(axis=0)
+    return (values - values.mean(axis=0)) / np.where(std > 0, std, 1)
+
+
+def management_zones(layer, columns, zones, seed=None):
+    """Zone number (1 = lowest mean of the first column) for every point of layer.
+
+    The layer's numeric columns are standardized and clustered with kmeans; points with a
+    missing value in any column get zone 0.
+    """
+    values = layer[list(columns)].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    valid = np.isfinite(values).all(axis=1)
+    labels, _ = kmeans(standardize(values[valid]), zones, seed)
+    # Number zones by their mean of the first column so zone 1 is always the low zone
+    means = np.bincount(labels, weights=values[valid, 0], minlength=zones) / np.maximum(np.bincount(labels, minlength=zones), 1)
+    rank = np.empty(zones, dtype=np.intp)
+    rank[np.argsort(means)] = np.arange(1, zones + 1)
+    result = np.zeros(len(layer), dtype=np.intp)
+    result[valid] = rank[labels]
+    return result
+
+
+def zone_raster(x, y, zone_numbers, boundary=None):
+    """Zone map on a regular grid over projected points: (zones, origin, cell size).
+
+    Each cell takes the zone of its nearest point (KD-tree lookup); cells beyond MAX_GAP_CELLS
+    cells of any point, or outside the projected boundary when one is given, are 0. A
+    majority filter then removes isolated cells so zones are contiguous patches.
+    """
+    valid = zone_numbers > 0
+    x, y, zone_numbers = x[valid], y[valid], zone_numbers[valid]
+    minx, miny, maxx, maxy = boundary.bounds if boundary is not None else (x.min(), y.min(), x.max(), y.max())
+    cell_size = max(ZONE_CELL_SIZE, np.sqrt((maxx - minx) * (maxy - miny) / MAX_ZONE_CELLS))
+    columns = int(np.ceil((maxx - minx) / cell_size)) + 1
+    rows = int(np.ceil((maxy - miny) / cell_size)) + 1
+    cell_x, cell_y = np.meshgrid(minx + (np.arange(columns) + 0.5) * cell_size, miny + (np.arange(rows) + 0.5) * cell_size)
+
+    distances, indices = nearest_neighbours(build_tree(x, y), cell_x.ravel(), cell_y.ravel(), 1)
+    raster = zone_numbers[indices[:, 0]]
+    raster[distances[:, 0] > MAX_GAP_CELLS * cell_size] = 0
+    if boundary is not None:
+        shapely.prepare(boundary)
+        raster[~shapely.contains_xy(boundary, cell_x.ravel(), cell_y.ravel())] = 0
+    raster = raster.reshape(rows, columns)
+
+    # Majority filter: each cell takes the zone most common in its neighbourhood
+    zone_ids = np.arange(1, zone_numbers.max() + 1)
+    shares = np.stack([ndimage.uniform_filter((raster == zone).astype(float), ZONE_SMOOTHING, mode='constant') for zone in zone_ids])
+    smoothed = zone_ids[shares.argmax(axis=0)]
+    smoothed[raster == 0] = 0
+    return smoothed, (minx, miny), cell_size
+
+
+def spread_cells(candidates, edge_distance, count):
+    # Greedy farthest-point choice: start deepest inside the zone, then take the cell farthest from those already chosen
+    chosen = [int(np.argmax(edge_distance))]
+    nearest = np.hypot(*(candidates - candidates[chosen[0]]).T)
+    for _ in range(1, min(count, len(candidates))):
+        chosen.append(int(np.argmax(nearest)))
+        nearest = np.minimum(nearest, np.hypot(*(candidates - candidates[chosen[-1]]).T))
+    return candidates[chosen]
+
+
+def zone_sample_points(layer, columns, zones, points_per_zone, edge_buffer, boundary=None, seed=None):
+    """Sample points for management zones clustered from a yield, Veris or EC layer.
+
+    layer is a points GeoDataFrame in WGS84 and columns the attributes to cluster on. Each zone
+    gets points_per_zone points spread across it, inside the zone and at least edge_buffer
+    metres from its edges where the zone is wide enough (otherwise as deep inside as it
+    allows). boundary (WGS84), when given, clips the zones to the field. Returns the points,
+    numbered like points_from_features, and a summary of every zone.
+    """
+    zone_numbers = management_zones(layer, columns, zones, seed)
+    x, y, utm_crs = projected_xy(layer)
+    projected_boundary = gpd.GeoSeries([boundary], crs="EPSG:4326").to_crs(utm_crs).iloc[0] if boundary is not None else None
+    raster, origin, cell_size = zone_raster(x, y, zone_numbers, projected_boundary)
+
+    sample_x, sample_y, summary = [], [], []
+    for zone in range(1, zones + 1):
+        mask = raster == zone
+        if not mask.any():
+            continue
+        # Distance from every zone cell to the nearest cell outside the zone (or outside the field)
+        edge_distance = ndimage.distance_transform_edt(np.pad(mask, 1))[1:-1, 1:-1] * cell_size
+        cell_rows, cell_columns = np.nonzero(mask)
+        depth = edge_distance[cell_rows, cell_columns]
+        keep = depth >= edge_buffer
+        if not keep.any():
+            keep = depth >= depth.max()
+        candidates = np.column_stack([origin[0] + (cell_columns[keep] + 0.5) * cell_size, origin[1] + (cell_rows[keep] + 0.5) * cell_size])
+        chosen = spread_cells(candidates, depth[keep], points_per_zone)
+        sample_x.extend(chosen[:, 0])
+        sample_y.extend(chosen[:, 1])
+        in_zone = zone_numbers == zone
+        summary.append({
+            'Zone': zone,
+            'Acres': round(mask.sum() * cell_size ** 2 / SQUARE_METRES_PER_ACRE, 1),
+            **{f"Mean {column}": round(float(pd.to_numeric(layer[column], errors='coerce')[in_zone].mean()), 2) for column in columns},
+            'Points': len(chosen),
+        })
+
+    longitude, latitude = to_wgs84(np.array(sample_x), np.array(sample_y), utm_crs)
+    sample_ids = np.arange(1, len(longitude) + 1)
+    points = gpd.GeoDataFrame(
+        {'Name': [f"Sample {sample_id}" for sample_id in sample_ids], 'SampleID': sample_ids},
+        geometry=gpd.points_from_xy(longitude, latitude),
+        crs="EPSG:4326"
+    )
+    return points, pd.DataFrame(summary)
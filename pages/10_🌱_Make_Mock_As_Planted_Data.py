@@ -0,0 +1,245 @@
+import folium
+import streamlit as st
+import json
+import tempfile
+from folium.plugins import Draw
+from streamlit_folium import st_folium
+from zipfile import ZipFile
+from shapely.geometry import shape as shapely_shape, MultiPolygon
+import geopandas as gpd
+from shapely.ops import unary_union
+from collections import OrderedDict
+from geomaker.mock_data import CROP_IDS, MOCK_LAYERS, make_mock_layer
+from geomaker.export import write_shapefile_zip
+from geomaker.boundaries import kml_to_geojson
+
+st.set_page_config(page_title="Geomaker", page_icon="🌍", layout="wide")
+
+# Functions 
+def get_uploaded_boundary_gdf(uploaded_boundary):
+    if not uploaded_boundary:
+        return None
+    gdf = gpd.GeoDataFrame.from_features(uploaded_boundary["features"], crs="EPSG:4326")
+    return gdf
+
+def get_centroid(polygon):
+    return polygon.centroid
+
+def make_as_planted(field_polygon, crop_name, variety_name, seeding_rate_adjustment, selected_date):
+    # Start from the crop's typical seeding rate, set the crop and variety, scale the rate and cover the field with the shifted planting observations
+    try:
+        gdf = make_mock_layer('seed', field_polygon, {'Crop': crop_name, 'Variety': variety_name}, seeding_rate_adjustment, selected_date)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    if gdf.empty:
+        st.error("None of the as-planted points fall inside the field boundary.")
+        return
+
+    # Write the shapefile components straight into a zip in memory
+    return write_shapefile_zip(gdf, MOCK_LAYERS['seed']['filename'])
+
+if 'uploaded_boundary' not in st.session_state:
+    st.session_state.uploaded_boundary = None
+
+if 'boundary_updated' not in st.session_state:
+    st.session_state.boundary_updated = False
+
+if 'new_as_planted_zip' not in st.session_state:
+    st.session_state.new_as_planted_zip = None
+
+def shapefile_to_geojson(shp_file):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with ZipFile(shp_file) as zip_file:
+            zip_file.extractall(tmpdir)
+        gdf = gpd.read_file(tmpdir)
+    geojson = json.loads(gdf.to_json())
+    return geojson
+
+def save_geojson_to_shapefile(all_drawings, filename, crop):
+    polygons = [(idx, shapely_shape(feature['geometry'])) for idx, feature in enumerate(all_drawings) if feature['geometry']['type'] == 'Polygon']
+    gdf = gpd.GeoDataFrame(
+        {'Name': [f"Polygon {idx}" for idx, _ in polygons], 'Crop': [str(crop)] * len(polygons)},
+        geometry=[polygon for _, polygon in polygons],
+        crs="EPSG:4326"
+    )
+
+    # Write the shapefile components straight into a zip in memory
+    return write_shapefile_zip(gdf, filename)
+
+st.title("🌱 Make Mock As-Planted Data")
+st.warning("⚠️ This page is currently a work in progress. Seeding rates start from a typical rate for the selected crop (seeds/acre) and can be scaled with the slider. Please notify Dylan of any issues you experience.")
+
+# Create an expander for the instructions
+instructions_expander = st.expander("Click for instructions", expanded=False)
+with instructions_expander:
+    st.markdown("""
+    This application enables you to generate as-planted data for your field by following these steps:
+
+    1. **Add a field boundary**: If you have already saved a drawn boundary on the **✏️ Draw a Field** page, it will be automatically displayed on the map. You may also upload a zipped boundary using the file uploader below. 
+
+    2. **Specify Crop and Variety**: Choose the crop and enter the hybrid or variety name for the as-planted data. Adjust the seeding rate and planting date if needed.
+
+    3. **Generate as-planted data**: Once you have a boundary, click the "Make Data" button to generate the as-planted data for your field. The application will create a new shapefile containing the as-planted data, which you can download by clicking the "Download Shapefile" button.
+
+    💡 **Tip:** If you need to add or modify your field boundary, visit the **✏️ Draw a Field** page and follow the instructions there.
+    """, unsafe_allow_html=True)
+
+    #File Uploader
+    uploaded_file = st.file_uploader("Upload your zipped boundary file (shp,kml,geojson) to set the frame to your boundary!", type=["zip", "kml", "geojson", "json"])
+    load_boundary_button = st.button("Load boundary to map")
+
+    if load_boundary_button:
+        if uploaded_file is not None:
+            # Browsers report different content types for the same file, so go by the extension
+            file_name = uploaded_file.name.lower()
+            if file_name.endswith((".geojson", ".json")):
+                st.session_state.uploaded_boundary = json.load(uploaded_file)
+            elif file_name.endswith(".kml"):
+                try:
+                    st.session_state.uploaded_boundary = kml_to_geojson(uploaded_file)
+                except ValueError as e:
+                    st.error(str(e))
+            elif file_name.endswith(".zip"):
+                st.session_state.uploaded_boundary = shapefile_to_geojson(uploaded_file)
+            else:
+                st.error("Unsupported file format. Please upload a GeoJSON, KML, or Shapefile.")
+                
+            st.session_state.boundary_updated = True
+
+# Calculate the bounding box of the saved polygons
+def get_polygon_bounds(polygon_features):
+    polygons = [shapely_shape(feature['geometry']) for feature in polygon_features if feature['geometry']['type'] == 'Polygon']
+    if not polygons:
+        return None
+
+    multipolygon = MultiPolygon(polygons)
+    return multipolygon.bounds
+
+def get_uploaded_boundary_bounds(uploaded_boundary):
+    if not uploaded_boundary:
+        return None
+
+    features = uploaded_boundary["features"]
+    polygons = [shapely_shape(feature['geometry']) for feature in features if feature['geometry']['type'] in ['Polygon', 'MultiPolygon']]
+    if not polygons:
+        return None
+
+    multipolygon = MultiPolygon(polygons)
+    return multipolygon.bounds
+
+# Set the map's initial location and zoom level based on the saved polygons or uploaded boundary
+if 'saved_geography' in st.session_state:
+    bounds = get_polygon_bounds(st.session_state.saved_geography)
+elif st.session_state.uploaded_boundary:
+    bounds = get_uploaded_boundary_bounds(st.session_state.uploaded_boundary)
+else:
+    bounds = None
+
+if bounds:
+    min_lon, min_lat, max_lon, max_lat = bounds
+    center_lat = (min_lat + max_lat) / 2
+    center_lon = (min_lon + max_lon) / 2
+    location = [center_lat, center_lon]
+    zoom_start = 15
+else:
+        location = [36.1256, -97.0665]
+        zoom_start = 10
+
+m = folium.Map(
+    location=location,
+    zoom_start=zoom_start,
+    tiles="https://mt1.google.com/vt/lyrs=y@18&x={x}&y={y}&z={z}",
+    attr="Google"
+)
+
+# Customize the options for the Draw plugin
+draw_options = {
+    "position": "topleft",
+    "polyline": False,
+    "circle": False,
+    "rectangle": False,
+    "polygon": False,
+    "circlemarker": False,
+    "marker": False,
+}
+
+draw_control = Draw(export=False, draw_options=draw_options)
+draw_control.add_to(m)
+
+# Check if there is a polygon saved in the session state
+if 'saved_geography' in st.session_state:
+    # Add the saved polygons to the map
+    for feature in st.session_state.saved_geography:
+        if feature['geometry']['type'] == 'Polygon':
+            polygon = folium.GeoJson(
+                data=feature,
+                style_function=lambda x: {"fillColor": "blue", "color": "blue", "weight": 1, "fillOpacity": 0.3}
+            )
+            polygon.add_to(m)
+
+if st.session_state.uploaded_boundary:
+    uploaded_boundary = folium.GeoJson(
+        data=st.session_state.uploaded_boundary,
+        style_function=lambda x: {"fillColor": "green", "color": "green", "weight": 1, "fillOpacity": 0.3}
+    )
+    uploaded_boundary.add_to(m)
+
+# Display the map in the first column
+col1, col2 = st.columns(2)
+
+with col1:
+    st_folium(m, width='100%', height=750)
+
+# Add the 'Make Data' button
+with col2:
+    # Get the user's selected crop
+    sorted_crops_dict = OrderedDict(sorted(CROP_IDS.items()))
+    selected_crop_name = st.selectbox("Select a crop:", list(sorted_crops_dict.keys()))
+
+    # Get the hybrid or variety name
+    variety_name = st.text_input("Enter a hybrid/variety:", value="")
+
+    # Define planting date
+    selected_date = st.date_input("Planting date:", value=None)
+
+    # Display the slider for seeding rate adjustment
+    seeding_rate_input = st.slider(
+        "Seeding rate adjustment (%)",
+        min_value=-100,
+        max_value=300,
+        value=0,
+        step=1,
+    )
+    seeding_rate_adjustment = (seeding_rate_input + 100) / 100
+    
+    #You have no boundary warn
+    if ('uploaded_boundary' not in st.session_state or st.session_state.uploaded_boundary is None) and \
+    ('saved_geography' not in st.session_state or not any(feature['geometry']['type'] in ['Polygon', 'MultiPolygon'] for feature in st.session_state.saved_geography)):
+        st.warning("Please add a boundary to continue. Read instructions for more information.")
+        
+
+    if ('uploaded_boundary' in st.session_state and st.session_state.uploaded_boundary is not None) or \
+    ('saved_geography' in st.session_state and any(feature['geometry']['type'] in ['Polygon', 'MultiPolygon'] for feature in st.session_state.saved_geography)):
+        uploaded_boundary_gdf = get_uploaded_boundary_gdf(st.session_state.uploaded_boundary)
+        if uploaded_boundary_gdf is not None:
+            field_multipolygon = unary_union(uploaded_boundary_gdf.geometry)
+            field_centroid = field_multipolygon.representative_point()
+
+        else:
+            field_multipolygon = unary_union([shapely_shape(feature['geometry']) for feature in st.session_state.saved_geography if feature['geometry']['type'] in ['Polygon', 'MultiPolygon']])
+            field_centroid = field_multipolygon.representative_point()
+
+        if st.button("Make Data"):
+            if selected_crop_name and variety_name:
+                with st.spinner("Creating your as-planted file. Please be patient, this will take a couple minutes."):
+                    # call make_as_planted function with all the arguments
+                    st.session_state.new_as_planted_zip = make_as_planted(field_multipolygon, selected_crop_name, variety_name, seeding_rate_adjustment, selected_date)
+
+                if st.session_state.new_as_planted_zip:
+                    st.success("Congratulations, your new as-planted file has been made successfully!")
+            else:
+                st.warning("Please input your variety before proceeding.")
+
+    if st.session_state.new_as_planted_zip:
+        st.download_button("Download Shapefile", st.session_state.new_as_planted_zip, "AsPlanted_Shapefile.zip")
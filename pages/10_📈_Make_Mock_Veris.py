@@ -4,9 +4,9 @@ from streamlit_folium import st_folium
 from shapely.geometry import Point, Polygon, MultiPolygon, shape as shapely_shape
 from shapely.ops import unary_union
 import geopandas as gpd
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
+import os
+from datetime import datetime
+from geomaker.veris import survey_points, iter_veris_chunks, make_veris_file
 
 st.set_page_config(page_title="Geomaker - Veris Data Generator", page_icon="📈", layout="wide")
 
@@ -17,8 +17,11 @@ if 'uploaded_boundary' not in st.session_state:
 if 'saved_geography' not in st.session_state:
     st.session_state.saved_geography = None
 
-if 'veris_data' not in st.session_state:
-    st.session_state.veris_data = None
+if 'veris_preview' not in st.session_state:
+    st.session_state.veris_preview = None
+
+if 'veris_path' not in st.session_state:
+    st.session_state.veris_path = None
 
 # Title
 st.title("📈 Make Mock Veris Data")
@@ -53,29 +56,6 @@ def get_field_boundary():
             return field_multipolygon
     return None
 
-def generate_grid_points(boundary, point_spacing_degrees):
-    minx, miny, maxx, maxy = boundary.bounds
-
-    # Generate grid coordinates using numpy
-    x_coords = np.arange(minx, maxx, point_spacing_degrees)
-    y_coords = np.arange(miny, maxy, point_spacing_degrees)
-    xx, yy = np.meshgrid(x_coords, y_coords)
-    grid_points = np.c_[xx.ravel(), yy.ravel()]
-
-    # Create a GeoDataFrame of points
-    points_gdf = gpd.GeoDataFrame(geometry=gpd.points_from_xy(grid_points[:, 0], grid_points[:, 1]), crs="EPSG:4326")
-
-    # Create a GeoDataFrame for the boundary
-    boundary_gdf = gpd.GeoDataFrame(geometry=[boundary], crs="EPSG:4326")
-
-    # Use spatial join to keep only points within the boundary
-    points_within_boundary = gpd.sjoin(points_gdf, boundary_gdf, predicate='within', how='inner')
-
-    # Extract points
-    points = points_within_boundary.geometry.tolist()
-
-    return points
-
 # Get the field boundary
 field_boundary = get_field_boundary()
 
@@ -110,9 +90,12 @@ with col2:
     survey_date = st.date_input("Survey Date", value=datetime.today())
     survey_start_time = st.time_input("Survey Start Time", value=datetime.now().time())
     survey_speed = st.number_input("Survey Speed (meters/second)", min_value=0.1, max_value=10.0, value=5.0)
+    swath_width = st.number_input("Swath Width (meters)", min_value=1.0, max_value=100.0, value=15.0)
     ec_shallow_range = st.slider("EC Shallow Measurement Range (mS/m)", min_value=0.0, max_value=100.0, value=(5.0, 50.0))
     ec_deep_range = st.slider("EC Deep Measurement Range (mS/m)", min_value=0.0, max_value=200.0, value=(10.0, 100.0))
     ph_range = st.slider("pH Measurement Range", min_value=4.0, max_value=8.5, value=(5.5, 7.5))
+    correlation_length = st.number_input("Correlation Length (meters)", min_value=5.0, max_value=2000.0, value=100.0, help="Typical distance over which soil measurements stay similar. Larger values give broader zones.")
+    ec_correlation = st.slider("EC Shallow / EC Deep Correlation", min_value=-1.0, max_value=1.0, value=0.8, step=0.05)
 
 # Display the map
 with col1:
@@ -128,55 +111,46 @@ if st.button("Make Veris Data"):
             # Estimate point spacing based on survey speed (meters per second) and desired time interval (1 second)
             point_spacing_meters = survey_speed  # Assuming one point per second
 
-            # Convert point spacing from meters to degrees (approximate)
-            # 1 degree ≈ 111,320 meters
-            point_spacing_degrees = point_spacing_meters / 111320
-
-            # Generate grid points within the field boundary
-            points = generate_grid_points(boundary, point_spacing_degrees)
+            # Generate grid points within the field boundary, spaced in meters in the field's UTM zone
+            # and ordered along back-and-forth passes one swath width apart
+            x, y, utm_crs = survey_points(boundary, point_spacing_meters, swath_width)
 
             # Log number of points generated
-            st.write(f"Number of points generated: {len(points)}")
+            st.write(f"Number of points generated: {len(x)}")
 
             # Check if points were generated
-            if len(points) == 0:
+            if len(x) == 0:
                 st.error("No sampling points were generated within the field boundary. Please check the boundary and parameters.")
             else:
-                # Create DataFrame
+                # Generate the table in chunks and format them into the .dat file one at a time,
+                # with smoothly varying, spatially correlated measurements instead of independent draws per point
                 start_datetime = datetime.combine(survey_date, survey_start_time)
-                timestamps = [start_datetime + timedelta(seconds=i) for i in range(len(points))]
-                data = {
-                    'Latitude': [pt.y for pt in points],
-                    'Longitude': [pt.x for pt in points],
-                    'EC Shallow': np.random.uniform(ec_shallow_range[0], ec_shallow_range[1], len(points)),
-                    'EC Deep': np.random.uniform(ec_deep_range[0], ec_deep_range[1], len(points)),
-                    'pH': np.random.uniform(ph_range[0], ph_range[1], len(points)),
-                    'Date': [dt.strftime('%Y-%m-%d') for dt in timestamps],
-                    'Time': [dt.strftime('%H:%M:%S') for dt in timestamps]
-                }
-
-                veris_df = pd.DataFrame(data)
-                st.session_state.veris_data = veris_df
-
-                st.success("Veris data generated successfully!")
+                chunks = iter_veris_chunks(x, y, utm_crs, start_datetime, ec_shallow_range, ec_deep_range, ph_range, correlation_length, ec_correlation)
+
+                veris_path, veris_rows, veris_preview = make_veris_file(chunks)
+
+                # The .dat file stays on disk; only its path and a small preview are kept in the session
+                if st.session_state.veris_path is not None and os.path.exists(st.session_state.veris_path):
+                    os.remove(st.session_state.veris_path)
+                st.session_state.veris_path = veris_path
+                st.session_state.veris_preview = veris_preview
+
+                st.success(f"Veris data generated successfully! {veris_rows:,} rows written.")
 
     else:
         st.error("No field boundary found. Please use the **✏️ Draw a Field** page to create and save your field boundary before generating Veris data.")
 
 # Show generated data and download option
-if st.session_state.veris_data is not None:
+if st.session_state.veris_path is not None and os.path.exists(st.session_state.veris_path):
     st.header("Generated Veris Data Preview")
-    st.dataframe(st.session_state.veris_data.head())
-
-    # Download button
-    def convert_df(df):
-        return df.to_csv(index=False, sep='\t').encode('utf-8')
-
-    veris_dat = convert_df(st.session_state.veris_data)
-
-    st.download_button(
-        label="Download Veris .dat File",
-        data=veris_dat,
-        file_name='veris_data.dat',
-        mime='text/plain',
-    )
+    st.dataframe(st.session_state.veris_preview)
+
+    # The file is only read into memory when a download is asked for, not on every rerun of the page
+    if st.button("Prepare Veris .dat Download"):
+        with open(st.session_state.veris_path, 'rb') as veris_file:
+            st.download_button(
+                label="Download Veris .dat File",
+                data=veris_file,
+                file_name='veris_data.dat',
+                mime='text/plain',
+            )
@@ -1,7 +1,9 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib  # Ensure this is imported for colormap
+from geomaker.rx import TARGET_METHODS, TARGET_UNITS, target_product, target_value, scale_rates, read_rx_layer, rate_columns
+from geomaker.export import write_shapefile_zip
+from geomaker.heatmap import heatmap_image, side_by_side_image, difference_grid, difference_limits, value_limits, legend_html, polygon_raster, polygon_grid
 
 # Title and description
 st.title("🌾 Dynamic Fertilizer Rate Adjustment Tool")
@@ -13,25 +15,60 @@ with st.expander("ℹ️ How This Tool Works"):
     st.markdown(
         """
         ### How to Use This Tool
-        1. **Review the Original Fertilizer Rates**: The initial 10x10 grid shows the default fertilizer rates for each cell.
+        1. **Review the Original Fertilizer Rates**: The initial 10x10 grid shows the default fertilizer rates for each one-acre cell. Upload a zipped Rx shapefile of zone or grid polygons to edit a real prescription instead; every total is then weighted by each polygon's area.
         2. **Set Your Adjustment Target**: Choose a scaling method and enter your desired target value.
-        3. **Select the Scaling Approach**: Currently, only "Equal Scaling" is available. "Bell Curve Scaling" is coming soon! 🚀
+        3. **Select the Scaling Approach**: "Equal Scaling" multiplies every rate by the same factor. "Bell Curve Scaling" reshapes the rates into a bell curve around the field mean first: a spread below 1 pulls rates toward the mean, above 1 pushes them apart.
         4. **Set Minimum and Maximum Rates**: Specify the minimum and maximum allowable rates to enforce constraints.
-        5. **Apply Adjustments**: Click the "Apply Adjustments" button to adjust the rates based on your inputs.
+        5. **Apply Adjustments**: Click the "Apply Adjustments" button to adjust the rates based on your inputs. The tabs then show the original and adjusted rates on one color scale, side by side, and the difference between them.
 
         ### What Happens Behind the Scenes
-        - The tool iteratively adjusts the fertilizer rates to meet your target value.
-        - It applies scaling factors while respecting the minimum and maximum rate constraints.
-        - The process continues until the target is achieved within a small tolerance or no further adjustments can be made.
-
-        ### Note
-        - The "Bell Curve Scaling" option is not yet available. Stay tuned! 🚧
+        - Every target is converted to a total amount of product.
+        - The tool solves directly for the single scaling factor that hits that total once every rate is clipped to the minimum and maximum rates.
+        - Any target between "every cell at the minimum" and "every cell at the maximum" is met exactly; targets outside that range are reported as unreachable.
+        - With Bell Curve Scaling every cell keeps its rank, but the rates follow a normal distribution with the chosen spread before they are scaled to the target.
         """
     )
 
 # Initialize a 10x10 grid with values from null to 100
 if 'grid_data' not in st.session_state:
     st.session_state.grid_data = np.random.choice([None] + list(range(0, 101)), size=(10, 10))
+if 'rx_layer' not in st.session_state:
+    st.session_state.rx_layer = None
+    st.session_state.rx_acres = None
+    st.session_state.rx_layer_id = None
+    st.session_state.rx_raster = None
+
+# Prescription source: the demo grid (one acre per cell) or a real Rx shapefile
+rx_source = st.radio("Prescription source:", ["Demo 10x10 grid", "Upload an Rx shapefile (.zip)"], horizontal=True)
+rx_layer = None
+if rx_source.startswith("Upload"):
+    rx_file = st.file_uploader("Upload a zipped Rx shapefile of zone or grid polygons", type=["zip"])
+    if rx_file is None:
+        st.session_state.rx_layer = None
+        st.session_state.rx_layer_id = None
+    elif rx_file.file_id != st.session_state.rx_layer_id:
+        # Read each upload and measure its polygons once
+        try:
+            st.session_state.rx_layer, st.session_state.rx_acres = read_rx_layer(rx_file)
+            # Which polygon lies under each heatmap cell; redrawing new rates is then a single lookup
+            st.session_state.rx_raster = polygon_raster(st.session_state.rx_layer.geometry.values)
+        except ValueError as e:
+            st.session_state.rx_layer = None
+            st.error(str(e))
+        except Exception as e:
+            # Damaged zips, missing .shp/.dbf members and unreadable attributes come from the readers
+            st.session_state.rx_layer = None
+            st.error(f"Failed to read the prescription shapefile: {e}")
+        st.session_state.rx_layer_id = rx_file.file_id
+    rx_layer = st.session_state.rx_layer
+    if rx_layer is None:
+        st.info("Upload a prescription shapefile to edit it.")
+        st.stop()
+    rate_column_options = rate_columns(rx_layer)
+    if not rate_column_options:
+        st.error("The prescription file has no numeric rate column.")
+        st.stop()
+    rate_column = st.selectbox("Rate column:", rate_column_options)
 
 # Convert the grid data to a DataFrame
 grid_df = pd.DataFrame(
@@ -40,39 +77,39 @@ grid_df = pd.DataFrame(
     index=[f'Row {i+1}' for i in range(10)]
 )
 
-# Handle NaN values for styling
-def format_value(x):
-    if pd.isna(x) or x == 0:
-        return ""
-    else:
-        return "{:.2f}".format(x)
-
-# Fill NaN values with zero for gradient calculation
-grid_df_for_style = grid_df.fillna(0)
-
-# Calculate vmin and vmax for the color scale
-vmin = 0   # Minimum possible value
-vmax = 100 # Maximum possible value
-
-# Display the initial grid as a dataframe with color scaling
+# Display the initial rates
 st.subheader("🌱 Original Fertilizer Rates (lbs/acre)")
 
-# Apply styling and display using st.markdown
-styled_grid_df = grid_df_for_style.style.background_gradient(
-    cmap='RdYlGn', vmin=vmin, vmax=vmax
-).format(format_value, na_rep="")
-st.markdown(styled_grid_df.to_html(), unsafe_allow_html=True)
-
-# Flatten and drop null and zero values
-valid_values = grid_df.stack()
-valid_values = valid_values[~valid_values.isnull() & (valid_values != 0)]
-valid_values = valid_values.astype(float)  # Ensure values are float for calculations
+if rx_layer is None:
+    # Null and zero cells have no rate and are drawn transparent
+    original_grid = grid_df.to_numpy(dtype=float, copy=True)
+    original_grid[original_grid == 0] = np.nan
 
-# Calculate and display current default values
-current_total_product = valid_values.sum()
+    # Flatten and drop null and zero values; every grid cell is one acre
+    valid_values = grid_df.stack()
+    valid_values = valid_values[~valid_values.isnull() & (valid_values != 0)]
+    valid_values = valid_values.astype(float)  # Ensure values are float for calculations
+    acres_per_cell = np.ones(len(valid_values))
+else:
+    # Polygons with a rate are adjusted; null and zero rates are left as they are
+    rx_rates = pd.to_numeric(rx_layer[rate_column], errors='coerce')
+    rx_valid = (rx_rates.notna() & (rx_rates != 0)).to_numpy()
+    valid_values = rx_rates[rx_valid].astype(float)
+    acres_per_cell = st.session_state.rx_acres[rx_valid]
+    original_grid = polygon_grid(st.session_state.rx_raster, rx_rates.where(rx_valid).to_numpy(dtype=float))
+    st.write(f"{len(rx_layer):,} polygons, {st.session_state.rx_acres.sum():,.1f} acres ({acres_per_cell.sum():,.1f} acres with a rate).")
+    st.dataframe(pd.DataFrame({'Rate': valid_values.to_numpy(), 'Acres': acres_per_cell}).describe().T, use_container_width=True)
+
+# Draw the rates as one colormapped image rather than a styled HTML cell per value
+original_limits = value_limits(original_grid)
+st.image(heatmap_image(original_grid, *original_limits))
+st.markdown(legend_html(*original_limits, "lbs/acre"), unsafe_allow_html=True)
+
+# Calculate and display current default values, weighted by area
+current_total_product = float(np.dot(valid_values.to_numpy(), acres_per_cell))
 cost_per_pound = 10  # Cost per pound of product (urea)
 current_total_cost = current_total_product * cost_per_pound
-current_avg_rate = current_total_product / len(valid_values)  # Average rate excluding null values
+current_avg_rate = current_total_product / acres_per_cell.sum()  # Average rate excluding null values
 
 st.markdown(
     f"""### 📊 Current Default Values
@@ -84,20 +121,22 @@ st.markdown(
 )
 
 # User input for adjustment targets
-scaling_method = st.selectbox("Select Scaling Method", [
-    "Total Product (urea):",
-    "Total Cost:",
-    "Average Rate per Acre:",
-    "Spend Per Acre (dollars per acre):"
-])
+scaling_method = st.selectbox("Select Scaling Method", TARGET_METHODS)
 adjustment_value = st.number_input(f"Enter Desired Value for {scaling_method}", min_value=0.0, step=1.0)
 
 # Scaling Approach
 scaling_approach = st.selectbox(
     "Select Scaling Approach",
-    ["Equal Scaling"],  # Only "Equal Scaling" is available
-    help="Bell Curve Scaling is coming soon! 🚧"
+    ["Equal Scaling", "Bell Curve Scaling"],
+    help="Bell Curve Scaling reshapes the rates into a bell curve around the field mean before scaling them to the target."
 )
+if scaling_approach == "Bell Curve Scaling":
+    spread = st.slider(
+        "Spread (x current standard deviation)", min_value=0.0, max_value=2.0, value=0.5, step=0.05,
+        help="Below 1 pulls rates toward the field mean; above 1 pushes them away from it."
+    )
+else:
+    spread = None
 
 # Min/Max Inputs (Optional)
 min_rate = st.number_input(
@@ -111,234 +150,95 @@ max_rate = st.number_input(
 if st.button("Apply Adjustments"):
     # Define tolerance level
     tolerance = 1e-2  # Adjust as needed
+    if min_rate > max_rate:
+        st.error("The minimum rate must not be above the maximum rate.")
+        st.stop()
 
-    # Initialize variables
-    locked_mask = pd.Series(False, index=valid_values.index)
-    iteration = 0
-    max_iterations = 100  # To prevent infinite loops
-
-    epsilon = 1e-6  # For floating-point comparison
-
-    while iteration < max_iterations:
-        iteration += 1
-
-        # Exclude locked cells using the mask
-        adjustable_values = valid_values[~locked_mask]
-
-        # Check if there are adjustable cells left
-        if adjustable_values.empty:
-            break
-
-        # Recalculate totals for adjustable cells
-        total_area = len(adjustable_values)
-        current_total_product = adjustable_values.sum()
-        current_avg_rate = current_total_product / total_area
-
-        # Recalculate the adjustment factor
-        if scaling_method == "Total Product (urea):":
-            total_current = valid_values.sum()
-            total_adjustable = adjustable_values.sum()
-            remaining_adjustment = adjustment_value - total_current
-            adjustment_factor = (remaining_adjustment / (total_adjustable + epsilon)) + 1
-            unit = "lbs"
-            intended_value = adjustment_value
-
-        elif scaling_method == "Total Cost:":
-            total_current = valid_values.sum() * cost_per_pound
-            total_adjustable = adjustable_values.sum() * cost_per_pound
-            remaining_adjustment = adjustment_value - total_current
-            adjustment_factor = (remaining_adjustment / (total_adjustable + epsilon)) + 1
-            unit = "$"
-            intended_value = adjustment_value
-
-        elif scaling_method == "Average Rate per Acre:":
-            total_current = valid_values.mean()
-            total_adjustable = adjustable_values.mean()
-            remaining_adjustment = adjustment_value - total_current
-            adjustment_factor = (remaining_adjustment / (total_adjustable + epsilon)) + 1
-            unit = "lbs/acre"
-            intended_value = adjustment_value
-
-        elif scaling_method == "Spend Per Acre (dollars per acre):":
-            total_current = (valid_values.sum() * cost_per_pound) / len(valid_values)
-            total_adjustable = (adjustable_values.sum() * cost_per_pound) / len(adjustable_values)
-            remaining_adjustment = adjustment_value - total_current
-            adjustment_factor = (remaining_adjustment / (total_adjustable + epsilon)) + 1
-            unit = "$/acre"
-            intended_value = adjustment_value
-
-        else:
-            st.error("Unknown scaling method selected.")
-            break
-
-        # Apply Scaling
-        if scaling_approach == "Equal Scaling":
-            adjusted_values = adjustable_values * adjustment_factor
-        else:
-            st.warning("Bell Curve Scaling is not available yet.")
-            break
-
-        # Enforce Min/Max Constraints
-        adjusted_values_clipped = adjusted_values.clip(lower=min_rate, upper=max_rate)
-
-        # Identify newly locked cells using epsilon
-        newly_locked = (
-            ((adjusted_values_clipped - min_rate).abs() < epsilon) |
-            ((adjusted_values_clipped - max_rate).abs() < epsilon)
-        ) & (~locked_mask.loc[adjusted_values_clipped.index])
-
-        # Update locked mask
-        locked_mask.loc[newly_locked.index] = True
-
-        # Update valid_values with adjusted values
-        valid_values.loc[adjusted_values_clipped.index] = adjusted_values_clipped
-
-        # Calculate the adjusted total based on the scaling method
-        if scaling_method == "Total Product (urea):":
-            adjusted_total = valid_values.sum()
-        elif scaling_method == "Total Cost:":
-            adjusted_total = valid_values.sum() * cost_per_pound
-        elif scaling_method == "Average Rate per Acre:":
-            adjusted_total = valid_values.mean()
-        elif scaling_method == "Spend Per Acre (dollars per acre):":
-            adjusted_total = (valid_values.sum() * cost_per_pound) / len(valid_values)
-        else:
-            st.error("Unknown scaling method selected.")
-            break
-
-        difference = adjusted_total - intended_value
-
-        # Display the difference in human-readable text after the first iteration
-        if iteration == 1:
-            st.markdown(
-                f"**After the first iteration:**\n\n"
-                f"- Intended Value: {intended_value:.2f} {unit}\n"
-                f"- Actual Value: {adjusted_total:.2f} {unit}\n"
-                f"- Difference: {difference:.2f} {unit}\n"
-            )
-
-        # Check if the adjusted total is within the tolerance
-        if abs(difference) <= tolerance:
-            break
-
-        # Optionally, add a check for no significant change
-        if abs(adjustment_factor - 1) < epsilon:
-            break
-
-    # **Distribute the Remaining Difference**
-
-    if abs(difference) > tolerance:
-        adjustment_iteration = 0
-        max_adjustment_iterations = 10  # Prevent infinite loops
-
-        while abs(difference) > tolerance and adjustment_iteration < max_adjustment_iterations:
-            adjustment_iteration += 1
-
-            # Recalculate adjustable values
-            adjustable_values = valid_values[~locked_mask]
-            if adjustable_values.empty:
-                break
-
-            # Sum of adjustable values
-            sum_adjustable_values = adjustable_values.sum()
-
-            if sum_adjustable_values == 0:
-                break  # Cannot adjust further
-
-            # Calculate adjustment ratios
-            adjustment_ratios = adjustable_values / sum_adjustable_values
-
-            # Total difference to distribute
-            total_difference = intended_value - adjusted_total  # Positive if we need to increase values
-
-            # Adjust each value proportionally
-            adjusted_values_final = adjustable_values + adjustment_ratios * total_difference
-
-            # Enforce Min/Max Constraints
-            adjusted_values_final_clipped = adjusted_values_final.clip(lower=min_rate, upper=max_rate)
-
-            # Identify newly locked cells due to min/max constraints
-            newly_locked = (
-                ((adjusted_values_final_clipped - min_rate).abs() < epsilon) |
-                ((adjusted_values_final_clipped - max_rate).abs() < epsilon)
-            ) & (~locked_mask.loc[adjusted_values_final_clipped.index])
-
-            # Update locked_mask
-            locked_mask.loc[newly_locked.index] = True
-
-            # Update valid_values with final adjusted values
-            valid_values.loc[adjusted_values_final_clipped.index] = adjusted_values_final_clipped
-
-            # Recalculate the adjusted total
-            if scaling_method == "Total Product (urea):":
-                adjusted_total = valid_values.sum()
-            elif scaling_method == "Total Cost:":
-                adjusted_total = valid_values.sum() * cost_per_pound
-            elif scaling_method == "Average Rate per Acre:":
-                adjusted_total = valid_values.mean()
-            elif scaling_method == "Spend Per Acre (dollars per acre):":
-                adjusted_total = (valid_values.sum() * cost_per_pound) / len(valid_values)
-
-            difference = adjusted_total - intended_value
-
-            # If no more cells can be adjusted, break
-            if not newly_locked.any():
-                break
-
-        st.markdown(
-            f"**After adjusting remaining values:**\n\n"
-            f"- Intended Value: {intended_value:.2f} {unit}\n"
-            f"- Actual Value: {adjusted_total:.2f} {unit}\n"
-            f"- New Difference: {difference:.2f} {unit}\n"
-            f"- Adjustment Iterations: {adjustment_iteration}"
-        )
+    # Every target is a total of product; solve for the scale factor that reaches it under min/max clipping
+    intended_value = adjustment_value
+    unit = TARGET_UNITS[scaling_method]
+    target = target_product(scaling_method, adjustment_value, cost_per_pound, acres_per_cell.sum())
+
+    # Apply Scaling; bell curve scaling reshapes the rates around the mean with the chosen spread first
+    adjusted_rates, scale_factor, reachable = scale_rates(valid_values.to_numpy(), acres_per_cell, target, min_rate, max_rate, spread)
+    valid_values = pd.Series(adjusted_rates, index=valid_values.index)
+
+    adjusted_total = target_value(scaling_method, adjusted_rates, acres_per_cell, cost_per_pound)
+    difference = adjusted_total - intended_value
 
-    # Update the DataFrame with adjusted values
-    adjusted_grid_df = grid_df.copy()
+    if rx_layer is None:
+        # Update the DataFrame with adjusted values
+        adjusted_grid_df = grid_df.copy()
 
-    # Unstack the adjusted values back into the grid format
-    adjusted_values_unstacked = valid_values.unstack()
+        # Unstack the adjusted values back into the grid format
+        adjusted_values_unstacked = valid_values.unstack()
 
-    # Update adjusted_grid_df only at the positions of adjusted_values_unstacked
-    adjusted_grid_df.update(adjusted_values_unstacked)
+        # Update adjusted_grid_df only at the positions of adjusted_values_unstacked
+        adjusted_grid_df.update(adjusted_values_unstacked)
 
-    # Handle NaN values for styling
-    adjusted_grid_df_for_style = adjusted_grid_df.fillna(0)
+        adjusted_grid = adjusted_grid_df.to_numpy(dtype=float, copy=True)
+        adjusted_grid[adjusted_grid == 0] = np.nan
+    else:
+        adjusted_layer_rates = np.full(len(rx_layer), np.nan)
+        adjusted_layer_rates[rx_valid] = adjusted_rates
+        adjusted_grid = polygon_grid(st.session_state.rx_raster, adjusted_layer_rates)
 
-    # Display the original and adjusted grids using tabs
+    # Display the original and adjusted rates on one color scale, next to each other, and their difference
     st.subheader("📊 Fertilizer Rates Comparison")
-    tab1, tab2 = st.tabs(["Original Rates", "Adjusted Rates"])
+    comparison_limits = value_limits(original_grid, adjusted_grid)
+    rate_difference = difference_grid(original_grid, adjusted_grid)
+    difference_scale = difference_limits(rate_difference)
+    tab1, tab2, tab3, tab4 = st.tabs(["Original Rates", "Adjusted Rates", "Side by Side", "Difference"])
 
     with tab1:
-        # Apply styling and display the original grid
-        styled_grid_df = grid_df_for_style.style.background_gradient(
-            cmap='RdYlGn', vmin=vmin, vmax=vmax
-        ).format(format_value, na_rep="")
-        st.markdown(styled_grid_df.to_html(), unsafe_allow_html=True)
+        st.image(heatmap_image(original_grid, *comparison_limits))
+        st.markdown(legend_html(*comparison_limits, "lbs/acre"), unsafe_allow_html=True)
 
     with tab2:
-        # Apply styling and display the adjusted grid
-        styled_adjusted_grid_df = adjusted_grid_df_for_style.style.background_gradient(
-            cmap='RdYlGn', vmin=vmin, vmax=vmax
-        ).format(format_value, na_rep="")
-        st.markdown(styled_adjusted_grid_df.to_html(), unsafe_allow_html=True)
-
-    # Summary Statistics After Adjustment
-    adjusted_total_product = valid_values.sum()
+        st.image(heatmap_image(adjusted_grid, *comparison_limits))
+        st.markdown(legend_html(*comparison_limits, "lbs/acre"), unsafe_allow_html=True)
+
+    with tab3:
+        st.image(side_by_side_image([original_grid, adjusted_grid], *comparison_limits), caption="Original (left) and adjusted (right)")
+        st.markdown(legend_html(*comparison_limits, "lbs/acre"), unsafe_allow_html=True)
+
+    with tab4:
+        # Red cells were cut, green cells were raised
+        st.image(heatmap_image(rate_difference, *difference_scale), caption="Adjusted minus original")
+        st.markdown(legend_html(*difference_scale, "lbs/acre"), unsafe_allow_html=True)
+
+    if rx_layer is not None:
+        # Compare the rate distributions and export the adjusted prescription
+        st.dataframe(
+            pd.DataFrame({'Original Rates': rx_rates[rx_valid].to_numpy(dtype=float), 'Adjusted Rates': adjusted_rates}).describe().T,
+            use_container_width=True,
+        )
+        adjusted_layer = rx_layer.copy()
+        adjusted_layer[rate_column] = rx_rates.astype(float)
+        adjusted_layer.loc[rx_valid, rate_column] = adjusted_rates
+        st.download_button(
+            "Download Adjusted Rx Shapefile",
+            write_shapefile_zip(adjusted_layer, "AdjustedRx"),
+            "AdjustedRx.zip",
+            "application/zip",
+        )
+
+    # Summary Statistics After Adjustment, weighted by area
+    adjusted_total_product = float(np.dot(adjusted_rates, acres_per_cell))
     adjusted_total_cost = adjusted_total_product * cost_per_pound
-    adjusted_avg_rate = adjusted_total_product / len(valid_values)
+    adjusted_avg_rate = adjusted_total_product / acres_per_cell.sum()
 
     st.markdown(
         f"""### 📈 Summary After Adjustment
         - **Total Product (urea)**: {adjusted_total_product:.2f} lbs
         - **Total Cost**: ${adjusted_total_cost:.2f}
         - **Average Rate per Acre**: {adjusted_avg_rate:.2f} lbs/acre
-        - **Iterations**: {iteration}
+        - **Scale Factor**: {scale_factor:.4f}
         """
     )
 
     # Display a friendly message
-    if abs(difference) <= tolerance:
+    if reachable and abs(difference) <= tolerance:
         st.success(f"🎉 The target value of {intended_value:.2f} {unit} has been achieved!")
     else:
         st.warning(
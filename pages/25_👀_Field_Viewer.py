@@ -271,9 +271,8 @@ def main():
             from shapely import wkt
             from shapely.geometry import mapping
             import folium
-            import tempfile
-            import os
             import zipfile
+            from geomaker.export import write_shapefile_zip
 
             fields_df = st.session_state['fields_df']
             # Explode the 'BoundaryWKTs' column into separate rows
@@ -348,26 +347,13 @@ def main():
 
                     # Export Shapefile button
                     if st.button("Download Grower Shapefile"):
-                        with tempfile.TemporaryDirectory() as tmpdir:
-                            shapefile_path = os.path.join(tmpdir, "grower_data.shp")
-                            gdf.to_file(shapefile_path, driver='ESRI Shapefile')
-
-                            # Create a zip file
-                            zip_path = os.path.join(tmpdir, "grower_data.zip")
-                            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                                for file_name in os.listdir(tmpdir):
-                                    if file_name.startswith("grower_data"):
-                                        file_path = os.path.join(tmpdir, file_name)
-                                        zipf.write(file_path, arcname=file_name)
-
-                            # Read the zip file and offer it for download
-                            with open(zip_path, 'rb') as f:
-                                st.download_button(
-                                    label="Download Grower Shapefile",
-                                    data=f.read(),
-                                    file_name="grower_data.zip",
-                                    mime="application/zip"
-                                )
+                        # Build the zipped shapefile in memory and offer it for download
+                        st.download_button(
+                            label="Download Grower Shapefile",
+                            data=write_shapefile_zip(gdf, "grower_data", zipfile.ZIP_DEFLATED),
+                            file_name="grower_data.zip",
+                            mime="application/zip"
+                        )
 
                 # Individual expanders for each field
                 for idx, row in gdf.iterrows():
@@ -400,32 +386,20 @@ def main():
 
                         # Export Shapefile button
                         if st.button(f"Download Shapefile for {field_name}", key=f"download_button_{idx}"):
-                            with tempfile.TemporaryDirectory() as tmpdir:
-                                shapefile_path = os.path.join(tmpdir, f"{field_name.replace(' ', '_')}.shp")
-                                field_gdf = gpd.GeoDataFrame(
-                                    [row[['Name', 'Measure', 'FarmName', 'geometry']]],
-                                    geometry='geometry',
-                                    crs='EPSG:4326'
-                                )
-                                field_gdf.to_file(shapefile_path, driver='ESRI Shapefile')
-
-                                # Create a zip file
-                                zip_path = os.path.join(tmpdir, f"{field_name.replace(' ', '_')}.zip")
-                                with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                                    for file_name in os.listdir(tmpdir):
-                                        if file_name.startswith(field_name.replace(' ', '_')):
-                                            file_path = os.path.join(tmpdir, file_name)
-                                            zipf.write(file_path, arcname=file_name)
-
-                                # Read the zip file and offer it for download
-                                with open(zip_path, 'rb') as f:
-                                    st.download_button(
-                                        label="Download Shapefile",
-                                        data=f.read(),
-                                        file_name=f"{field_name.replace(' ', '_')}.zip",
-                                        mime="application/zip",
-                                        key=f"download_field_{idx}"
-                                    )
+                            field_gdf = gpd.GeoDataFrame(
+                                [row[['Name', 'Measure', 'FarmName', 'geometry']]],
+                                geometry='geometry',
+                                crs='EPSG:4326'
+                            )
+
+                            # Build the zipped shapefile in memory and offer it for download
+                            st.download_button(
+                                label="Download Shapefile",
+                                data=write_shapefile_zip(field_gdf, field_name.replace(' ', '_'), zipfile.ZIP_DEFLATED),
+                                file_name=f"{field_name.replace(' ', '_')}.zip",
+                                mime="application/zip",
+                                key=f"download_field_{idx}"
+                            )
             else:
                 st.toast("No valid field geometries to display.", icon="ℹ️")
         else:
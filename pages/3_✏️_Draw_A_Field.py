@@ -7,11 +7,10 @@ from shapely.wkt import loads as load_wkt
 import json
 import tempfile
 from zipfile import ZipFile
-from io import BytesIO
 import os
-import fiona
 import simplekml
 import geopandas as gpd  # Ensure geopandas is installed
+from geomaker.export import write_shapefile_zip
 
 # Set page configuration
 st.set_page_config(page_title="Geomaker", page_icon="🌍", layout="wide")
@@ -38,28 +37,13 @@ def calculate_polygon_bounds(features):
 
 # Function to convert GeoJSON to Shapefile
 def convert_geojson_to_shapefile(features, filename):
-    with tempfile.TemporaryDirectory() as tmpdir:
-        schema = {
-            'geometry': 'Polygon',
-            'properties': {'id': 'int'},
-        }
-        shapefile_path = os.path.join(tmpdir, f"{filename}.shp")
-        with fiona.open(shapefile_path, 'w', driver='ESRI Shapefile', schema=schema, crs="EPSG:4326") as shp:
-            for idx, feature in enumerate(features):
-                geom = feature['geometry']
-                shp.write({
-                    'geometry': geom,
-                    'properties': {'id': idx},
-                })
-        # Zip the shapefile components
-        with BytesIO() as buffer:
-            with ZipFile(buffer, 'w') as zip_file:
-                for ext in ['.shp', '.shx', '.dbf', '.prj']:
-                    file_path = os.path.join(tmpdir, f"{filename}{ext}")
-                    if os.path.exists(file_path):
-                        zip_file.write(file_path, arcname=f"{filename}{ext}")
-            buffer.seek(0)
-            return buffer.read()
+    gdf = gpd.GeoDataFrame(
+        {'id': list(range(len(features)))},
+        geometry=[shape(feature['geometry']) for feature in features],
+        crs="EPSG:4326"
+    )
+    # Zip the shapefile components in memory
+    return write_shapefile_zip(gdf, filename)
 
 # Function to convert GeoJSON to KML
 def convert_geojson_to_kml(features, filename):
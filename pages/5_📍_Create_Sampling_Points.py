@@ -2,47 +2,36 @@ import streamlit as st
 import folium
 from streamlit_folium import st_folium
 from folium.plugins import Draw
-from shapely.geometry import Point, mapping, shape as shapely_shape, MultiPolygon
-import json
-import tempfile
-from io import BytesIO
-import fiona
-import os
+from shapely.geometry import shape as shapely_shape, MultiPolygon
+from shapely.ops import unary_union
+from geomaker.export import write_shapefile_zip
+from geomaker.sampling import points_from_features, grid_sample_points, point_features, read_points_layer, numeric_columns
+from geomaker.zones import zone_sample_points
 
 # Initialize session state variables
 if 'saved_geography' not in st.session_state:
     st.session_state.saved_geography = []
+if 'sampling_points' not in st.session_state:
+    st.session_state.sampling_points = None
+if 'generated_points' not in st.session_state:
+    st.session_state.generated_points = []
+if 'zone_layer' not in st.session_state:
+    st.session_state.zone_layer = None
+    st.session_state.zone_layer_id = None
+if 'zone_summary' not in st.session_state:
+    st.session_state.zone_summary = None
 
 st.set_page_config(page_title="Geomaker", page_icon="🌍", layout="wide")
 
 # Function to save drawn points to a shapefile
 def save_geojson_to_shapefile(all_drawings, filename):
-    with tempfile.TemporaryDirectory() as tmpdir:
-        # Define schema
-        schema = {
-            'geometry': 'Point',
-            'properties': [('Name', 'str'), ('SampleID', 'int')]
-        }
-
-        # Open a Fiona object
-        shapefile_filepath = os.path.join(tmpdir, f"{filename}.shp")
-        with fiona.open(shapefile_filepath, mode='w', driver='ESRI Shapefile', schema=schema, crs="EPSG:4326") as shp_file:
-            for idx, feature in enumerate(all_drawings):
-                if feature['geometry']['type'] == 'Point':
-                    point = Point(feature['geometry']['coordinates'])
-                    shape = {
-                        'geometry': mapping(point),
-                        'properties': {'Name': f"Sample {idx + 1}", 'SampleID': idx + 1}
-                    }
-                    shp_file.write(shape)
-
-        # Create a zip file containing the shapefile components
-        with BytesIO() as buffer:
-            with ZipFile(buffer, "w") as zip_file:
-                for extension in ["shp", "shx", "dbf", "prj"]:
-                    zip_file.write(os.path.join(tmpdir, f"{filename}.{extension}"), f"{filename}.{extension}")
-            buffer.seek(0)
-            return buffer.read()
+    gdf = points_from_features(all_drawings)
+
+    # Keep the points so the Make Mock Sample Results page can attach their geometry
+    st.session_state.sampling_points = gdf
+
+    # Write the shapefile components straight into a zip in memory
+    return write_shapefile_zip(gdf, filename)
 
 # Function to get bounds of saved polygons
 def get_polygon_bounds(polygon_features):
@@ -63,10 +52,78 @@ with st.expander("Click for instructions", expanded=False):
     💡 **Tip:** If you have saved a **boundary** on the **✏️ Draw a Field** page, it will be displayed on the map for easier reference. The map will be centered and zoomed to the field's location.
 
     1. **Find your field** on the map.
-    2. **Drop points** using the **Point** tool on the map.
+    2. **Drop points** using the **Point** tool on the map, lay out a sampling grid over your saved field with **Generate grid sample points**, or place points in management zones from a yield or Veris layer with **Generate zone sample points**.
     3. When finished, click **Save points to Shapefile** and download your resulting `.zip` containing your points.
     """)
 
+# Grid sampling over the saved field boundary
+with st.expander("Generate grid sample points", expanded=False):
+    if st.session_state.saved_geography:
+        grid_col1, grid_col2, grid_col3 = st.columns(3)
+        with grid_col1:
+            cell_acres = st.selectbox("Grid cell size (acres):", [1.0, 2.5, 5.0, 10.0], index=1)
+        with grid_col2:
+            placement = st.radio("Point in each cell:", ["Centroid", "Random"], horizontal=True)
+        with grid_col3:
+            grid_seed = st.number_input("Random seed:", min_value=0, value=42, step=1)
+
+        generate_col, clear_col = st.columns(2)
+        with generate_col:
+            if st.button("Generate grid points"):
+                field_polygon = unary_union([shapely_shape(feature['geometry']) for feature in st.session_state.saved_geography if feature['geometry']['type'] in ['Polygon', 'MultiPolygon']])
+                grid_points = grid_sample_points(field_polygon, cell_acres, placement.lower(), int(grid_seed))
+                st.session_state.generated_points = point_features(grid_points)
+                st.session_state.zone_summary = None
+        with clear_col:
+            if st.button("Clear generated points", disabled=not st.session_state.generated_points):
+                st.session_state.generated_points = []
+                st.session_state.zone_summary = None
+        if st.session_state.generated_points:
+            st.write(f"{len(st.session_state.generated_points)} points generated. They are saved along with any points you drop.")
+    else:
+        st.info("Save a boundary on the ✏️ Draw a Field page to generate grid sample points.")
+
+# Zone sampling from a yield, Veris or EC layer
+with st.expander("Generate zone sample points", expanded=False):
+    zone_file = st.file_uploader("Upload a Veris .dat file or a zipped yield/EC points shapefile", type=["dat", "txt", "csv", "zip"], key="zone_file")
+    if zone_file is None:
+        st.session_state.zone_layer = None
+        st.session_state.zone_layer_id = None
+    elif zone_file.file_id != st.session_state.zone_layer_id:
+        # Read each upload once; the layer is kept while its options change
+        try:
+            st.session_state.zone_layer = read_points_layer(zone_file)
+        except ValueError as e:
+            st.session_state.zone_layer = None
+            st.error(str(e))
+        st.session_state.zone_layer_id = zone_file.file_id
+
+    if st.session_state.zone_layer is not None:
+        zone_layer = st.session_state.zone_layer
+        layer_columns = numeric_columns(zone_layer)
+        default_columns = [column for column in ['EC Shallow', 'WetMass'] if column in layer_columns] or layer_columns[:1]
+        zone_columns = st.multiselect("Cluster on:", layer_columns, default=default_columns)
+        zone_col1, zone_col2, zone_col3, zone_col4 = st.columns(4)
+        with zone_col1:
+            zone_count = st.number_input("Zones:", min_value=2, max_value=10, value=4, step=1)
+        with zone_col2:
+            points_per_zone = st.number_input("Points per zone:", min_value=1, max_value=50, value=3, step=1)
+        with zone_col3:
+            edge_buffer = st.number_input("Distance from zone edges (meters):", min_value=0, value=20, step=5)
+        with zone_col4:
+            zone_seed = st.number_input("Random seed:", min_value=0, value=42, step=1, key="zone_seed")
+        clip_to_field = st.checkbox("Clip zones to the saved field", value=bool(st.session_state.saved_geography), disabled=not st.session_state.saved_geography)
+
+        if st.button("Generate zone points", disabled=not zone_columns):
+            field_polygon = None
+            if clip_to_field and st.session_state.saved_geography:
+                field_polygon = unary_union([shapely_shape(feature['geometry']) for feature in st.session_state.saved_geography if feature['geometry']['type'] in ['Polygon', 'MultiPolygon']])
+            with st.spinner(f"Clustering {len(zone_layer):,} points into {zone_count} zones..."):
+                zone_points, st.session_state.zone_summary = zone_sample_points(zone_layer, zone_columns, int(zone_count), int(points_per_zone), edge_buffer, field_polygon, int(zone_seed))
+            st.session_state.generated_points = point_features(zone_points)
+        if st.session_state.zone_summary is not None:
+            st.dataframe(st.session_state.zone_summary, use_container_width=True)
+
 # Buttons for actions
 button_col1, button_col2 = st.columns(2)
 with button_col1:
@@ -123,16 +180,25 @@ if st.session_state.saved_geography:
             style_function=lambda x: {"fillColor": "blue", "color": "blue", "weight": 2, "fillOpacity": 0.3},
         ).add_to(m)
 
+# Add generated sample points to map
+if st.session_state.generated_points:
+    generated_layer = folium.FeatureGroup(name="Generated sample points")
+    for feature in st.session_state.generated_points:
+        longitude, latitude = feature['geometry']['coordinates']
+        folium.CircleMarker(location=[latitude, longitude], radius=4, color="orange", fill=True, fill_opacity=1.0).add_to(generated_layer)
+    generated_layer.add_to(m)
+
 # Display the map
 returned_objects = st_folium(m, width='100%', height=600, returned_objects=["all_drawings"])
 
 # Handle save to shapefile action
 if save_to_shapefile_button:
-    if returned_objects and 'all_drawings' in returned_objects and returned_objects['all_drawings']:
-        shapefile_data = save_geojson_to_shapefile(returned_objects['all_drawings'], "SamplePoints")
+    drawn_points = (returned_objects or {}).get('all_drawings') or []
+    if st.session_state.generated_points or drawn_points:
+        shapefile_data = save_geojson_to_shapefile(st.session_state.generated_points + drawn_points, "SamplePoints")
         st.download_button("Download Shapefile", shapefile_data, "SamplePoints.zip", "application/zip")
     else:
-        st.warning("No markers found. Please add markers to the map before saving.")
+        st.warning("No markers found. Please add markers to the map or generate grid points before saving.")
 
 # Handle remove field action
 if 'remove_field_button' in locals() and remove_field_button:
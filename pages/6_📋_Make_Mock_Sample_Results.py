@@ -1,11 +1,12 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import datetime
 import base64
-from lxml import etree
-from io import BytesIO
-import os
+from geomaker.modus import modus_cache_key, modus_result_bytes
+from geomaker.modus_validation import validate_modus_xml, validate_modus_zip
+from geomaker.soil_tests import generate_soil_tests, identity_ranges, EMPIRICAL_SOURCE
+from geomaker.reference_data import load_reference_table
+from geomaker.sampling import read_points_layer, sample_locations, sample_geometries, projected_xy, numeric_columns, interpolate_layer
 
 # Set page configuration
 st.set_page_config(page_title="Geomaker", page_icon="🌍", layout="wide")
@@ -100,17 +101,13 @@ default_min_max_values = {
     "OM": (1, 6),
     "pH": (5, 8.5),
     "BpH": (5.5, 7.5),
-    "H_Meq": (0, 100),
     "pct H": (25,70),
     "pct K": (0, 10),
     "pct Ca": (10, 95),
     "pct Mg": (0.5, 10),
     "pct Na": (0, 5),
     "Cu": (0.2, 10),
-    "K": (20, 100),
     "S": (0, 40),
-    "Mg": (0, 600),
-    "Ca": (50, 400),
     "B": (0.1, 4.0),
     "Zn": (0.2, 10),
     "Fe": (10, 50),
@@ -118,10 +115,8 @@ default_min_max_values = {
     "NO3-N": (10, 100),
     "Cl": (0, 50),
     "Mo": (0.1, 0.5),
-    "Na": (0, 50),
     "AC": (35, 100),
     "NH4-N": (5, 50),
-    "OC": (1, 5),
     "Si": (5, 15),
     "SO4-S": (5, 20),
     "BD": (1, 2),
@@ -130,18 +125,15 @@ default_min_max_values = {
     "AdjSAR": (5, 25),
     "SAR": (5, 25),
     "Al": (1, 5),
-    "BS": (0, 100),
     "ECAP": (0.5, 5),
     "EKP": (100, 500),
     "EMgP": (50, 400),
-    "ESP": (2, 8),
     "HCO3": (0.1, 5),
     "HM": (0, 50),
     "Ni": (5, 30),
     "RZM": (50, 70),
     "Slake": (50, 80),
     "TN": (0.1, 0.5),
-    "TOC": (0.3, 3),
     "K&#58;B": (100, 600),
     "K&#58;Mg": (0.1, 3),
     "K&#58;Na": (0, 10),
@@ -164,6 +156,10 @@ default_min_max_values = {
     "Humic Matter": (0,5),
 }
 
+# Exchangeable cations, H_Meq, BS, ESP, OC and TOC are derived from CEC, the saturations and OM,
+# so their ranges are the ones those ranges imply
+default_min_max_values.update(identity_ranges(default_min_max_values))
+
 default_decimal_precisions = {
     "CEC": 1,
     "OM": 1,
@@ -233,7 +229,8 @@ default_decimal_precisions = {
     "Humic Matter": 0,
 }
 
-# Define default units for each column
+# Define default units for each column. The generated saturations are in % and the exchangeable
+# cations in ppm, as the chemical identities between them assume.
 default_units = {
     "CEC": ["meq/100g"],
     "OM": ["%"],
@@ -241,15 +238,15 @@ default_units = {
     "BpH": ["None"],
     "H_Meq": ["meq/100g"],
     "pct H": ["%"],
-    "pct K": ["%", "meq/100g"],
-    "pct Ca": ["%", "meq/100g"],
-    "pct Mg": ["%", "meq/100g"],
-    "pct Na": ["%", "meq/100g"],
+    "pct K": ["%"],
+    "pct Ca": ["%"],
+    "pct Mg": ["%"],
+    "pct Na": ["%"],
     "Cu": ["ppm", "lbs/ac"],
-    "K": ["ppm", "lbs/ac"],
+    "K": ["ppm"],
     "S": ["ppm", "lbs/ac"],
-    "Mg": ["ppm", "lbs/ac"],
-    "Ca": ["ppm", "lbs/ac"],
+    "Mg": ["ppm"],
+    "Ca": ["ppm"],
     "B": ["ppm", "lbs/ac"],
     "Zn": ["ppm", "lbs/ac"],
     "Fe": ["ppm", "lbs/ac"],
@@ -257,7 +254,7 @@ default_units = {
     "NO3-N": ["ppm"],
     "Cl": ["ppm"],
     "Mo": ["ppm", "lbs/ac"],
-    "Na": ["ppm", "lbs/ac"],
+    "Na": ["ppm"],
     "AC": ["meq/100g"],
     "NH4-N": ["ppm", "lbs/ac"],
     "OC": ["%"],
@@ -367,6 +364,10 @@ if 'max_sample_id' not in st.session_state:
     st.session_state.max_sample_id = None
 if 'column_units' not in st.session_state:
     st.session_state.column_units = {}
+if 'modus_xml_key' not in st.session_state:
+    st.session_state.modus_xml_key = None
+if 'sampling_points' not in st.session_state:
+    st.session_state.sampling_points = None
 
 # Expander for analysis and sample ranges
 with st.expander("Specify analysis and sample ranges", expanded=False):
@@ -434,19 +435,73 @@ with st.expander("Specify sample depth information", expanded=False):
                 "DepthUnit": depth_unit.lower()
             })
 
-# Function to create data frame
+# Expander for sample locations and how values vary across the field
+with st.expander("Specify sample locations", expanded=False):
+    # Points saved on the Create Sampling Points page, or an uploaded points shapefile
+    location_options = ["None (empty geometry)", "Upload a points shapefile (.zip)"]
+    if st.session_state.sampling_points is not None:
+        location_options.insert(1, "Points from 📍 Create Sampling Points")
+    location_source = st.radio("Sample locations:", location_options, horizontal=True)
+
+    sample_points = None
+    if location_source.startswith("Points from"):
+        sample_points = st.session_state.sampling_points
+    elif location_source.startswith("Upload"):
+        points_file = st.file_uploader("Upload a zipped points shapefile", type=["zip"], key="points_file")
+        if points_file is not None:
+            try:
+                sample_points = read_points_layer(points_file)
+            except ValueError as e:
+                st.error(str(e))
+
+    locations = None
+    spatial_mode = "Independent samples"
+    covariate_layer = None
+    if sample_points is not None and len(sample_points):
+        locations = sample_locations(sample_points)
+        st.write(f"{len(locations)} sample points; sample numbers come from their SampleID and the number range is ignored.")
+
+        # Values can vary smoothly across the field or follow a Veris/yield layer
+        spatial_mode = st.radio(
+            "Spatial structure:",
+            ["Independent samples", "Smooth spatial surface", "Interpolate from a covariate layer"],
+            horizontal=True,
+        )
+        correlation_length = st.number_input("Correlation Length (meters):", min_value=1, value=100)
+        if spatial_mode.startswith("Interpolate"):
+            covariate_file = st.file_uploader("Upload a Veris .dat file or a zipped yield/points shapefile", type=["dat", "txt", "csv", "zip"], key="covariate_file")
+            if covariate_file is not None:
+                try:
+                    covariate_layer = read_points_layer(covariate_file)
+                except ValueError as e:
+                    st.error(str(e))
+            if covariate_layer is not None:
+                covariate_options = numeric_columns(covariate_layer)
+                default_covariate = covariate_options.index('EC Shallow') if 'EC Shallow' in covariate_options else 0
+                covariate_column = st.selectbox("Covariate column:", covariate_options, index=default_covariate)
+
+# Sample numbers come from the sample points when there are any
+if locations is not None:
+    sample_numbers = locations.index.to_numpy()
+else:
+    sample_numbers = np.arange(min_sample_id, max_sample_id + 1)
+
+# Function to create data frame, with one row per sample and depth
 def create_data_frame():
     selected_columns = st.session_state.selected_columns
-    columns = ['SampleNumber'] + [col for col, selected in selected_columns.items() if selected]
-    data = pd.DataFrame(index=range(min_sample_id, max_sample_id + 1), columns=columns)
-    data['SampleNumber'] = range(min_sample_id, max_sample_id + 1)
+    columns = ['SampleNumber', 'DepthID'] + [col for col, selected in selected_columns.items() if selected]
+    data = pd.DataFrame(index=range(len(sample_numbers) * num_depths), columns=columns)
+    data['SampleNumber'] = np.repeat(sample_numbers, num_depths)
+    data['DepthID'] = np.tile(np.arange(1, num_depths + 1), len(sample_numbers))
     return data
 
 # Check if we need to create or update the data frame
 def should_create_new_data():
     if st.session_state.data is None:
         return True
-    if min_sample_id != st.session_state.min_sample_id or max_sample_id != st.session_state.max_sample_id:
+    if sample_numbers.tolist() != st.session_state.get('sample_numbers'):
+        return True
+    if num_depths != st.session_state.get('num_depths'):
         return True
     if st.session_state.selected_columns != st.session_state.get('prev_selected_columns', {}):
         return True
@@ -457,155 +512,115 @@ if should_create_new_data():
     st.session_state.data = create_data_frame()
     st.session_state.min_sample_id = min_sample_id
     st.session_state.max_sample_id = max_sample_id
+    st.session_state.sample_numbers = sample_numbers.tolist()
+    st.session_state.num_depths = num_depths
     st.session_state.prev_selected_columns = st.session_state.selected_columns.copy()
 
-# Generate random values
-if st.button("Generate Random Values"):
-    data = st.session_state.data
-    for column in data.columns:
-        if column != 'SampleNumber':
-            min_value, max_value = default_min_max_values.get(column, (0, 100))
-            decimal_precision = default_decimal_precisions.get(column, 2)
-            random_values = np.random.uniform(min_value, max_value, size=len(data))
-            rounded_values = np.round(random_values, decimal_precision)
-            data[column] = rounded_values
-    st.session_state.data = data
+# Generate correlated, chemically consistent random values for every sample and depth in one seeded draw
+seed_column, source_column, generate_column = st.columns([1, 2, 2])
+with seed_column:
+    random_seed = st.number_input("Random seed:", min_value=0, value=42, step=1)
+with source_column:
+    value_source = st.radio(
+        "Value distributions:",
+        ["Default ranges", "Real soil tests (ppmSoilTest.xlsx)"],
+        horizontal=True,
+        help="Real soil tests draws each analyte found in Data/ppmSoilTest.xlsx from that table's distribution and correlations and keeps it as drawn; base saturations are derived from its cations.",
+    )
+with generate_column:
+    st.write("")
+    generate_values = st.button("Generate Random Values")
+if generate_values:
+    analytes = [column for column in st.session_state.data.columns if column not in ['SampleNumber', 'DepthID']]
+    empirical_table = load_reference_table(EMPIRICAL_SOURCE) if value_source.startswith("Real") else None
+
+    # Spatial structure at the projected sample points: a smooth surface, or a covariate by KD-tree IDW
+    sample_xy = None
+    covariate = None
+    if spatial_mode.startswith("Smooth"):
+        sample_x, sample_y, _ = projected_xy(locations)
+        sample_xy = (sample_x, sample_y)
+    elif spatial_mode.startswith("Interpolate") and covariate_layer is not None:
+        covariate = interpolate_layer(covariate_layer, covariate_column, locations)
+
+    st.session_state.data = generate_soil_tests(
+        sample_numbers,
+        np.arange(1, num_depths + 1),
+        analytes,
+        default_min_max_values,
+        default_decimal_precisions,
+        seed=int(random_seed),
+        empirical_table=empirical_table,
+        locations=sample_xy,
+        correlation_length=correlation_length if sample_xy is not None else None,
+        covariate=covariate,
+    )
 
 # Display data editor
 edited_data = st.data_editor(st.session_state.data)
 st.session_state.data = edited_data
 
-# ModusResult metadata
-event_date = str(datetime.date.today())
-expiration_date = str(datetime.date.today() + datetime.timedelta(days=7))
-received_date = str(datetime.date.today())
-processed_date = str(datetime.date.today())
-
-# Generate XML content
-def generate_modus_xml(data, depth_refs):
-    xml_strings = ""
-    xml_strings += "<EventSamples>\n<Soil>\n"
-    # Depth references
-    xml_strings += "<DepthRefs>\n"
-    for depth_ref in depth_refs:
-        column_name = f"{depth_ref['StartingDepth']} - {depth_ref['EndingDepth']}"
-        xml_strings += f"  <DepthRef DepthID=\"{depth_ref['DepthID']}\">\n"
-        xml_strings += f"    <Name>{column_name}</Name>\n"
-        xml_strings += f"    <StartingDepth>{depth_ref['StartingDepth']}</StartingDepth>\n"
-        xml_strings += f"    <EndingDepth>{depth_ref['EndingDepth']}</EndingDepth>\n"
-        xml_strings += f"    <ColumnDepth>{depth_ref['ColumnDepth']}</ColumnDepth>\n"
-        xml_strings += f"    <DepthUnit>{depth_ref['DepthUnit']}</DepthUnit>\n"
-        xml_strings += f"  </DepthRef>\n"
-    xml_strings += "</DepthRefs>\n"
-    # Samples
-    for index, row in data.iterrows():
-        xml_strings += "<SoilSample>\n<SampleMetaData>\n"
-        xml_strings += f"  <SampleNumber>{int(row['SampleNumber'])}</SampleNumber>\n"
-        xml_strings += "  <OverwriteResult>false</OverwriteResult>\n"
-        xml_strings += "  <Geometry></Geometry>\n"
-        xml_strings += "</SampleMetaData>\n<Depths>\n"
-        for depth_ref in depth_refs:
-            xml_strings += f"<Depth DepthID=\"{depth_ref['DepthID']}\">\n<NutrientResults>\n"
-            for nutrient in data.columns:
-                if nutrient not in ['ID', 'SampleNumber'] and st.session_state.selected_columns.get(nutrient, False):
-                    nutrient_value = row[nutrient]
-                    nutrient_unit = st.session_state.column_units.get(nutrient, 'none')
-                    nutrient_value_desc = value_desc.get(nutrient, "VL")
-                    modus_test_id = default_modus_test_ids.get(nutrient, f"S-{nutrient}-B2-1:7.01.03")
-                    decimal_precision = default_decimal_precisions.get(nutrient, 2)
-                    rounded_nutrient_value = format(round(nutrient_value, decimal_precision), f".{decimal_precision}f")
-                    xml_strings += f"  <NutrientResult>\n"
-                    xml_strings += f"    <Element>{nutrient}</Element>\n"
-                    xml_strings += f"    <Value>{rounded_nutrient_value}</Value>\n"
-                    xml_strings += f"    <ModusTestID>{modus_test_id}</ModusTestID>\n"
-                    xml_strings += f"    <ValueType>Measured</ValueType>\n"
-                    xml_strings += f"    <ValueUnit>{nutrient_unit}</ValueUnit>\n"
-                    xml_strings += f"    <ValueDesc>{nutrient_value_desc}</ValueDesc>\n"
-                    xml_strings += f"  </NutrientResult>\n"
-            xml_strings += "</NutrientResults>\n</Depth>\n"
-        xml_strings += "</Depths>\n</SoilSample>\n"
-    xml_strings += "</Soil>\n</EventSamples>\n"
-    return xml_strings
-
-# Generate XML metadata
-modus_result_metadata = f"""<ModusResult xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" Version="1.0" xsi:noNamespaceSchemaLocation="modus_result.xsd">
-<Event>
-<EventMetaData>
-<EventCode>1234-ABCD</EventCode>
-<EventDate>{event_date}</EventDate>
-<EventType><Soil/></EventType>
-<EventExpirationDate>{expiration_date}</EventExpirationDate>
-</EventMetaData>
-<LabMetaData>
-<LabName>GeoMaker Analytical</LabName>
-<LabID>1234567</LabID>
-<LabEventID>1234567</LabEventID>
-<TestPackageRefs>
-<TestPackageRef TestPackageID="1">
-<Name>Gold Package</Name>
-<LabBillingCode>1234567</LabBillingCode>
-</TestPackageRef>
-</TestPackageRefs>
-<ReceivedDate>{received_date}T00:00:00-06:00</ReceivedDate>
-<ProcessedDate>{processed_date}T00:00:00-06:00</ProcessedDate>
-<Reports>
-<Report>
-<LabReportID></LabReportID>
-<FileDescription></FileDescription>
-<File></File>
-</Report>
-</Reports>
-</LabMetaData>
-"""
-
-# Generate full XML content
-xml_content = modus_result_metadata + generate_modus_xml(st.session_state.data, depth_refs) + "</Event>\n</ModusResult>\n"
+# Result columns written to the Modus file, with their units, test IDs, precision and description
+def modus_analytes(data):
+    analytes = []
+    for nutrient in data.columns:
+        if nutrient not in ['ID', 'SampleNumber', 'DepthID'] and st.session_state.selected_columns.get(nutrient, False):
+            analytes.append((
+                nutrient,
+                st.session_state.column_units.get(nutrient, 'none'),
+                default_modus_test_ids.get(nutrient, f"S-{nutrient}-B2-1:7.01.03"),
+                default_decimal_precisions.get(nutrient, 2),
+                value_desc.get(nutrient, "VL"),
+            ))
+    return analytes
+
+# Only build the XML when asked for; unchanged tables reuse the cached document
+analytes = modus_analytes(st.session_state.data)
+geometries = sample_geometries(locations) if locations is not None else None
+modus_xml_key = modus_cache_key(st.session_state.data, depth_refs, analytes, geometries=geometries)
+
+if st.button("Prepare Modus XML File"):
+    with st.spinner("Writing Modus XML..."):
+        modus_result_bytes(st.session_state.data, depth_refs, analytes, geometries=geometries)
+    st.session_state.modus_xml_key = modus_xml_key
 
 # Download button
-filename = "ModusbyGeoMaker.xml"
-st.download_button(
-    label="Download Modus XML File",
-    data=xml_content,
-    file_name=filename,
-    mime='application/xml'
-)
+if st.session_state.modus_xml_key == modus_xml_key:
+    filename = "ModusbyGeoMaker.xml"
+    st.download_button(
+        label="Download Modus XML File",
+        data=modus_result_bytes(st.session_state.data, depth_refs, analytes, geometries=geometries),
+        file_name=filename,
+        mime='application/xml'
+    )
+elif st.session_state.modus_xml_key is not None:
+    st.info("The results changed since the XML was prepared. Prepare it again to download the latest data.")
 
 # XML Validator Expander
 with st.expander("✅ Modus file validator", expanded=False):
-    class SchemaEntityResolver(etree.Resolver):
-        def resolve(self, url, pubid, context):
-            if 'modus_global.xsd' in url:
-                return self.resolve_filename(os.path.join('Data', 'modus_global.xsd'), context)
-            elif 'modus_submit.xsd' in url:
-                return self.resolve_filename(os.path.join('Data', 'modus_submit.xsd'), context)
-            return self.resolve_filename(url, context)
-
-    def validate_xml(xml_data, schema_path):
-        try:
-            parser = etree.XMLParser(load_dtd=True, no_network=False)
-            parser.resolvers.add(SchemaEntityResolver())
-            schema_doc = etree.parse(schema_path, parser)
-            schema = etree.XMLSchema(schema_doc)
-
-            xml_parser = etree.XMLParser(schema=schema)
-            etree.parse(BytesIO(xml_data.encode('utf-8')), xml_parser)
-            return True, None
-        except etree.XMLSchemaError as e:
-            return False, str(e)
-        except etree.XMLSyntaxError as e:
-            return False, str(e)
-
-    # Upload the XML file
-    uploaded_file = st.file_uploader("Upload your file to see if it's a valid Modus file.", type="xml")
-    if uploaded_file is not None:
-        xml_data = uploaded_file.read().decode('utf-8')
-
-        # Set the schema file path
-        schema_path = os.path.join("Data", "modus_result.xsd")
+    # Schema to validate against; compiled once per server process
+    schema_kind = st.selectbox("Modus schema:", ["Result", "Submit"]).lower()
 
-        is_valid, error_message = validate_xml(xml_data, schema_path)
+    # Upload the XML file, or a zip of many files to validate them in parallel
+    uploaded_file = st.file_uploader("Upload your file (or a zip of files) to see if it's a valid Modus file.", type=["xml", "zip"])
+    if uploaded_file is not None:
+        if uploaded_file.name.lower().endswith(".zip"):
+            with st.spinner("Validating files..."):
+                report = validate_modus_zip(uploaded_file, schema_kind)
 
-        if is_valid:
-            st.success("The XML file is valid.")
+            if report.empty:
+                st.warning("No .xml files were found in the zip.")
+            else:
+                invalid_count = int((~report["Valid"]).sum())
+                if invalid_count:
+                    st.error(f"{invalid_count} of {len(report)} files are invalid.")
+                else:
+                    st.success(f"All {len(report)} XML files are valid.")
+                st.dataframe(report, use_container_width=True)
         else:
-            st.error(f"Invalid XML file. Error message: {error_message}")
+            is_valid, error_message = validate_modus_xml(uploaded_file.read(), schema_kind)
+
+            if is_valid:
+                st.success("The XML file is valid.")
+            else:
+                st.error(f"Invalid XML file. Error message: {error_message}")
@@ -5,20 +5,13 @@ import tempfile
 from folium.plugins import Draw
 from streamlit_folium import st_folium
 from zipfile import ZipFile
-from io import BytesIO
-import fiona
-import os
-from shapely.geometry import Point, mapping
 from shapely.geometry import shape as shapely_shape, MultiPolygon
 import geopandas as gpd
-from pykml import parser
-from lxml import etree
-import pandas as pd
-from shapely.geometry import Polygon
-from shapely.affinity import translate
-from shapely.ops import cascaded_union
+from shapely.ops import unary_union
 from collections import OrderedDict
-from dateutil.parser import parse as parse_date
+from geomaker.mock_data import CROP_IDS, CROP_MASS_DEFAULTS, MOCK_LAYERS, make_mock_layer
+from geomaker.export import write_shapefile_zip
+from geomaker.boundaries import kml_to_geojson
 
 st.set_page_config(page_title="Geomaker", page_icon="🌍", layout="wide")
 
@@ -32,73 +25,19 @@ def get_uploaded_boundary_gdf(uploaded_boundary):
 def get_centroid(polygon):
     return polygon.centroid
 
-def get_offset(point1, point2):
-    return point2.x - point1.x, point2.y - point1.y
-
-def apply_offset(geometry, offset):
-    return translate(geometry, xoff=offset[0], yoff=offset[1], zoff=0.0)
-
-def make_yield(yield_shapefile_path, field_polygon, reference_centroid, crop, mass_adjustment, selected_date):
-    if os.path.exists(yield_shapefile_path):
-        gdf = read_shapefile_from_folder(yield_shapefile_path)
-    else:
-        st.error("Yield shapefile folder not found in the Data directory.")
+def make_yield(field_polygon, crop, mass_adjustment, selected_date):
+    # Set the crop, scale 'WetMass' and cover the field with the shifted yield observations
+    try:
+        gdf = make_mock_layer('yield', field_polygon, {'Crop': crop}, mass_adjustment, selected_date)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    if gdf.empty:
+        st.error("None of the yield points fall inside the field boundary.")
         return
 
-    # Update the 'Crop' column value
-    gdf['Crop'] = crop
-
-    # Apply mass adjustment to 'WetMass' column
-    gdf['WetMass'] = gdf['WetMass'] * mass_adjustment
-
-    # If a date has been selected, update the 'Time' and 'IsoTime' columns
-    if selected_date:
-        for column in ["Time", "IsoTime"]:
-            if column in gdf.columns:
-                gdf[column] = gdf[column].apply(lambda x: update_date(x, selected_date))
-
-    # Calculate the centroid of the field polygon
-    field_centroid = get_centroid(field_polygon)
-
-    # Calculate the offset needed to align the centroids
-    offset = get_offset(reference_centroid, field_centroid)
-
-    # Apply the same offset to all observations in the original shapefile
-    gdf["geometry"] = gdf["geometry"].apply(lambda x: apply_offset(x, offset))
-
-    # Save the new shapefile in a temporary directory
-    with tempfile.TemporaryDirectory() as tmpdir:
-        gdf.to_file(os.path.join(tmpdir, "new_yield.shp"))
-
-        # Create a zip file containing the shapefile components
-        with BytesIO() as buffer:
-            with ZipFile(buffer, "w") as zip_file:
-                for extension in ["shp", "shx", "dbf", "prj"]:
-                    zip_file.write(os.path.join(tmpdir, f"new_yield.{extension}"), f"new_yield.{extension}")
-            buffer.seek(0)
-            return buffer.read()
-
-def update_date(old_date_str, new_date):
-    # Parse the old date
-    old_date = parse_date(old_date_str)
-
-    # Replace the year, month, and day with the selected date's
-    new_date = old_date.replace(year=new_date.year, month=new_date.month, day=new_date.day)
-
-    # Format the new date according to the format of the old date
-    if "T" in old_date_str:  # IsoTime
-        return new_date.isoformat()[:-3] + "Z"
-    else:  # Time
-        return new_date.strftime("%m/%d/%Y %I:%M:%S %p")
-
-def read_shapefile_from_folder(folder_path):
-    # Find the .shp file in the folder (case-insensitive)
-    shapefile_path = next((file for file in os.listdir(folder_path) if file.lower().endswith(".shp")), None)
-    if shapefile_path:
-        gdf = gpd.read_file(os.path.join(folder_path, shapefile_path))
-    else:
-        raise FileNotFoundError("No .shp file found in the shapefile folder.")
-    return gdf
+    # Write the shapefile components straight into a zip in memory
+    return write_shapefile_zip(gdf, MOCK_LAYERS['yield']['filename'])
 
 if 'uploaded_boundary' not in st.session_state:
     st.session_state.uploaded_boundary = None
@@ -118,32 +57,15 @@ def shapefile_to_geojson(shp_file):
     return geojson
 
 def save_geojson_to_shapefile(all_drawings, filename, crop):
-    with tempfile.TemporaryDirectory() as tmpdir:
-        # Define schema
-        schema = {
-            'geometry': 'Polygon',
-            'properties': [('Name', 'str'), ('Crop', 'str')]
-        }
-
-        # Open a Fiona object
-        shapefile_filepath = os.path.join(tmpdir, f"{filename}.shp")
-        with fiona.open(shapefile_filepath, mode='w', driver='ESRI Shapefile', schema=schema, crs="EPSG:4326") as shp_file:
-            for idx, feature in enumerate(all_drawings):
-                if feature['geometry']['type'] == 'Polygon':
-                    polygon = shapely_shape(feature['geometry'])
-                    shape = {
-                        'geometry': mapping(polygon),
-                        'properties': {'Name': f"Polygon {idx}", 'Crop': crop}
-                    }
-                    shp_file.write(shape)
-
-        # Create a zip file containing the shapefile components
-        with BytesIO() as buffer:
-            with ZipFile(buffer, "w") as zip_file:
-                for extension in ["shp", "shx", "dbf", "prj"]:
-                    zip_file.write(os.path.join(tmpdir, f"{filename}.{extension}"), f"{filename}.{extension}")
-            buffer.seek(0)
-            return buffer.read()
+    polygons = [(idx, shapely_shape(feature['geometry'])) for idx, feature in enumerate(all_drawings) if feature['geometry']['type'] == 'Polygon']
+    gdf = gpd.GeoDataFrame(
+        {'Name': [f"Polygon {idx}" for idx, _ in polygons], 'Crop': [str(crop)] * len(polygons)},
+        geometry=[polygon for _, polygon in polygons],
+        crs="EPSG:4326"
+    )
+
+    # Write the shapefile components straight into a zip in memory
+    return write_shapefile_zip(gdf, filename)
 
 st.title("🌽 Make Yield Data")
 
@@ -163,17 +85,21 @@ with instructions_expander:
     """, unsafe_allow_html=True)
 
     #File Uploader
-    uploaded_file = st.file_uploader("Upload your zipped shapefile to set the frame to your boundary!", type=["zip"])
+    uploaded_file = st.file_uploader("Upload your zipped shapefile to set the frame to your boundary!", type=["zip", "kml", "geojson", "json"])
     load_boundary_button = st.button("Load boundary to map")
 
     if load_boundary_button:
         if uploaded_file is not None:
-            file_content_type = uploaded_file.type
-            if file_content_type == "application/json":
+            # Browsers report different content types for the same file, so go by the extension
+            file_name = uploaded_file.name.lower()
+            if file_name.endswith((".geojson", ".json")):
                 st.session_state.uploaded_boundary = json.load(uploaded_file)
-            elif file_content_type == "application/vnd.google-earth.kml+xml":
-                st.session_state.uploaded_boundary = kml_to_geojson(uploaded_file)
-            elif file_content_type == "application/zip":
+            elif file_name.endswith(".kml"):
+                try:
+                    st.session_state.uploaded_boundary = kml_to_geojson(uploaded_file)
+                except ValueError as e:
+                    st.error(str(e))
+            elif file_name.endswith(".zip"):
                 st.session_state.uploaded_boundary = shapefile_to_geojson(uploaded_file)
             else:
                 st.error("Unsupported file format. Please upload a GeoJSON, KML, or Shapefile.")
@@ -271,18 +197,15 @@ with col2:
     if selected_date:
         st.session_state.selected_date = selected_date
     # Define the crops and their corresponding IDs
-    crops_dict = {"Barley": 2, "Canola": 5, "Corn": 173, "Lentils": 8, "Oats": 11, "Soybeans": 174, "Wheat, Hard Red Winter": 11, "Sugarcane": 133}
     # Sort the dictionary alphabetically
-    sorted_crops_dict = OrderedDict(sorted(crops_dict.items()))
+    sorted_crops_dict = OrderedDict(sorted(CROP_IDS.items()))
 
     # Get the user's selected crop
     selected_crop_name = st.selectbox("Select a crop:", list(sorted_crops_dict.keys()))
     selected_crop_id = sorted_crops_dict[selected_crop_name]  # Get the ID of the selected crop
 
-    crop_defaults = {"Corn": 750, "Soybeans": 255, "Other": 0}
-
     # Get the default value for the selected crop
-    default_value = crop_defaults.get(selected_crop_name, 0)
+    default_value = CROP_MASS_DEFAULTS.get(selected_crop_name, 0)
 
     # Display the slider for mass adjustment
     mass_adjustment_input = st.slider(
@@ -304,21 +227,18 @@ with col2:
     ('saved_geography' in st.session_state and any(feature['geometry']['type'] in ['Polygon', 'MultiPolygon'] for feature in st.session_state.saved_geography)):
         uploaded_boundary_gdf = get_uploaded_boundary_gdf(st.session_state.uploaded_boundary)
         if uploaded_boundary_gdf is not None:
-            field_multipolygon = cascaded_union(uploaded_boundary_gdf.geometry)
+            field_multipolygon = unary_union(uploaded_boundary_gdf.geometry)
             field_centroid = field_multipolygon.representative_point()
 
         else:
-            field_multipolygon = cascaded_union([shapely_shape(feature['geometry']) for feature in st.session_state.saved_geography if feature['geometry']['type'] in ['Polygon', 'MultiPolygon']])
+            field_multipolygon = unary_union([shapely_shape(feature['geometry']) for feature in st.session_state.saved_geography if feature['geometry']['type'] in ['Polygon', 'MultiPolygon']])
             field_centroid = field_multipolygon.representative_point()
 
-        reference_centroid = Point(116.9200525150003, -30.65501315962107)
-
         if st.button("Make Yield"):
             if selected_crop_name:
                 with st.spinner("Creating your yield file. Please be patient, this will take a couple minutes."):
-                    yield_shapefile_path = "Data/Yield"
                     # call make_yield function with all the arguments
-                    new_yield_zip = make_yield(yield_shapefile_path, field_multipolygon, reference_centroid, selected_crop_id, mass_adjustment, st.session_state.selected_date)
+                    new_yield_zip = make_yield(field_multipolygon, selected_crop_id, mass_adjustment, selected_date)
                 if new_yield_zip:
                     st.download_button("Download Shapefile", new_yield_zip, "Yield_Shapefile.zip")
                     st.success("Congratulations, your new yield file has been made successfully!")
@@ -5,20 +5,12 @@ import tempfile
 from folium.plugins import Draw
 from streamlit_folium import st_folium
 from zipfile import ZipFile
-from io import BytesIO
-import fiona
-import os
-from shapely.geometry import Point, mapping
 from shapely.geometry import shape as shapely_shape, MultiPolygon
 import geopandas as gpd
-from pykml import parser
-from lxml import etree
-import pandas as pd
-from shapely.geometry import Polygon
-from shapely.affinity import translate
-from shapely.ops import cascaded_union
-from collections import OrderedDict
-from dateutil.parser import parse as parse_date
+from shapely.ops import unary_union
+from geomaker.mock_data import MOCK_LAYERS, make_mock_layer
+from geomaker.export import write_shapefile_zip
+from geomaker.boundaries import kml_to_geojson
 
 st.set_page_config(page_title="Geomaker", page_icon="🌍", layout="wide")
 
@@ -32,74 +24,19 @@ def get_uploaded_boundary_gdf(uploaded_boundary):
 def get_centroid(polygon):
     return polygon.centroid
 
-def get_offset(point1, point2):
-    return point2.x - point1.x, point2.y - point1.y
-
-def apply_offset(geometry, offset):
-    return translate(geometry, xoff=offset[0], yoff=offset[1], zoff=0.0)
-
-def make_application(application_shapefile_path, field_polygon, reference_centroid, Product, rate_adjustment, selected_date):
-    if os.path.exists(application_shapefile_path):
-        gdf = read_shapefile_from_folder(application_shapefile_path)
-    else:
-        st.error("Data not found in the Data directory.")
+def make_application(field_polygon, Product, rate_adjustment, selected_date):
+    # Set the product, scale 'AppliedRate' and cover the field with the shifted application observations
+    try:
+        gdf = make_mock_layer('application', field_polygon, {'Product': Product}, rate_adjustment, selected_date)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    if gdf.empty:
+        st.error("None of the application points fall inside the field boundary.")
         return
 
-    # Update the 'Product' column value
-    gdf['Product'] = product_name
-
-
-    # Apply rate adjustment to 'AppliedRate' column
-    gdf['AppliedRate'] = gdf['AppliedRate'] * rate_adjustment
-
-    # If a date has been selected, update the 'Time' and 'IsoTime' columns
-    if selected_date:
-        for column in ["Time", "IsoTime"]:
-            if column in gdf.columns:
-                gdf[column] = gdf[column].apply(lambda x: update_date(x, selected_date))
-
-    # Calculate the centroid of the field polygon
-    field_centroid = get_centroid(field_polygon)
-
-    # Calculate the offset needed to align the centroids
-    offset = get_offset(reference_centroid, field_centroid)
-
-    # Apply the same offset to all observations in the original shapefile
-    gdf["geometry"] = gdf["geometry"].apply(lambda x: apply_offset(x, offset))
-
-    # Save the new shapefile in a temporary directory
-    with tempfile.TemporaryDirectory() as tmpdir:
-        gdf.to_file(os.path.join(tmpdir, "Application.shp"))
-
-        # Create a zip file containing the shapefile components
-        with BytesIO() as buffer:
-            with ZipFile(buffer, "w") as zip_file:
-                for extension in ["shp", "shx", "dbf", "prj"]:
-                    zip_file.write(os.path.join(tmpdir, f"Application.{extension}"), f"Application.{extension}")
-            buffer.seek(0)
-            return buffer.read()
-
-def update_date(old_date_str, new_date):
-    # Parse the old date
-    old_date = parse_date(old_date_str)
-
-    # Replace the year, month, and day with the selected date's
-    new_date = old_date.replace(year=new_date.year, month=new_date.month, day=new_date.day)
-
-    # Format the new date according to the format of the old date
-    if "T" in old_date_str:  # IsoTime
-        return new_date.isoformat()[:-3] + "Z"
-    else:  # Time
-        return new_date.strftime("%m/%d/%Y %I:%M:%S %p")
-
-def read_shapefile_from_folder(folder_path):
-    # Find the .shp file in the folder (case-insensitive)
-    shapefile_path = next((file for file in os.listdir(folder_path) if file.lower().endswith(".shp")), None)
-    if shapefile_path:
-        gdf = gpd.read_file(os.path.join(folder_path, shapefile_path))
-    else:
-        raise FileNotFoundError("No .shp file found in the shapefile folder.")
-    return gdf
+    # Write the shapefile components straight into a zip in memory
+    return write_shapefile_zip(gdf, MOCK_LAYERS['application']['filename'])
 
 if 'uploaded_boundary' not in st.session_state:
     st.session_state.uploaded_boundary = None
@@ -119,32 +56,15 @@ def shapefile_to_geojson(shp_file):
     return geojson
 
 def save_geojson_to_shapefile(all_drawings, filename, crop):
-    with tempfile.TemporaryDirectory() as tmpdir:
-        # Define schema
-        schema = {
-            'geometry': 'Polygon',
-            'properties': [('Name', 'str'), ('Crop', 'str')]
-        }
-
-        # Open a Fiona object
-        shapefile_filepath = os.path.join(tmpdir, f"{filename}.shp")
-        with fiona.open(shapefile_filepath, mode='w', driver='ESRI Shapefile', schema=schema, crs="EPSG:4326") as shp_file:
-            for idx, feature in enumerate(all_drawings):
-                if feature['geometry']['type'] == 'Polygon':
-                    polygon = shapely_shape(feature['geometry'])
-                    shape = {
-                        'geometry': mapping(polygon),
-                        'properties': {'Name': f"Polygon {idx}", 'Crop': crop}
-                    }
-                    shp_file.write(shape)
-
-        # Create a zip file containing the shapefile components
-        with BytesIO() as buffer:
-            with ZipFile(buffer, "w") as zip_file:
-                for extension in ["shp", "shx", "dbf", "prj"]:
-                    zip_file.write(os.path.join(tmpdir, f"{filename}.{extension}"), f"{filename}.{extension}")
-            buffer.seek(0)
-            return buffer.read()
+    polygons = [(idx, shapely_shape(feature['geometry'])) for idx, feature in enumerate(all_drawings) if feature['geometry']['type'] == 'Polygon']
+    gdf = gpd.GeoDataFrame(
+        {'Name': [f"Polygon {idx}" for idx, _ in polygons], 'Crop': [str(crop)] * len(polygons)},
+        geometry=[polygon for _, polygon in polygons],
+        crs="EPSG:4326"
+    )
+
+    # Write the shapefile components straight into a zip in memory
+    return write_shapefile_zip(gdf, filename)
 
 st.title("🚜 Make Mock Application Data")
 st.warning("⚠️ This page is currently a work in progress. Rates are defaulted to a liquid fertilizer rate averaging ~17 gal/ac. Please notify Dylan of any issues you experience.")
@@ -163,17 +83,21 @@ with instructions_expander:
     """, unsafe_allow_html=True)
 
     #File Uploader
-    uploaded_file = st.file_uploader("Upload your zipped boundary file (shp,kml,geojson) to set the frame to your boundary!", type=["zip"])
+    uploaded_file = st.file_uploader("Upload your zipped boundary file (shp,kml,geojson) to set the frame to your boundary!", type=["zip", "kml", "geojson", "json"])
     load_boundary_button = st.button("Load boundary to map")
 
     if load_boundary_button:
         if uploaded_file is not None:
-            file_content_type = uploaded_file.type
-            if file_content_type == "application/json":
+            # Browsers report different content types for the same file, so go by the extension
+            file_name = uploaded_file.name.lower()
+            if file_name.endswith((".geojson", ".json")):
                 st.session_state.uploaded_boundary = json.load(uploaded_file)
-            elif file_content_type == "application/vnd.google-earth.kml+xml":
-                st.session_state.uploaded_boundary = kml_to_geojson(uploaded_file)
-            elif file_content_type == "application/zip":
+            elif file_name.endswith(".kml"):
+                try:
+                    st.session_state.uploaded_boundary = kml_to_geojson(uploaded_file)
+                except ValueError as e:
+                    st.error(str(e))
+            elif file_name.endswith(".zip"):
                 st.session_state.uploaded_boundary = shapefile_to_geojson(uploaded_file)
             else:
                 st.error("Unsupported file format. Please upload a GeoJSON, KML, or Shapefile.")
@@ -297,21 +221,18 @@ with col2:
     ('saved_geography' in st.session_state and any(feature['geometry']['type'] in ['Polygon', 'MultiPolygon'] for feature in st.session_state.saved_geography)):
         uploaded_boundary_gdf = get_uploaded_boundary_gdf(st.session_state.uploaded_boundary)
         if uploaded_boundary_gdf is not None:
-            field_multipolygon = cascaded_union(uploaded_boundary_gdf.geometry)
+            field_multipolygon = unary_union(uploaded_boundary_gdf.geometry)
             field_centroid = field_multipolygon.representative_point()
 
         else:
-            field_multipolygon = cascaded_union([shapely_shape(feature['geometry']) for feature in st.session_state.saved_geography if feature['geometry']['type'] in ['Polygon', 'MultiPolygon']])
+            field_multipolygon = unary_union([shapely_shape(feature['geometry']) for feature in st.session_state.saved_geography if feature['geometry']['type'] in ['Polygon', 'MultiPolygon']])
             field_centroid = field_multipolygon.representative_point()
 
-        reference_centroid = Point(-97.85271468657078, 39.83161673804731)
-
         if st.button("Make Data"):
             if product_name:
                 with st.spinner("Creating your application file. Please be patient, this will take a couple minutes."):
-                    application_shapefile_path = "Data/Application"
                     # call make_application function with all the arguments
-                    new_application_zip = make_application(application_shapefile_path, field_multipolygon, reference_centroid, product_name, rate_adjustment, st.session_state.selected_date)
+                    new_application_zip = make_application(field_multipolygon, product_name, rate_adjustment, selected_date)
 
                 if new_application_zip:
                     st.download_button("Download Shapefile", new_application_zip, "Application_Shapefile.zip")
@@ -0,0 +1,32 @@
+import geopandas as gpd
+import pytest
+import shapely
+
+from geomaker.batch import main
+from geomaker.mock_data import MOCK_LAYERS
+
+KIND_ARGUMENTS = {
+    "yield": ["--crop", "Corn"],
+    "application": ["--product", "UAN 32%"],
+    "seed": ["--crop", "Soybeans", "--variety", "AG 36X6"],
+}
+
+
+@pytest.mark.parametrize("kind", sorted(MOCK_LAYERS))
+def test_every_kind_runs_on_the_shipped_reference_data(kind, tmp_path):
+    # Two small fields near Ames, Iowa, well away from every reference footprint
+    boundaries = tmp_path / "boundaries"
+    boundaries.mkdir()
+    for name, x in [("f1", -93.62), ("f2", -93.60)]:
+        field = gpd.GeoDataFrame(geometry=[shapely.box(x, 42.03, x + 0.004, 42.033)], crs="EPSG:4326")
+        field.to_file(boundaries / f"{name}.geojson", driver="GeoJSON")
+
+    output = tmp_path / "output"
+    assert main([str(boundaries), str(output), "--kind", kind, "--date", "2024-06-01", "--workers", "2"] + KIND_ARGUMENTS[kind]) == 0
+
+    for name in ["f1", "f2"]:
+        layer = gpd.read_file(output / f"{name}_{kind}.zip")
+        assert len(layer)
+        # dBASE field names hold 10 characters, so AppliedRate reads back as AppliedRat
+        assert (layer[MOCK_LAYERS[kind]["rate_column"][:10]] > 0).all()
+        assert layer['Time'].str.startswith('06/01/2024').all()
@@ -0,0 +1,37 @@
+import pytest
+
+from geomaker.boundaries import kml_to_geojson
+
+SQUARE = "-93.65,42.02,0 -93.64,42.02,0 -93.64,42.03,0 -93.65,42.02,0"
+
+def write_kml(path, body):
+    path.write_text(
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<kml xmlns="http://www.opengis.net/kml/2.2"><Document>' + body + "</Document></kml>"
+    )
+    return path
+
+def placemark(name, geometry):
+    return f"<Placemark><name>{name}</name>{geometry}</Placemark>"
+
+def polygon(coordinates=SQUARE):
+    return f"<Polygon><outerBoundaryIs><LinearRing><coordinates>{coordinates}</coordinates></LinearRing></outerBoundaryIs></Polygon>"
+
+def test_polygons_from_every_kml_folder_are_kept(tmp_path):
+    kml = write_kml(tmp_path / "field.kml",
+        "<Folder><name>Fields</name>" + placemark("North", polygon()) + "</Folder>"
+        + placemark("South", polygon()) + placemark("Gate", "<Point><coordinates>-93.645,42.025,0</coordinates></Point>"))
+
+    with open(kml, "rb") as uploaded:
+        boundary = kml_to_geojson(uploaded)
+
+    assert boundary["type"] == "FeatureCollection"
+    assert sorted(feature["properties"]["Name"] for feature in boundary["features"]) == ["North", "South"]
+    assert {feature["geometry"]["type"] for feature in boundary["features"]} == {"Polygon"}
+    assert kml_to_geojson(kml) == boundary
+
+def test_kml_without_polygons_is_rejected(tmp_path):
+    kml = write_kml(tmp_path / "gate.kml", placemark("Gate", "<Point><coordinates>-93.645,42.025,0</coordinates></Point>"))
+
+    with pytest.raises(ValueError, match="No polygons"):
+        kml_to_geojson(kml)
@@ -0,0 +1,41 @@
+import datetime
+
+import geopandas as gpd
+import pandas as pd
+import pytest
+import shapely
+
+import geomaker.tiling
+from geomaker.dates import redate_column, update_date
+
+NEW_DATE = datetime.date(2024, 10, 1)
+
+
+@pytest.mark.parametrize("values", [
+    ["09/14/2019 09:30:00 AM", "09/14/2019 12:05:59 PM", "09/14/2019 11:59:59 PM"],
+    ["2019-09-14T09:30:00.125Z", "2019-09-14T12:05:59.000Z", "2019-09-14T23:59:59.999Z"],
+    ["9/14/2019 9:30:00 AM", "09/14/2019 12:05:59 PM"],
+])
+def test_redate_column_matches_update_date(values):
+    values = pd.Series(values)
+    expected = values.apply(lambda value: update_date(value, NEW_DATE))
+    assert redate_column(values, NEW_DATE).equals(expected)
+
+
+def test_tiled_layers_are_redated_through_redate_column(monkeypatch):
+    calls = []
+
+    def spy(values, new_date):
+        calls.append(len(values))
+        return redate_column(values, new_date)
+
+    monkeypatch.setattr(geomaker.tiling, "redate_column", spy)
+    reference = gpd.GeoDataFrame(
+        {'Time': ["09/14/2019 09:30:00 AM", "09/14/2019 09:30:01 AM"]},
+        geometry=gpd.points_from_xy([0.0, 0.001], [0.0, 0.001]),
+        crs="EPSG:4326",
+    )
+    layer = geomaker.tiling.tile_reference_layer(reference, shapely.box(-0.0005, -0.0005, 0.0015, 0.0015), (0.0, 0.0), NEW_DATE)
+    # The reference column is re-dated once, not once per kept point
+    assert calls == [2]
+    assert set(layer['Time']) == {"10/01/2024 09:30:00 AM", "10/01/2024 09:30:01 AM"}
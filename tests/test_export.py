@@ -0,0 +1,74 @@
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import pytest
+import shapely
+
+from geomaker.export import shapefile_components, write_shapefile_zip
+
+
+def read_back(gdf):
+    return gpd.read_file(BytesIO(write_shapefile_zip(gdf, "Test")))
+
+
+def test_point_attributes_round_trip():
+    gdf = gpd.GeoDataFrame(
+        {
+            'Small': [1.5, -0.25, np.nan],
+            'Large': [2e12, 1e25, 123456789.123456789],
+            'Tiny': [1e-7, 0.1, 3.0],
+            'Count': [1, -2, 300000000000],
+            'Crop': ['Corn', 'Soybeans', None],
+        },
+        geometry=gpd.points_from_xy([-97.1, -97.2, -97.3], [39.1, 39.2, 39.3]),
+        crs="EPSG:4326",
+    )
+    back = read_back(gdf)
+    for column in ['Small', 'Large', 'Tiny', 'Count']:
+        np.testing.assert_array_equal(back[column].to_numpy(dtype=float), gdf[column].to_numpy(dtype=float))
+    assert back['Crop'].tolist()[:2] == ['Corn', 'Soybeans'] and pd.isna(back['Crop'].iloc[2])
+    assert back.crs.to_epsg() == 4326
+    assert shapely.equals(back.geometry.values, gdf.geometry.values).all()
+
+
+def test_polygons_with_holes_multiparts_and_missing_geometries_round_trip():
+    geometries = [
+        shapely.box(0, 0, 4, 4).difference(shapely.box(1, 1, 2, 2)),
+        shapely.MultiPolygon([shapely.box(5, 5, 6, 6), shapely.box(7, 7, 8, 8)]),
+        shapely.Polygon([(0, 0), (1, 0), (1, 1), (0, 1)]),
+        None,
+    ]
+    gdf = gpd.GeoDataFrame({'Rate': [100.0, 120.5, 90.0, 80.0]}, geometry=geometries, crs="EPSG:4326")
+    back = read_back(gdf)
+    assert back.geometry.iloc[3] is None
+    assert shapely.equals(back.geometry.values[:3], gdf.geometry.values[:3]).all()
+    np.testing.assert_array_equal(back['Rate'], gdf['Rate'])
+
+
+def test_non_ascii_field_names_are_kept_and_unique():
+    gdf = gpd.GeoDataFrame(
+        {'Ñandú_long_name': [1], 'Ñandú_long_name2': [2]},
+        geometry=[shapely.Point(0, 0)],
+        crs="EPSG:4326",
+    )
+    names = [column for column in read_back(gdf).columns if column != 'geometry']
+    assert len(set(names)) == 2
+    assert all(name.startswith('Ñandú') for name in names)
+
+
+@pytest.mark.parametrize("values", [[np.inf, 1.0], [1e300, 1.0]])
+def test_values_a_field_cannot_hold_are_rejected(values):
+    gdf = gpd.GeoDataFrame({'Value': values}, geometry=[shapely.Point(0, 0)] * 2)
+    with pytest.raises(ValueError):
+        shapefile_components(gdf)
+
+
+def test_empty_layers_and_all_missing_columns_are_written():
+    empty = gpd.GeoDataFrame({'Rate': np.array([], dtype=float), 'Crop': np.array([], dtype=object)}, geometry=gpd.points_from_xy([], []), crs="EPSG:4326")
+    back = read_back(empty)
+    assert len(back) == 0 and list(back.columns) == ['Rate', 'Crop', 'geometry']
+
+    missing = gpd.GeoDataFrame({'Rate': [np.nan, np.nan]}, geometry=gpd.points_from_xy([1, 2], [3, 4]), crs="EPSG:4326")
+    assert read_back(missing)['Rate'].isna().all()
@@ -0,0 +1,28 @@
+from io import BytesIO
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from geomaker.heatmap import GAP_PIXELS, colorize, display_factor, heatmap_image, side_by_side_image, upscale
+
+
+def decode(data):
+    return np.asarray(Image.open(BytesIO(data)))
+
+
+@pytest.mark.parametrize("format", ["png", "webp"])
+def test_heatmap_image_round_trips(format):
+    grid = np.arange(12, dtype=float).reshape(3, 4)
+    grid[1, 2] = np.nan
+    expected = upscale(colorize(grid, 0, 11), display_factor(4))
+    image = decode(heatmap_image(grid, 0, 11, format=format))
+    np.testing.assert_array_equal(image, expected)
+    assert image[1 * display_factor(4), 2 * display_factor(4), 3] == 0
+
+
+def test_side_by_side_image_pads_and_separates_grids():
+    image = decode(side_by_side_image([np.ones((2, 3)), np.zeros((4, 3))], 0, 1, width=30))
+    assert image.shape == (40, 30 + GAP_PIXELS + 30, 4)
+    assert (image[:, 30:30 + GAP_PIXELS] == 0).all()
+    assert (image[20:, :30] == 0).all()
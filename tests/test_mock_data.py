@@ -0,0 +1,40 @@
+import datetime
+
+import geopandas as gpd
+import pytest
+import shapely
+
+from geomaker.dates import TIME_FORMAT
+from geomaker.mock_data import CROP_SEEDING_RATES, WORK_DAY_HOURS, generate_mock_layer, with_reference_attributes
+
+
+def make_reference():
+    # Attribute-less points like the shipped Data/ layers, on a 3 x 3 block around the origin
+    x, y = [0.0, 0.001, 0.002] * 3, [0.0] * 3 + [0.001] * 3 + [0.002] * 3
+    return gpd.GeoDataFrame(geometry=gpd.points_from_xy(x, y), crs="EPSG:4326")
+
+
+def test_reference_attributes_fill_one_working_day():
+    reference = with_reference_attributes(make_reference(), 'WetMass', 1.3, datetime.date(2024, 10, 1))
+    assert (reference['WetMass'] == 1.3).all()
+    times = gpd.pd.to_datetime(reference['Time'], format=TIME_FORMAT)
+    assert times.is_monotonic_increasing and (times.dt.date == datetime.date(2024, 10, 1)).all()
+    assert (times.iloc[-1] - times.iloc[0]).total_seconds() < WORK_DAY_HOURS * 3600
+
+
+def test_seed_layer_gets_a_scaled_rate_and_the_planting_date():
+    reference = with_reference_attributes(make_reference(), 'AppliedRate', CROP_SEEDING_RATES['Soybeans'], datetime.date(2024, 5, 1))
+    field = shapely.box(-0.0005, -0.0005, 0.0025, 0.0025)
+    layer = generate_mock_layer(
+        reference, field, field.centroid, {'Crop': 'Soybeans', 'Variety': 'AG 36X6'},
+        'AppliedRate', 1.5, datetime.date(2025, 4, 20),
+    )
+    assert len(layer)
+    assert (layer['AppliedRate'] == CROP_SEEDING_RATES['Soybeans'] * 1.5).all()
+    # Every tile replays the reference pass, so times stay within the reference's span
+    assert layer['Time'].isin(reference['Time'].str.replace('05/01/2024', '04/20/2025')).all()
+
+
+def test_missing_rate_column_raises():
+    with pytest.raises(ValueError):
+        generate_mock_layer(make_reference(), shapely.box(0, 0, 0.002, 0.002), shapely.Point(0.001, 0.001), {'Crop': 173}, 'WetMass', 1.0)
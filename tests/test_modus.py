@@ -0,0 +1,50 @@
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+from lxml import etree
+
+from geomaker.modus import write_modus_result
+from geomaker.modus_validation import validate_modus_xml
+
+DEPTH_REFS = [
+    {"DepthID": 1, "StartingDepth": 0, "EndingDepth": 6, "ColumnDepth": 6, "DepthUnit": "inches"},
+    {"DepthID": 2, "StartingDepth": 6, "EndingDepth": 12, "ColumnDepth": 6, "DepthUnit": "inches"},
+]
+ANALYTES = [
+    ("pH", "none", "S-PH-1:1.02.07", 1, "VL"),
+    ("P", "ppm", "S-P-M3.04", 0, "VL"),
+]
+
+
+def write(data, geometries=None):
+    output = BytesIO()
+    write_modus_result(output, data, DEPTH_REFS, ANALYTES, geometries=geometries)
+    return output.getvalue()
+
+
+def test_result_document_is_valid():
+    data = pd.DataFrame({'SampleNumber': [1, 2], 'pH': [6.25, 7.0], 'P': [12.4, 30.0]})
+    document = write(data, geometries={1: "POINT (-97.1 39.1)"})
+    assert validate_modus_xml(document) == (True, None)
+    root = etree.fromstring(document)
+    assert root.findtext('.//SoilSample/SampleMetaData/Geometry') == "POINT (-97.1 39.1)"
+    assert [value.text for value in root.iter('Value')][:2] == ['6.2', '12']
+
+
+def test_missing_depth_rows_and_values_are_left_out():
+    data = pd.DataFrame({
+        'SampleNumber': [1, 1, 2],
+        'DepthID': [1, 2, 1],
+        'pH': [6.5, np.nan, 7.1],
+        'P': [20.0, 15.0, 9.0],
+    })
+    document = write(data)
+    assert validate_modus_xml(document) == (True, None)
+    assert b"nan" not in document
+
+    depths = etree.fromstring(document).findall('.//SoilSample/Depths')
+    # Sample 1 at depth 2 has no pH; sample 2 has no row at depth 2 at all
+    assert [result.findtext('Element') for result in depths[0].findall("Depth[@DepthID='2']/NutrientResults/NutrientResult")] == ['P']
+    assert depths[1].find("Depth[@DepthID='2']/NutrientResults") is None
+    assert len(depths[1].findall("Depth[@DepthID='1']/NutrientResults/NutrientResult")) == 2
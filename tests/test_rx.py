@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from geomaker.rx import clipped_scale, scale_rates
+
+
+def clipped_total(scale, values, weights, min_rate, max_rate):
+    return float(np.dot(weights, np.clip(scale * values, min_rate, max_rate)))
+
+
+def brute_force_scale(values, weights, target, min_rate, max_rate):
+    # Bisection on the clipped total, which never decreases as the scale grows
+    low, high = 0.0, 1.0
+    while clipped_total(high, values, weights, min_rate, max_rate) < target:
+        high *= 2
+    for _ in range(200):
+        middle = (low + high) / 2
+        if clipped_total(middle, values, weights, min_rate, max_rate) < target:
+            low = middle
+        else:
+            high = middle
+    return high
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_clipped_scale_meets_the_target(seed):
+    rng = np.random.default_rng(seed)
+    values = rng.uniform(0, 300, 1000)
+    values[rng.choice(1000, 50)] = 0.0
+    values[:20] = 150.0
+    weights = rng.uniform(0.5, 3, 1000)
+    min_rate, max_rate = 60.0, 250.0
+    target = rng.uniform(clipped_total(0, values, weights, min_rate, max_rate), clipped_total(1e9, values, weights, min_rate, max_rate))
+
+    scale, reachable = clipped_scale(values, weights, target, min_rate, max_rate)
+    assert reachable
+    assert clipped_total(scale, values, weights, min_rate, max_rate) == pytest.approx(target, rel=1e-9)
+    assert scale == pytest.approx(brute_force_scale(values, weights, target, min_rate, max_rate), rel=1e-9)
+
+
+def test_unreachable_targets_get_the_nearest_extreme():
+    values = np.array([100.0, 200.0, 0.0])
+    weights = np.array([1.0, 2.0, 1.0])
+    assert clipped_scale(values, weights, 10.0, 50.0, 300.0) == (0.0, False)
+    assert clipped_scale(values, weights, 1e6, 50.0, 300.0) == (np.inf, False)
+    # The extremes themselves are reachable
+    assert clipped_scale(values, weights, 200.0, 50.0, 300.0) == (0.0, True)
+    assert clipped_scale(values, weights, 950.0, 50.0, 300.0) == (np.inf, True)
+
+
+def test_scale_rates_keeps_zero_cells_and_limits():
+    values = np.array([0.0, 80.0, 120.0, 400.0])
+    weights = np.ones(4)
+    rates, scale, reachable = scale_rates(values, weights, 500.0, 0.0, 250.0)
+    assert reachable
+    assert rates[0] == 0.0 and rates.max() <= 250.0
+    assert rates.sum() == pytest.approx(500.0)
+    np.testing.assert_allclose(rates[1:3], values[1:3] * scale)
+
+
+def test_scale_rates_with_spread_meets_the_target():
+    rng = np.random.default_rng(3)
+    values = rng.uniform(50, 200, 500)
+    weights = rng.uniform(0.5, 2, 500)
+    target = 1.1 * np.dot(values, weights)
+    rates, _, reachable = scale_rates(values, weights, target, 40.0, 260.0, spread=0.5)
+    assert reachable
+    assert np.dot(rates, weights) == pytest.approx(target)
+    # Every cell keeps its rank
+    assert (np.diff(rates[np.argsort(values)]) >= 0).all()
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from geomaker.reference_data import load_reference_table
+from geomaker.soil_tests import CATION_EQUIVALENTS, EMPIRICAL_SOURCE, VAN_BEMMELEN_FACTOR, empirical_columns, enforce_identities, generate_soil_tests, identity_ranges
+
+MIN_MAX_VALUES = {
+    "CEC": (10, 40), "OM": (1, 6), "pct H": (25, 70), "pct K": (0, 10), "pct Ca": (10, 95),
+    "pct Mg": (0.5, 10), "pct Na": (0, 5), "P(B1)": (1, 60),
+}
+MIN_MAX_VALUES.update(identity_ranges(MIN_MAX_VALUES))
+DECIMALS = {"CEC": 1, "OM": 1, "pct H": 1, "pct K": 1, "pct Ca": 1, "pct Mg": 1, "pct Na": 1, "K": 0, "Ca": 0, "Mg": 1, "Na": 1}
+ANALYTES = ["CEC", "OM", "OC", "TOC", "pct K", "pct Ca", "pct Mg", "pct Na", "pct H", "K", "Ca", "Mg", "Na", "H_Meq", "BS", "ESP", "K&#58;Mg", "P(B1)"]
+
+
+@pytest.fixture(scope="module")
+def data():
+    return generate_soil_tests(np.arange(1, 501), [1, 2, 3], ANALYTES, MIN_MAX_VALUES, DECIMALS, seed=7)
+
+
+def test_identities_hold(data):
+    saturations = data[["pct K", "pct Ca", "pct Mg", "pct Na", "pct H"]].sum(axis=1)
+    np.testing.assert_allclose(saturations, 100, atol=1e-9)
+    for cation, (saturation, ppm_per_meq) in CATION_EQUIVALENTS.items():
+        expected = data[saturation] / 100 * data["CEC"] * ppm_per_meq
+        np.testing.assert_allclose(data[cation], expected, atol=0.5 * 10.0 ** -DECIMALS[cation])
+    np.testing.assert_allclose(data["OC"], data["OM"] / VAN_BEMMELEN_FACTOR, atol=0.05)
+    np.testing.assert_allclose(data["K&#58;Mg"], data["K"] / data["Mg"], atol=0.05)
+    np.testing.assert_array_equal(data["ESP"], data["pct Na"])
+
+
+def test_values_stay_within_their_ranges(data):
+    for analyte in ANALYTES:
+        if "&#58;" in analyte:
+            continue
+        low, high = MIN_MAX_VALUES[analyte]
+        # pct H absorbs the rounding of the four base saturations
+        tolerance = 0.2 if analyte == "pct H" else 10.0 ** -DECIMALS.get(analyte, 2)
+        assert data[analyte].between(low - tolerance, high + tolerance).all(), analyte
+
+
+def test_saturations_fit_to_100_within_ranges():
+    analytes = ["CEC", "OM", "pct K", "pct Ca", "pct Mg", "pct Na", "pct H"]
+    ranges = [MIN_MAX_VALUES[analyte] for analyte in analytes]
+    values = np.array([[20.0, 3.0, 10.0, 95.0, 10.0, 5.0, 70.0], [20.0, 3.0, 0.0, 10.0, 0.5, 0.0, 25.0]])
+    enforce_identities(values, analytes, [1] * len(analytes), ranges)
+    np.testing.assert_allclose(values[:, 2:].sum(axis=1), 100)
+    low, high = np.array(ranges[2:]).T
+    assert ((values[:, 2:] >= low - 0.2) & (values[:, 2:] <= high + 0.2)).all()
+
+
+def test_empirical_values_keep_the_table_distributions():
+    table = load_reference_table(EMPIRICAL_SOURCE)
+    data = generate_soil_tests(np.arange(1, 501), [1, 2, 3], ANALYTES, MIN_MAX_VALUES, DECIMALS, seed=7, empirical_table=table)
+    topsoil = data[data["DepthID"] == 1]
+    for analyte, column in empirical_columns(table, ANALYTES).items():
+        observed = table[column].dropna()
+        tolerance = 10.0 ** -DECIMALS.get(analyte, 2)
+        assert data[analyte].between(observed.min() - tolerance, observed.max() + tolerance).all(), analyte
+        assert observed.quantile(0.25) <= topsoil[analyte].median() <= observed.quantile(0.75), analyte
+    # Saturations follow the table's cations instead of the cations following the saturations
+    for cation, (saturation, ppm_per_meq) in CATION_EQUIVALENTS.items():
+        np.testing.assert_allclose(data[saturation], data[cation] / ppm_per_meq / data["CEC"] * 100, atol=0.05)
+    saturations = data[["pct K", "pct Ca", "pct Mg", "pct Na", "pct H"]].sum(axis=1)
+    np.testing.assert_allclose(saturations, 100, atol=1e-9)
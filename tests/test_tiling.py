@@ -0,0 +1,38 @@
+import datetime
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+
+from geomaker.dates import TIME_FORMAT, redate_column
+from geomaker.tiling import tile_reference_layer
+
+
+def make_reference():
+    # 10 x 10 block of points 0.001 degrees apart, logged one second apart from mid-morning
+    x, y = np.meshgrid(np.arange(10) * 0.001, np.arange(10) * 0.001)
+    stamps = pd.Timestamp("2019-09-14 09:30:00") + pd.to_timedelta(np.arange(100), unit="s")
+    return gpd.GeoDataFrame(
+        {'Rate': np.arange(100.0), 'Time': stamps.strftime(TIME_FORMAT)},
+        geometry=gpd.points_from_xy(x.ravel(), y.ravel()),
+        crs="EPSG:4326",
+    )
+
+
+def test_tiles_cover_the_field_and_keep_the_reference_times():
+    reference = make_reference()
+    field = shapely.box(-0.0095, -0.0095, 0.0185, 0.0185)
+    layer = tile_reference_layer(reference, field, (0.0, 0.0), datetime.date(2024, 10, 1))
+    assert len(layer) == int(shapely.contains_xy(field, *shapely.get_coordinates(layer.geometry.values).T).sum())
+    assert len(layer) > 4 * len(reference)
+    # Each tile is one pass over the reference's own time span, on the new date
+    assert layer['Time'].isin(redate_column(reference['Time'], datetime.date(2024, 10, 1))).all()
+    assert layer['Time'].str.startswith('10/01/2024').all()
+
+
+def test_fields_needing_too_many_points_raise():
+    field = shapely.box(-0.05, -0.05, 0.05, 0.05)
+    with pytest.raises(ValueError, match="more than 1,000 points"):
+        tile_reference_layer(make_reference(), field, (0.0, 0.0), max_points=1_000)
@@ -0,0 +1,44 @@
+import os
+
+import pandas as pd
+import pytest
+
+from geomaker.veris import VERIS_COLUMNS, make_veris_file
+
+
+def make_chunk(rows):
+    return pd.DataFrame({
+        'Latitude': [39.1] * rows, 'Longitude': [-97.1] * rows,
+        'EC Shallow': [12.5] * rows, 'EC Deep': [20.25] * rows, 'pH': [6.5] * rows,
+        'Date': ['2024-05-01'] * rows, 'Time': ['08:00:00'] * rows,
+    })
+
+
+def test_veris_file_has_a_header_and_every_row(tmp_path):
+    path, rows, preview = make_veris_file([make_chunk(3), make_chunk(2)], directory=tmp_path)
+    with open(path, encoding='utf-8') as dat:
+        lines = dat.read().splitlines()
+    assert path.endswith('.dat') and os.path.dirname(path) == str(tmp_path)
+    assert rows == 5 and len(lines) == 6
+    assert lines[0].split('\t') == VERIS_COLUMNS
+    assert lines[1] == '39.10000000\t-97.10000000\t12.50\t20.25\t6.50\t2024-05-01\t08:00:00'
+    assert len(preview) == 3
+
+
+def test_failed_veris_file_is_removed(tmp_path):
+    def chunks():
+        yield make_chunk(2)
+        raise ValueError("survey failed")
+
+    with pytest.raises(ValueError):
+        make_veris_file(chunks(), directory=tmp_path)
+    assert not list(tmp_path.iterdir())
+
+
+def test_veris_file_is_accepted_by_download_button(tmp_path):
+    button = pytest.importorskip("streamlit.elements.widgets.button")
+    from streamlit.proto.DownloadButton_pb2 import DownloadButton
+
+    path, _, _ = make_veris_file([make_chunk(2)], directory=tmp_path)
+    with open(path, 'rb') as veris_file:
+        button.marshall_file("veris", veris_file, DownloadButton(), "text/plain", "veris_data.dat")